@@ -0,0 +1,170 @@
+import os
+import json
+import numpy as np
+from multi_move_analysis import LEG_POINTS, compute_frame_features
+from pose_analysis_gongbu import PoseAnalyzer_gongbu
+"""
+动作分段：一次线性遍历，把序列的每一帧标注为
+    gongbu_hold        弓步定势
+    tantui_chamber     弹腿提膝（踢腿脚离地、膝盖弯曲，尚未伸直）
+    tantui_extension   弹腿伸直（踢腿脚离地、膝盖伸直）
+    tantui_retraction  弹腿收腿（伸直之后膝盖重新弯曲、脚尚未落地）
+    transition         过渡（腿部在移动）
+    idle               静止或缺少腿部关键点
+再合并成区间列表。分析器和评分器可以只在相关区间内做判定
+（弓步关键帧只可能出现在 gongbu_hold 中，弹腿关键帧只可能出现在 tantui_extension 中），
+报告可以给出每次定势的保持时长
+
+区间均为 (起始帧, 结束帧)，结束帧不包含在内，帧号为序列下标
+"""
+
+LABELS = ['gongbu_hold', 'tantui_chamber', 'tantui_extension', 'tantui_retraction', 'transition', 'idle']
+KICK_LABELS = ('tantui_chamber', 'tantui_extension', 'tantui_retraction')
+
+
+class ActionSegmenter:
+    def __init__(self, gongbu_analyzer=None, extension_angle=130, lift_ratio=0.1,
+                 motion_threshold=0.01, min_segment_frames=3):
+        # 弓步判定沿用弓步分析器的条件
+        self.gongbu_analyzer = gongbu_analyzer or PoseAnalyzer_gongbu()
+        self.extension_angle = extension_angle        # 踢腿膝角不小于该值视为伸直（与弹腿关键帧判定一致）
+        self.lift_ratio = lift_ratio                  # 两脚高度差超过 腿长 × 该比例 视为踢腿脚离地
+        self.motion_threshold = motion_threshold      # 腿部关键点每帧平均位移 / 腿长 超过该值视为过渡
+        self.min_segment_frames = min_segment_frames  # 短于该帧数的弓步段记为过渡，过渡/静止段并入前一段
+        self.reset()
+
+    def reset(self):
+        self.previous_points = None
+        self.kick_extended = False  # 当前这次踢腿是否已经伸直过
+
+    def update(self, frame_data, features=None):
+        """
+        标注一帧（在线，每帧 O(1)），返回未经合并的原始标签
+        features: compute_frame_features 的结果（可选，未提供时在此计算）
+        """
+        if features is None:
+            features = compute_frame_features(frame_data)
+        if features is None:
+            self.previous_points = None
+            self.kick_extended = False
+            return 'idle'
+
+        points = np.array([(frame_data[name]['x'], frame_data[name]['y']) for name in LEG_POINTS])
+        leg_length = (np.linalg.norm(points[0] - points[4]) + np.linalg.norm(points[1] - points[5])) / 2
+        motion = 0.0
+        if self.previous_points is not None and leg_length > 0:
+            motion = np.linalg.norm(points - self.previous_points, axis=1).mean() / leg_length
+        self.previous_points = points
+
+        # 支撑腿为位置较低（y较大）的一侧，与弹腿分析器一致
+        left_ankle_y, right_ankle_y = points[4][1], points[5][1]
+        is_left_support = left_ankle_y > right_ankle_y
+        lift = abs(left_ankle_y - right_ankle_y)
+        kick_angle = features['right_knee_angle' if is_left_support else 'left_knee_angle']
+
+        # 弓步要求双脚着地，先于踢腿判断
+        if self.gongbu_analyzer.is_gong_bu_frame(frame_data, features):
+            self.kick_extended = False
+            return 'gongbu_hold'
+
+        if leg_length > 0 and lift > self.lift_ratio * leg_length:
+            if kick_angle >= self.extension_angle:
+                self.kick_extended = True
+                return 'tantui_extension'
+            return 'tantui_retraction' if self.kick_extended else 'tantui_chamber'
+        self.kick_extended = False
+
+        return 'transition' if motion > self.motion_threshold else 'idle'
+
+    def segment_sequence(self, frame_sequence, features=None, fps=None):
+        """
+        对整段序列分段
+        features: 与序列对齐的预计算帧特征（可选）
+        fps: 提供时每段附带时长（秒）
+        返回 {'labels': 每帧标签, 'segments': [{'label', 'start', 'end', 'frames'[, 'duration']}]}
+        """
+        self.reset()
+        labels = [self.update(frame_data, features[i] if features is not None else None)
+                  for i, frame_data in enumerate(frame_sequence)]
+        segments = self._merge_runs(labels)
+
+        # 合并后的区间写回逐帧标签，两者保持一致
+        for segment in segments:
+            labels[segment['start']:segment['end']] = [segment['label']] * segment['frames']
+            if fps:
+                segment['duration'] = segment['frames'] / fps
+        return {'labels': labels, 'segments': segments}
+
+    def _merge_runs(self, labels):
+        """把连续相同的标签合并为区间，并去掉过短的弓步段和过渡/静止段的抖动"""
+        segments = []
+        start = 0
+        for i in range(1, len(labels) + 1):
+            if i < len(labels) and labels[i] == labels[start]:
+                continue
+            label = labels[start]
+            frames = i - start
+            if label == 'gongbu_hold' and frames < self.min_segment_frames:
+                label = 'transition'
+            previous = segments[-1] if segments else None
+            if previous is not None and (
+                    previous['label'] == label or
+                    (frames < self.min_segment_frames and label in ('transition', 'idle')
+                     and previous['label'] in ('transition', 'idle'))):
+                previous['end'] = i
+                previous['frames'] = i - previous['start']
+            else:
+                segments.append({'label': label, 'start': start, 'end': i, 'frames': frames})
+            start = i
+        return segments
+
+
+def intervals(segments, labels):
+    """取出指定标签（单个或多个）的区间列表 [(起始帧, 结束帧)]"""
+    if isinstance(labels, str):
+        labels = (labels,)
+    return [(segment['start'], segment['end']) for segment in segments if segment['label'] in labels]
+
+
+def summarize_segments(segments, fps=None):
+    """
+    按标签统计段数与帧数；弓步定势另给出每次保持的帧数（及秒数）
+    """
+    summary = {label: {'count': 0, 'frames': 0} for label in LABELS}
+    for segment in segments:
+        summary[segment['label']]['count'] += 1
+        summary[segment['label']]['frames'] += segment['frames']
+
+    holds = [segment['frames'] for segment in segments if segment['label'] == 'gongbu_hold']
+    summary['gongbu_hold']['hold_frames'] = holds
+    if fps:
+        summary['gongbu_hold']['hold_seconds'] = [frames / fps for frames in holds]
+    # 连续的提膝/伸直/收腿段算作一次踢腿
+    summary['kicks'] = sum(1 for k, segment in enumerate(segments)
+                           if segment['label'] in KICK_LABELS
+                           and (k == 0 or segments[k - 1]['label'] not in KICK_LABELS))
+    return summary
+
+
+def main():
+    from main import load_sequence_data
+
+    try:
+        output_folder = os.path.join(os.getcwd(), 'output1')
+        frame_sequence = load_sequence_data(output_folder, verbose=False)
+        result = ActionSegmenter().segment_sequence(frame_sequence, fps=30)
+
+        for segment in result['segments']:
+            print(f"[{segment['start']}, {segment['end']}) {segment['label']} {segment['duration']:.2f} 秒")
+
+        summary = summarize_segments(result['segments'], fps=30)
+        print(f"弓步定势 {summary['gongbu_hold']['count']} 次，踢腿 {summary['kicks']} 次")
+
+        with open('segments.json', 'w', encoding='utf-8') as f:
+            json.dump(result['segments'], f, ensure_ascii=False, indent=2)
+
+    except Exception as e:
+        print(f"程序执行出错: {str(e)}")
+
+if __name__ == "__main__":
+    main()
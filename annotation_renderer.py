@@ -0,0 +1,225 @@
+import cv2
+import os
+import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from landmark_io import PART_INDEX, POSE_CONNECTIONS, load_landmark_sequence
+"""
+离线标注渲染
+根据已保存的关键点序列（output*/frame_N.txt）和分析结果重新绘制视频或关键帧图片，
+不再运行姿态检测，渲染开销只有 解码 + 绘制 + 编码
+
+坐标说明：process_video 保存坐标时除以了预处理缩放系数 0.8，
+绘制到原始帧上时需乘回 coord_scale
+"""
+class AnnotationRenderer:
+    def __init__(self, coord_scale=0.8, workers=None, jpeg_quality=95, output_scale=1.0):
+        self.coord_scale = coord_scale        # 保存坐标时使用的缩放系数
+        self.workers = workers or os.cpu_count() or 1
+        self.jpeg_quality = jpeg_quality
+        self.output_scale = output_scale      # 输出分辨率缩放（<1 可降低编码开销）
+
+        # 绘制样式
+        self.point_color = (0, 0, 255)
+        self.line_color = (255, 255, 255)
+        self.text_color = (0, 255, 0)
+        self.warn_color = (0, 0, 255)
+        self.min_visibility = 0.5
+
+    def load_annotations(self, landmark_folder, analysis_result=None, score_result=None):
+        """
+        加载关键点序列并整理为按视频帧号索引的标注
+        analysis_result / score_result 中的帧索引是序列下标，这里换算为视频帧号
+        返回 {视频帧号: {'landmarks': 帧数据, 'score': 得分或None, 'deductions': [扣分类型]}}
+        """
+        sequence = load_landmark_sequence(landmark_folder)
+        frame_numbers = [frame_num for frame_num, _ in sequence]
+        annotations = {
+            frame_num: {'landmarks': frame_data, 'score': None, 'deductions': []}
+            for frame_num, frame_data in sequence
+        }
+
+        def to_frame_number(index):
+            if 0 <= index < len(frame_numbers):
+                return frame_numbers[index]
+            return None
+
+        if analysis_result:
+            for score_info in analysis_result['scores']:
+                frame_num = to_frame_number(score_info['frame_index'])
+                if frame_num is not None:
+                    annotations[frame_num]['score'] = score_info['score']
+
+        if score_result:
+            for category in ('specs', 'errors', 'performance'):
+                for deduction in score_result['deductions'].get(category, []):
+                    frame_num = to_frame_number(deduction['frame'])
+                    if frame_num is not None:
+                        # cv2.putText 不支持中文，叠加显示英文类型
+                        annotations[frame_num]['deductions'].append(deduction['type'])
+
+        return annotations
+
+    def draw_skeleton(self, frame, landmarks):
+        """在帧上绘制骨架，landmarks 为与 parse_frame_file 相同格式的帧数据"""
+        height, width = frame.shape[:2]
+        scale = self.coord_scale
+
+        points = {}
+        for body_part, coord in landmarks.items():
+            index = PART_INDEX.get(body_part)
+            if index is None or coord.get('v', 1.0) < self.min_visibility:
+                continue
+            points[index] = (int(coord['x'] * scale * width), int(coord['y'] * scale * height))
+
+        for start, end in POSE_CONNECTIONS:
+            if start in points and end in points:
+                cv2.line(frame, points[start], points[end], self.line_color, 2)
+        for point in points.values():
+            cv2.circle(frame, point, 4, self.point_color, -1)
+        return frame
+
+    def draw(self, frame, frame_num, annotation):
+        """在帧上绘制骨架、帧号以及关键帧得分和扣分项"""
+        if annotation is not None:
+            self.draw_skeleton(frame, annotation['landmarks'])
+
+        cv2.putText(frame, f'Frame: {frame_num}', (10, 30),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1, self.text_color, 2)
+
+        if annotation is not None and annotation['score'] is not None:
+            cv2.putText(frame, f'Key frame score: {annotation["score"]:.2f}', (10, 65),
+                        cv2.FONT_HERSHEY_SIMPLEX, 1, self.text_color, 2)
+            for i, deduction in enumerate(annotation['deductions']):
+                cv2.putText(frame, f'- {deduction}', (10, 100 + i * 35),
+                            cv2.FONT_HERSHEY_SIMPLEX, 1, self.warn_color, 2)
+
+        if self.output_scale != 1.0:
+            frame = cv2.resize(frame, (0, 0), fx=self.output_scale, fy=self.output_scale)
+        return frame
+
+    def _open_video(self, video_path):
+        if not os.path.exists(video_path):
+            print(f"Error: 视频文件不存在: {video_path}")
+            return None
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            print(f"Error: 无法打开视频文件: {video_path}")
+            return None
+        return cap
+
+    def render_video(self, video_path, landmark_folder, output_path,
+                     analysis_result=None, score_result=None):
+        """
+        重新渲染带标注的视频
+        解码在主线程顺序进行，绘制在线程池中并行，按帧序写入 VideoWriter
+        """
+        cap = self._open_video(video_path)
+        if cap is None:
+            return
+
+        annotations = self.load_annotations(landmark_folder, analysis_result, score_result)
+
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        frame_width = int(int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)) * self.output_scale)
+        frame_height = int(int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) * self.output_scale)
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        out = cv2.VideoWriter(output_path, fourcc, fps, (frame_width, frame_height))
+
+        # 限制同时在途的帧数，避免解码远快于绘制时占用过多内存
+        max_pending = self.workers * 2
+        pending = deque()
+        frame_count = 0
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while True:
+                success, frame = cap.read()
+                if not success:
+                    break
+
+                pending.append(executor.submit(self.draw, frame, frame_count,
+                                               annotations.get(frame_count)))
+                frame_count += 1
+
+                while len(pending) >= max_pending:
+                    out.write(pending.popleft().result())
+
+            while pending:
+                out.write(pending.popleft().result())
+
+        cap.release()
+        out.release()
+        print(f"已渲染 {frame_count} 帧: {output_path}")
+
+    def _draw_and_save(self, frame, frame_num, annotation, output_path):
+        frame = self.draw(frame, frame_num, annotation)
+        cv2.imwrite(output_path, frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        return output_path
+
+    def render_frames(self, video_path, landmark_folder, output_dir,
+                      analysis_result=None, score_result=None, frame_numbers=None):
+        """
+        导出带标注的 JPEG 图片（frame_N_marked.jpg）
+        frame_numbers 为空时导出分析结果中的全部关键帧
+        绘制与 JPEG 编码在线程池中并行
+        """
+        cap = self._open_video(video_path)
+        if cap is None:
+            return []
+
+        annotations = self.load_annotations(landmark_folder, analysis_result, score_result)
+        if frame_numbers is None:
+            frame_numbers = [frame_num for frame_num, annotation in annotations.items()
+                             if annotation['score'] is not None]
+        targets = set(frame_numbers)
+        last_target = max(targets) if targets else -1
+
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+
+        futures = []
+        frame_count = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while frame_count <= last_target:
+                # 非目标帧只抓取不解码
+                if frame_count not in targets:
+                    if not cap.grab():
+                        break
+                    frame_count += 1
+                    continue
+
+                success, frame = cap.read()
+                if not success:
+                    break
+
+                output_path = os.path.join(output_dir, f'frame_{frame_count}_marked.jpg')
+                futures.append((frame_count, executor.submit(
+                    self._draw_and_save, frame, frame_count,
+                    annotations.get(frame_count), output_path)))
+                frame_count += 1
+
+            saved = [future.result() for _, future in futures]
+
+        cap.release()
+        print(f"已导出 {len(saved)} 张标注图片到: {output_dir}")
+        missing = sorted(targets - {frame_num for frame_num, _ in futures})
+        if missing:
+            print(f"未能导出的帧: {missing}")
+        return saved
+
+
+def main():
+    renderer = AnnotationRenderer()
+
+    video_path = '1.mp4'
+    landmark_folder = 'output1'
+
+    # 读取之前保存的分析结果
+    with open('analysis_result_tantui.json', 'r', encoding='utf-8') as f:
+        analysis_result = json.load(f)
+
+    renderer.render_frames(video_path, landmark_folder, 'selected_frames', analysis_result)
+    #renderer.render_video(video_path, landmark_folder, 'annotated_video.mp4', analysis_result)
+
+if __name__ == "__main__":
+    main()
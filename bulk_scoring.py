@@ -0,0 +1,173 @@
+import os
+import csv
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+"""
+比赛日批量评分
+清单文件列出 运动员 → 帧数据文件夹或关键点归档（landmark_archive 生成的 .lmk 文件），在进程池中并行执行 analyze_sequence + score_sequence，
+汇总输出为一个排行榜 CSV 和一个逐关键帧明细 CSV，并报告吞吐量（序列/秒）
+
+清单格式（二选一）：
+    CSV:  athlete,path          （带表头）
+    JSON: {"运动员A": "data/athlete_a/output1", "运动员B": "data/athlete_b.lmk", ...}
+"""
+
+LEADERBOARD_FIELDS = ['rank', 'athlete', 'score', 'specs_deduction', 'error_deduction',
+                      'key_frame_count', 'mean_key_frame_score', 'path', 'error']
+KEY_FRAME_FIELDS = ['athlete', 'frame_index', 'key_frame_score', 'support_leg',
+                    'deduction_types', 'deduction_messages']
+
+
+def load_manifest(manifest_path):
+    """读取清单，返回 [(运动员, 路径)]，相对路径以清单所在目录为基准"""
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+
+    if manifest_path.endswith('.json'):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            entries = list(json.load(f).items())
+    else:
+        with open(manifest_path, 'r', encoding='utf-8', newline='') as f:
+            entries = [(row['athlete'], row['path']) for row in csv.DictReader(f)]
+
+    return [(athlete, path if os.path.isabs(path) else os.path.join(base_dir, path))
+            for athlete, path in entries]
+
+
+def score_athlete(entry):
+    """进程池工作函数：加载一个运动员的序列并分析评分"""
+    from main import iter_sequence_data
+    from pose_analysis_tantui import PoseAnalyzer_tantui
+    from score_tantuidengtui import TanTuiDengTuiScorer
+
+    athlete, path = entry
+    try:
+        # 文件夹与 .lmk 归档都由 iter_sequence_data 读取
+        frame_sequence = list(iter_sequence_data(path))
+        if not frame_sequence:
+            raise ValueError(f"没有帧数据: {path}")
+        analysis_result = PoseAnalyzer_tantui().analyze_sequence(frame_sequence)
+        score_result = TanTuiDengTuiScorer().score_sequence(analysis_result, frame_sequence)
+    except Exception as e:
+        return {'athlete': athlete, 'path': path, 'error': str(e)}
+
+    return {
+        'athlete': athlete,
+        'path': path,
+        'error': '',
+        'analysis': analysis_result,
+        'score': score_result
+    }
+
+
+def _leaderboard_rows(results):
+    """按总分从高到低排名，失败的条目排在最后"""
+    scored = sorted((r for r in results if not r['error']),
+                    key=lambda r: r['score']['score'], reverse=True)
+    failed = [r for r in results if r['error']]
+
+    rows = []
+    for rank, result in enumerate(scored, 1):
+        key_frame_scores = [s['score'] for s in result['analysis']['scores']]
+        rows.append({
+            'rank': rank,
+            'athlete': result['athlete'],
+            'score': round(result['score']['score'], 2),
+            'specs_deduction': result['score']['details']['specs_deduction'],
+            'error_deduction': round(result['score']['details']['error_deduction'], 2),
+            'key_frame_count': len(key_frame_scores),
+            'mean_key_frame_score': round(sum(key_frame_scores) / len(key_frame_scores), 2)
+                                    if key_frame_scores else '',
+            'path': result['path'],
+            'error': ''
+        })
+    for result in failed:
+        rows.append({field: '' for field in LEADERBOARD_FIELDS})
+        rows[-1].update({'athlete': result['athlete'], 'path': result['path'],
+                         'error': result['error']})
+    return rows
+
+
+def _key_frame_rows(results):
+    rows = []
+    for result in results:
+        if result['error']:
+            continue
+
+        # 按帧汇总扣分项
+        frame_deductions = {}
+        for category in ('specs', 'errors', 'performance'):
+            for deduction in result['score']['deductions'][category]:
+                frame_deductions.setdefault(deduction['frame'], []).append(deduction)
+
+        for score_info in result['analysis']['scores']:
+            deductions = frame_deductions.get(score_info['frame_index'], [])
+            rows.append({
+                'athlete': result['athlete'],
+                'frame_index': score_info['frame_index'],
+                'key_frame_score': round(score_info['score'], 2),
+                'support_leg': score_info.get('support_leg', ''),
+                'deduction_types': ';'.join(d['type'] for d in deductions),
+                'deduction_messages': ';'.join(d['message'] for d in deductions)
+            })
+    return rows
+
+
+def _write_csv(path, fields, rows):
+    # utf-8-sig 便于 Excel 直接打开中文
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def bulk_score(manifest_path, output_dir='.', workers=None):
+    """
+    批量评分主函数
+    输出 leaderboard.csv（每个运动员一行）和 key_frames.csv（每个关键帧一行）
+    返回 {'sequences', 'failed', 'seconds', 'sequences_per_sec'}
+    """
+    entries = load_manifest(manifest_path)
+    if not entries:
+        raise ValueError(f"清单为空: {manifest_path}")
+
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # 条目较多时批量分发，减少进程间通信次数
+        chunksize = max(1, len(entries) // (workers * 4))
+        results = list(executor.map(score_athlete, entries, chunksize=chunksize))
+    seconds = time.perf_counter() - start
+
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    _write_csv(os.path.join(output_dir, 'leaderboard.csv'), LEADERBOARD_FIELDS, _leaderboard_rows(results))
+    _write_csv(os.path.join(output_dir, 'key_frames.csv'), KEY_FRAME_FIELDS, _key_frame_rows(results))
+
+    failed = [r for r in results if r['error']]
+    for result in failed:
+        print(f"评分失败 - {result['athlete']}: {result['error']}")
+
+    stats = {
+        'sequences': len(results),
+        'failed': len(failed),
+        'seconds': seconds,
+        'sequences_per_sec': len(results) / seconds if seconds > 0 else 0.0
+    }
+    print(f"完成 {stats['sequences']} 个序列（失败 {stats['failed']}），"
+          f"耗时 {seconds:.2f} 秒，吞吐量 {stats['sequences_per_sec']:.1f} 序列/秒")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='批量评分并生成排行榜')
+    parser.add_argument('manifest', help='清单文件（CSV 或 JSON）')
+    parser.add_argument('--output-dir', default='.', help='结果输出目录')
+    parser.add_argument('--workers', type=int, default=None, help='进程数，默认CPU核数')
+    args = parser.parse_args()
+
+    bulk_score(args.manifest, args.output_dir, args.workers)
+
+if __name__ == "__main__":
+    main()
@@ -1,59 +1,161 @@
 import cv2
-import mediapipe as mp
 import numpy as np
 import os
+import time
 from config import POSE_CONFIG
+from annotation_renderer import AnnotationRenderer
+from landmark_io import coordinates_to_frame
+from pose_backends import to_landmark_list
 from pose_detection import PoseDetector
 
 class CameraDetector:
-    def __init__(self):
-        self.detector = PoseDetector()
+    def __init__(self, capture=None):
         self.config = POSE_CONFIG
+        self.detector = self.create_detector(self.config['static_image_mode'])
+        self.roi_detector = None  # 裁剪到人物ROI时使用的静态图片模式检测器（首次裁剪时创建）
+        # 实时画面没有预处理缩放，关键点直接相对整帧归一化
+        self.renderer = AnnotationRenderer(coord_scale=1.0)
+        self.capture = capture  # 可传入 ReplayCapture 等替代摄像头的采集源
+
+        # 每 tracking_interval 帧检测一次，中间帧用光流跟踪关键点（1 表示每帧检测）
+        self.tracker = None
+        if self.config.get('tracking_interval', 1) > 1:
+            from landmark_tracking import FlowLandmarkTracker
+            self.tracker = FlowLandmarkTracker(detect_interval=self.config['tracking_interval'])
+
+        # 按帧预算自动调整输入分辨率、人物ROI和模型复杂度
+        self.governor = None
+        if self.config.get('quality_governor'):
+            from quality_governor import QualityGovernor
+            budget_ms = self.config.get('frame_budget_ms') or 1000.0 / self.config['camera_fps']
+            self.governor = QualityGovernor(budget_ms, levels=self.config.get('quality_levels'))
+        self.last_landmarks = None  # 上一帧的关键点（检测或跟踪所得），用于计算ROI
         
         # 创建输出文件夹
         if self.config['save_coordinates'] and not os.path.exists(self.config['output_folder']):
             os.makedirs(self.config['output_folder'])
     
-    def start_detection(self):
+    def create_detector(self, static_image_mode):
+        return PoseDetector(
+            static_image_mode=static_image_mode,
+            model_complexity=self.config['model_complexity'],
+            min_detection_confidence=self.config['min_detection_confidence'],
+            min_tracking_confidence=self.config['min_tracking_confidence'],
+            backend=self.config.get('backend', 'mediapipe'),
+            model_path=self.config.get('model_path')
+        )
+
+    def open_capture(self):
+        """打开采集源：传入的采集源 > 配置中的回放源 > 摄像头"""
+        if self.capture is not None:
+            return self.capture
+
+        if self.config.get('replay_source'):
+            from replay_capture import ReplayCapture
+            return ReplayCapture(
+                self.config['replay_source'],
+                jitter_ms=self.config.get('replay_jitter_ms', 0.0),
+                drop_rate=self.config.get('replay_drop_rate', 0.0),
+                seed=self.config.get('replay_seed', 0)
+            )
+
         # 初始化摄像头
         cap = cv2.VideoCapture(self.config['camera_id'])
         cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.config['camera_width'])
         cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.config['camera_height'])
         cap.set(cv2.CAP_PROP_FPS, self.config['camera_fps'])
+        return cap
+
+    def detect_landmarks(self, frame):
+        """
+        完整检测一帧，返回 pose_landmarks（LandmarkList）或 None（坐标相对整帧归一化）
+        启用质量调节时按当前级别缩小输入、裁剪到上一帧的人物ROI
+        每帧的裁剪框都不同，视频模式的跨帧跟踪在裁剪图上不成立，裁剪时改用静态图片模式检测器
+        """
+        if self.governor is None:
+            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            return to_landmark_list(self.detector.detect(frame_rgb))
+
+        from quality_governor import roi_from_landmarks
+
+        settings = self.governor.settings
+        height, width = frame.shape[:2]
+        x0, y0, x1, y1 = 0, 0, width, height
+        if settings.get('roi_padding') is not None and self.last_landmarks is not None:
+            x0, y0, x1, y1 = roi_from_landmarks(self.last_landmarks, width, height, settings['roi_padding'])
+        cropped = (x0, y0, x1, y1) != (0, 0, width, height)
+
+        detector = self.detector
+        if cropped:
+            if self.roi_detector is None:
+                self.roi_detector = self.create_detector(static_image_mode=True)
+            self.roi_detector.set_model_complexity(self.detector.model_complexity)
+            detector = self.roi_detector
+
+        image = frame[y0:y1, x0:x1]
+        if settings.get('input_scale', 1.0) != 1.0:
+            image = cv2.resize(image, (0, 0), fx=settings['input_scale'], fy=settings['input_scale'],
+                               interpolation=cv2.INTER_AREA)
+        pose_landmarks = to_landmark_list(detector.detect(cv2.cvtColor(image, cv2.COLOR_BGR2RGB)))
+
+        if pose_landmarks is not None and cropped:
+            # ROI 内的归一化坐标换算回整帧
+            for landmark in pose_landmarks.landmark:
+                landmark.x = (landmark.x * (x1 - x0) + x0) / width
+                landmark.y = (landmark.y * (y1 - y0) + y0) / height
+        return pose_landmarks
+
+    def start_detection(self, max_frames=None):
+        """
+        实时检测主循环，结束后返回延迟与丢帧统计
+        延迟 = 帧的采集时刻（回放源给出的节拍时刻，摄像头为 read 返回时刻）到该帧处理完成
+        """
+        cap = self.open_capture()
+        self.last_landmarks = None
+        if self.tracker is not None:
+            self.tracker.reset()
+        recorder = self.create_clip_recorder(cap) if self.config.get('key_frame_clips') else None
+        show_window = self.config.get('show_window', True)
         
         frame_count = 0
+        latencies = []
+        start_time = time.perf_counter()
         
         while cap.isOpened():
             success, frame = cap.read()
             if not success:
                 print("无法获取摄像头画面")
                 break
+            capture_time = getattr(cap, 'last_timestamp', None) or time.perf_counter()
                 
-            # 处理图像
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = self.detector.pose.process(frame_rgb)
+            # 处理图像（启用跟踪时只在部分帧上检测）
+            if self.tracker is not None:
+                pose_landmarks = self.tracker.update(frame, self.detect_landmarks)
+            else:
+                pose_landmarks = self.detect_landmarks(frame)
+            # 跟踪帧的结果同样用于下一次检测的ROI；未检测到人时清空，下一帧回到整帧检测
+            self.last_landmarks = pose_landmarks
+
+            # 原始画面在绘制标注之前放入关键帧片段的环形缓冲
+            if recorder is not None:
+                recorder.add(frame, pose_landmarks)
             
             # 绘制姿态标记
-            if results.pose_landmarks:
+            if pose_landmarks:
+                coordinates = []
+                for landmark in pose_landmarks.landmark:
+                    coordinates.append({
+                        'x': landmark.x,
+                        'y': landmark.y,
+                        'z': landmark.z,
+                        'visibility': landmark.visibility
+                    })
+
                 if self.config['draw_landmarks']:
-                    self.detector.mp_draw.draw_landmarks(
-                        frame,
-                        results.pose_landmarks,
-                        self.detector.mp_pose.POSE_CONNECTIONS,
-                        landmark_drawing_spec=self.detector.mp_drawing_styles.get_default_pose_landmarks_style()
-                    )
+                    self.renderer.draw_skeleton(frame, coordinates_to_frame(coordinates))
                 
                 # 保存坐标数据
                 if self.config['save_coordinates']:
-                    coordinates = []
-                    for landmark in results.pose_landmarks.landmark:
-                        coordinates.append({
-                            'x': landmark.x,
-                            'y': landmark.y,
-                            'z': landmark.z,
-                            'visibility': landmark.visibility
-                        })
-                    
                     # 保存到文件
                     filename = os.path.join(self.config['output_folder'], f'frame_{frame_count}.txt')
                     with open(filename, 'w') as f:
@@ -66,15 +168,89 @@ class CameraDetector:
                         cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
             
             # 显示结果
-            cv2.imshow('Camera Pose Detection', frame)
+            if show_window:
+                cv2.imshow('Camera Pose Detection', frame)
+            latencies.append(time.perf_counter() - capture_time)
+            if self.governor is not None:
+                settings = self.governor.record(latencies[-1] * 1000.0)
+                if settings is not None:
+                    self.detector.set_model_complexity(settings['model_complexity'])
             frame_count += 1
+            if max_frames is not None and frame_count >= max_frames:
+                break
             
             # 按'q'键退出
-            if cv2.waitKey(1) & 0xFF == ord('q'):
+            if show_window and cv2.waitKey(1) & 0xFF == ord('q'):
                 break
         
         cap.release()
-        cv2.destroyAllWindows()
+        if show_window:
+            cv2.destroyAllWindows()
+
+        stats = self.live_stats(cap, latencies, time.perf_counter() - start_time)
+        if recorder is not None:
+            stats.update(recorder.close())
+        self.print_stats(stats)
+        return stats
+
+    def create_clip_recorder(self, cap):
+        """按配置创建关键帧片段记录器（在线检测 clip_move 动作的关键帧）"""
+        from key_frame_clips import KeyFrameClipRecorder
+
+        if self.config.get('clip_move', 'tantui') == 'gongbu':
+            from pose_analysis_gongbu import PoseAnalyzer_gongbu
+            analyzer, scorer = PoseAnalyzer_gongbu(), None
+        else:
+            from pose_analysis_tantui import PoseAnalyzer_tantui
+            from score_tantuidengtui import TanTuiDengTuiScorer
+            analyzer, scorer = PoseAnalyzer_tantui(), TanTuiDengTuiScorer()
+
+        return KeyFrameClipRecorder(
+            self.config.get('clip_output_folder', 'key_frame_clips'),
+            analyzer, scorer,
+            fps=cap.get(cv2.CAP_PROP_FPS) or self.config['camera_fps'],
+            pre_roll_seconds=self.config.get('pre_roll_seconds', 2.0),
+            post_roll_seconds=self.config.get('post_roll_seconds', 1.0)
+        )
+
+    def live_stats(self, cap, latencies, seconds):
+        """汇总延迟和丢帧统计，采集源提供 stats() 时合并其中的丢帧计数"""
+        latencies_ms = np.array(latencies) * 1000.0
+        frame_budget_ms = 1000.0 / (cap.get(cv2.CAP_PROP_FPS) or self.config['camera_fps'])
+        stats = {
+            'frames': len(latencies),
+            'seconds': seconds,
+            'fps': len(latencies) / seconds if seconds > 0 else 0.0,
+            'frame_budget_ms': frame_budget_ms,
+            'latency_mean_ms': float(latencies_ms.mean()) if len(latencies_ms) else 0.0,
+            'latency_p50_ms': float(np.percentile(latencies_ms, 50)) if len(latencies_ms) else 0.0,
+            'latency_p95_ms': float(np.percentile(latencies_ms, 95)) if len(latencies_ms) else 0.0,
+            'latency_max_ms': float(latencies_ms.max()) if len(latencies_ms) else 0.0,
+            'over_budget': int((latencies_ms > frame_budget_ms).sum()),
+            'dropped': 0,
+            'late_skipped': 0
+        }
+        if hasattr(cap, 'stats'):
+            stats.update(cap.stats())
+        if self.tracker is not None:
+            stats.update(self.tracker.stats())
+        if self.governor is not None:
+            stats.update(self.governor.stats())
+        return stats
+
+    def print_stats(self, stats):
+        print("\n=== 实时检测统计 ===")
+        print(f"处理帧数: {stats['frames']}，{stats['fps']:.1f} 帧/秒（帧预算 {stats['frame_budget_ms']:.1f} ms）")
+        print(f"延迟: 平均 {stats['latency_mean_ms']:.1f} ms，P50 {stats['latency_p50_ms']:.1f} ms，"
+              f"P95 {stats['latency_p95_ms']:.1f} ms，最大 {stats['latency_max_ms']:.1f} ms")
+        print(f"超出帧预算: {stats['over_budget']} 帧，采集丢帧: {stats['dropped']}，"
+              f"处理不及时跳过: {stats['late_skipped']}")
+        if 'inferred_frames' in stats:
+            print(f"光流跟踪: 检测 {stats['inferred_frames']} 帧（{stats['inference_ratio'] * 100:.0f}%），"
+                  f"跟踪 {stats['tracked_frames']} 帧，因质量下降提前检测 {stats['redetections']} 次")
+        if 'clips_saved' in stats:
+            print(f"关键帧片段: 检测到 {stats['key_frames']} 个关键帧，保存 {stats['clips_saved']} 段，"
+                  f"写入不及时放弃 {stats['clips_skipped']} 段（环形缓冲 {stats['ring_frames']} 帧）")
 
 def main():
     detector = CameraDetector()
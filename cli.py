@@ -0,0 +1,356 @@
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+"""
+统一命令行入口
+    python cli.py detect  VIDEO [--resume]      姿态检测，保存到 output*/ 文件夹，--resume 从中断处继续
+                  [--backend onnx]              检测类子命令都可用 --backend 选择 mediapipe / onnx 后端
+    python cli.py detect-images FOLDER          图片文件夹多进程检测（静态图片模式）
+    python cli.py cache   VIDEO                 预解码帧缓存，之后 detect --cache 跳过解码和预处理
+    python cli.py daemon                        常驻检测服务，之后 detect --daemon 不再重复加载模型
+    python cli.py export  VIDEO --frames N ...  导出指定帧的图片和姿态数据
+    python cli.py analyze FOLDER [--move tantui|gongbu|all]
+    python cli.py score   FOLDER                弹腿/蹬腿分析 + 评分
+    python cli.py segment FOLDER [--fps 30]     动作分段（弓步定势 / 踢腿各阶段 / 过渡 / 静止）
+    python cli.py bulk    MANIFEST              按清单批量评分，输出排行榜
+    python cli.py live [--replay VIDEO]         摄像头实时检测，--replay 用录像代替摄像头测延迟
+                       [--clips]                只保存关键帧前后的片段
+
+cv2 / mediapipe 等重型模块只在需要它们的子命令中导入，
+analyze / score 只加载 numpy 和分析模块；加 --import-times 可查看各模块导入耗时
+"""
+
+_START_TIME = time.perf_counter()
+_import_times = []
+
+
+def timed_import(module_name):
+    """导入模块并记录耗时（已导入的模块耗时接近0）"""
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    _import_times.append((module_name, time.perf_counter() - start))
+    return module
+
+
+def print_import_times():
+    print("\n=== 导入耗时 ===")
+    for module_name, seconds in _import_times:
+        print(f"{module_name}: {seconds * 1000:.1f} ms")
+    print(f"合计: {sum(seconds for _, seconds in _import_times) * 1000:.1f} ms")
+
+
+def cmd_detect(args):
+    if args.daemon:
+        # 交给常驻检测服务，省去导入 mediapipe 和创建、预热模型的时间
+        detector_daemon = timed_import('detector_daemon')
+        with detector_daemon.DetectorClient(args.socket) as client:
+            result = client.detect_video(args.video, output_dir=args.output, resume=args.resume)
+        print(f"坐标数据已保存到文件夹: {result['output_dir']}（用时 {result['job_seconds']:.1f} 秒，"
+              f"省去冷启动 {result['saved_seconds']:.1f} 秒）")
+        return
+
+    pose_detection = timed_import('pose_detection')
+    detector = pose_detection.PoseDetector(model_complexity=args.model_complexity,
+                                           min_detection_confidence=args.min_detection_confidence,
+                                           min_tracking_confidence=args.min_tracking_confidence,
+                                           backend=args.backend, model_path=args.model_path)
+    if args.cache:
+        # 检测实验：读取预解码帧缓存（首次运行时生成），跳过解码和预处理
+        frame_cache = timed_import('frame_cache').open_frame_cache(args.video)
+        if frame_cache is not None:
+            output_dir = args.output or detector.get_next_output_folder(os.path.dirname(args.video))
+            detector.process_frame_cache(frame_cache, output_dir)
+        return
+
+    motion_gate = None
+    if args.motion_gate:
+        from motion_gate import MotionGate
+        motion_gate = MotionGate(threshold=args.motion_threshold, max_interval=args.max_interval)
+    detector.process_video(args.video, output_dir=args.output, resume=args.resume, motion_gate=motion_gate)
+
+
+def cmd_daemon(args):
+    detector_daemon = timed_import('detector_daemon')
+    if args.stop or args.stats:
+        with detector_daemon.DetectorClient(args.socket) as client:
+            stats = client.shutdown() if args.stop else client.stats()
+        print(f"任务数: {stats['jobs']}，帧数: {stats['frames']}，任务用时 {stats['job_seconds']:.1f} 秒")
+        cold_start = stats['cold_start_seconds']
+        print(f"冷启动 视频/帧序列 {cold_start['video']:.2f} 秒/次，图片 {cold_start['image']:.2f} 秒/次，"
+              f"累计节省约 {stats['saved_seconds']:.1f} 秒")
+        return
+    detector_daemon.serve(args.socket, model_complexity=args.model_complexity,
+                          backend=args.backend, model_path=args.model_path)
+
+
+def cmd_cache(args):
+    frame_cache = timed_import('frame_cache')
+    if args.rebuild:
+        frame_cache.build_frame_cache(args.video, args.cache_dir)
+    else:
+        frame_cache.open_frame_cache(args.video, args.cache_dir)
+
+
+def cmd_detect_images(args):
+    pose_detection = timed_import('pose_detection')
+    detector = pose_detection.PoseDetector(static_image_mode=True, backend=args.backend, model_path=args.model_path)
+    detector.process_image_folder(args.folder, output_dir=args.output, workers=args.workers)
+
+
+def cmd_export(args):
+    pose_detection = timed_import('pose_detection')
+    detector = pose_detection.PoseDetector(backend=args.backend, model_path=args.model_path)
+    detector.export_frames(args.video, args.frames)
+
+
+def _analyze(args):
+    """加载序列并执行分析，返回 (帧序列, {动作名: 分析结果}, 分段结果或None)"""
+    main_module = timed_import('main')
+    frame_sequence = main_module.load_sequence_data(args.folder, verbose=args.verbose)
+
+    segments = None
+    if args.segments:
+        action_segmentation = timed_import('action_segmentation')
+        segments = action_segmentation.ActionSegmenter().segment_sequence(frame_sequence)['segments']
+
+    def intervals_for(label):
+        return action_segmentation.intervals(segments, label) if segments is not None else None
+
+    if args.move == 'all':
+        engine = timed_import('multi_move_analysis').MultiMoveAnalyzer()
+        results = {name: result['analysis']
+                   for name, result in engine.analyze_sequence(frame_sequence).items()}
+    elif args.move == 'gongbu':
+        analyzer = timed_import('pose_analysis_gongbu').PoseAnalyzer_gongbu()
+        results = {'gongbu': analyzer.analyze_sequence(frame_sequence, intervals_for('gongbu_hold'))}
+    else:
+        analyzer = timed_import('pose_analysis_tantui').PoseAnalyzer_tantui(args.key_frame_mode or 'consecutive')
+        results = {'tantui': analyzer.analyze_sequence(frame_sequence, intervals_for('tantui_extension'))}
+    return frame_sequence, results, segments
+
+
+def cmd_analyze(args):
+    frame_sequence, results, _ = _analyze(args)
+    for name, result in results.items():
+        print(f"\n=== {name} ===")
+        for score_info in result['scores']:
+            print(f"帧 {score_info['frame_index']}: 得分 {score_info['score']:.2f}")
+
+        if args.output:
+            output_path = args.output if len(results) == 1 else \
+                os.path.splitext(args.output)[0] + f'_{name}.json'
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+def cmd_score(args):
+    args.move = 'tantui'
+    frame_sequence, results, segments = _analyze(args)
+    scorer = timed_import('score_tantuidengtui').TanTuiDengTuiScorer()
+    kick_intervals = None
+    if segments is not None:
+        action_segmentation = timed_import('action_segmentation')
+        kick_intervals = action_segmentation.intervals(segments, action_segmentation.KICK_LABELS)
+    score_result = scorer.score_sequence(results['tantui'], frame_sequence, kick_intervals)
+
+    print(f"总分: {score_result['score']:.1f}")
+    print("\n规格扣分:")
+    for spec in score_result['deductions']['specs']:
+        print(f"- 第{spec['frame']}帧: {spec['message']}")
+    print("\n动作错误:")
+    for error in score_result['deductions']['errors']:
+        print(f"- 第{error['frame']}帧: {error['message']}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'analysis': results['tantui'], 'score': score_result},
+                      f, ensure_ascii=False, indent=2)
+
+
+def cmd_segment(args):
+    main_module = timed_import('main')
+    action_segmentation = timed_import('action_segmentation')
+    frame_sequence = main_module.load_sequence_data(args.folder, verbose=args.verbose)
+    result = action_segmentation.ActionSegmenter().segment_sequence(frame_sequence, fps=args.fps)
+
+    for segment in result['segments']:
+        print(f"[{segment['start']}, {segment['end']}) {segment['label']}  {segment['duration']:.2f} 秒")
+    summary = action_segmentation.summarize_segments(result['segments'], fps=args.fps)
+    holds = ', '.join(f"{seconds:.2f}" for seconds in summary['gongbu_hold']['hold_seconds'])
+    print(f"\n弓步定势 {summary['gongbu_hold']['count']} 次，保持时长(秒): {holds or '无'}")
+    print(f"踢腿 {summary['kicks']} 次")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'segments': result['segments'], 'summary': summary}, f, ensure_ascii=False, indent=2)
+
+
+def cmd_bulk(args):
+    bulk_scoring = timed_import('bulk_scoring')
+    bulk_scoring.bulk_score(args.manifest, args.output_dir, args.workers)
+
+
+def cmd_live(args):
+    camera_detection = timed_import('camera_detection')
+    if args.backend:
+        camera_detection.POSE_CONFIG.update(backend=args.backend, model_path=args.model_path)
+    detector = camera_detection.CameraDetector()
+    if args.replay:
+        detector.config = dict(detector.config, replay_source=args.replay, replay_jitter_ms=args.jitter_ms,
+                               replay_drop_rate=args.drop_rate, show_window=not args.no_window)
+    elif args.no_window:
+        detector.config = dict(detector.config, show_window=False)
+    if args.governor:
+        from quality_governor import QualityGovernor
+        budget_ms = args.budget_ms or 1000.0 / detector.config['camera_fps']
+        detector.governor = QualityGovernor(budget_ms)
+    if args.clips:
+        detector.config = dict(detector.config, key_frame_clips=True, clip_move=args.clip_move,
+                               pre_roll_seconds=args.pre_roll, post_roll_seconds=args.post_roll)
+    if args.tracking_interval:
+        from landmark_tracking import FlowLandmarkTracker
+        detector.tracker = FlowLandmarkTracker(detect_interval=args.tracking_interval)
+    detector.start_detection(max_frames=args.max_frames)
+
+
+def add_backend_arguments(parser, default='mediapipe'):
+    parser.add_argument('--backend', choices=['mediapipe', 'onnx'], default=default,
+                        help='姿态检测后端（onnx 需要 onnxruntime 和导出的 BlazePose 关键点模型）')
+    parser.add_argument('--model-path', default=None,
+                        help='onnx 后端的模型文件，默认 pose_landmark_full.onnx')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='武术姿态识别与评分系统')
+    parser.add_argument('--import-times', action='store_true', help='打印模块导入耗时')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    detect = subparsers.add_parser('detect', help='视频姿态检测')
+    detect.add_argument('video')
+    detect.add_argument('--output', help='输出文件夹，默认新建下一个 output* 文件夹')
+    detect.add_argument('--resume', action='store_true', help='从检查点继续未完成的检测')
+    detect.add_argument('--motion-gate', action='store_true', help='跳过静止帧的检测，沿用上一次的关键点')
+    detect.add_argument('--motion-threshold', type=float, default=3.0, help='缩略图平均灰度差阈值')
+    detect.add_argument('--max-interval', type=int, default=15, help='最多连续沿用的帧数')
+    detect.add_argument('--cache', action='store_true',
+                        help='使用预解码帧缓存（不存在时先生成），只保存关键点，不输出处理后的视频'
+                             '（不支持 --resume、--motion-gate）')
+    detect.add_argument('--model-complexity', type=int, default=1, choices=[0, 1, 2])
+    detect.add_argument('--min-detection-confidence', type=float, default=0.6)
+    detect.add_argument('--min-tracking-confidence', type=float, default=0.6)
+    detect.add_argument('--daemon', action='store_true',
+                        help='交给常驻检测服务处理（不支持 --motion-gate、--cache）')
+    detect.add_argument('--socket', default=None, help='检测服务套接字路径')
+    add_backend_arguments(detect)
+    detect.set_defaults(func=cmd_detect)
+
+    cache = subparsers.add_parser('cache', help='生成预解码帧缓存（预处理后的推理输入）')
+    cache.add_argument('video')
+    cache.add_argument('--cache-dir', default=None, help='缓存文件夹，默认为 <视频名>_framecache')
+    cache.add_argument('--rebuild', action='store_true', help='忽略已有缓存重新生成')
+    cache.set_defaults(func=cmd_cache)
+
+    daemon = subparsers.add_parser('daemon', help='启动常驻检测服务（保持预热的模型）')
+    daemon.add_argument('--socket', default=None, help='套接字路径，默认在系统临时目录下')
+    daemon.add_argument('--model-complexity', type=int, default=1, choices=[0, 1, 2])
+    daemon.add_argument('--stats', action='store_true', help='查看运行中服务的统计')
+    daemon.add_argument('--stop', action='store_true', help='关闭运行中的服务')
+    add_backend_arguments(daemon)
+    daemon.set_defaults(func=cmd_daemon)
+
+    detect_images = subparsers.add_parser('detect-images', help='图片文件夹姿态检测（多进程）')
+    detect_images.add_argument('folder', help='图片文件夹（如 帧及对应图/帧及对应图）')
+    detect_images.add_argument('--output', help='输出文件夹，默认新建下一个 output* 文件夹')
+    detect_images.add_argument('--workers', type=int, default=None)
+    add_backend_arguments(detect_images)
+    detect_images.set_defaults(func=cmd_detect_images)
+
+    export = subparsers.add_parser('export', help='导出指定帧')
+    export.add_argument('video')
+    export.add_argument('--frames', type=int, nargs='+', required=True)
+    add_backend_arguments(export)
+    export.set_defaults(func=cmd_export)
+
+    for name, func, help_text in (('analyze', cmd_analyze, '关键帧分析'),
+                                  ('score', cmd_score, '分析并评分')):
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument('folder', help='帧数据文件夹（如 output1）')
+        sub.add_argument('--output', help='结果保存路径（JSON）')
+        sub.add_argument('--verbose', action='store_true', help='打印逐文件加载信息')
+        sub.add_argument('--key-frame-mode', choices=['consecutive', 'peak'], default=None,
+                         help='弹腿关键帧检测方式，默认 consecutive（--move all 时不适用）')
+        sub.add_argument('--segments', action='store_true',
+                         help='先做动作分段，只在相关区间内检测关键帧（--move all 时不适用）')
+        if name == 'analyze':
+            sub.add_argument('--move', choices=['tantui', 'gongbu', 'all'], default='tantui')
+        sub.set_defaults(func=func)
+
+    segment = subparsers.add_parser('segment', help='动作分段与定势保持时长')
+    segment.add_argument('folder', help='帧数据文件夹（如 output1）')
+    segment.add_argument('--fps', type=float, default=30.0, help='帧率，用于换算时长')
+    segment.add_argument('--output', help='结果保存路径（JSON）')
+    segment.add_argument('--verbose', action='store_true', help='打印逐文件加载信息')
+    segment.set_defaults(func=cmd_segment)
+
+    bulk = subparsers.add_parser('bulk', help='按清单批量评分并生成排行榜')
+    bulk.add_argument('manifest', help='清单文件（CSV 或 JSON）')
+    bulk.add_argument('--output-dir', default='.')
+    bulk.add_argument('--workers', type=int, default=None)
+    bulk.set_defaults(func=cmd_bulk)
+
+    live = subparsers.add_parser('live', help='摄像头实时检测')
+    live.add_argument('--replay', help='用视频或图片文件夹代替摄像头（按原帧率实时回放）')
+    live.add_argument('--jitter-ms', type=float, default=0.0, help='回放帧到达抖动上限（毫秒）')
+    live.add_argument('--drop-rate', type=float, default=0.0, help='回放模拟丢帧比例')
+    live.add_argument('--tracking-interval', type=int, default=None,
+                      help='每隔 K 帧完整检测一次，中间帧用光流跟踪关键点')
+    live.add_argument('--governor', action='store_true', help='按帧预算自动调整分辨率、ROI和模型复杂度')
+    live.add_argument('--budget-ms', type=float, default=None, help='每帧延迟预算，默认 1000 / camera_fps')
+    live.add_argument('--clips', action='store_true', help='只保存在线检测到的关键帧及其前后片段')
+    live.add_argument('--clip-move', choices=['tantui', 'gongbu'], default='tantui')
+    live.add_argument('--pre-roll', type=float, default=2.0, help='关键帧之前保存的秒数')
+    live.add_argument('--post-roll', type=float, default=1.0, help='关键帧之后保存的秒数')
+    live.add_argument('--max-frames', type=int, default=None)
+    live.add_argument('--no-window', action='store_true', help='不显示画面窗口')
+    add_backend_arguments(live, default=None)
+    live.set_defaults(func=cmd_live)
+
+    return parser
+
+
+def check_args(parser, args):
+    """拒绝会被静默忽略的选项组合（parser.error 打印用法并退出）"""
+    if args.command == 'detect':
+        if args.cache and args.resume:
+            parser.error('detect --cache 不支持 --resume（帧缓存检测没有检查点）')
+        if args.motion_gate and (args.cache or args.daemon):
+            parser.error('--motion-gate 只适用于直接检测视频，不能与 --cache 或 --daemon 同时使用')
+        if args.cache and args.daemon:
+            parser.error('--cache 不能与 --daemon 同时使用')
+    if args.command == 'analyze' and args.move == 'all':
+        if args.segments:
+            parser.error('--segments 不适用于 --move all')
+        if args.key_frame_mode is not None:
+            parser.error('--key-frame-mode 不适用于 --move all')
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    check_args(parser, args)
+    try:
+        args.func(args)
+    except Exception as e:
+        print(f"程序执行出错: {str(e)}")
+        return 1
+    finally:
+        if args.import_times:
+            print_import_times()
+            print(f"从启动到完成: {(time.perf_counter() - _START_TIME) * 1000:.1f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
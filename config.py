@@ -5,6 +5,8 @@ POSE_CONFIG = {
     'model_complexity': 1,
     'min_detection_confidence': 0.5,
     'min_tracking_confidence': 0.5,
+    'backend': 'mediapipe',     # 姿态检测后端（见 pose_backends.py）：mediapipe 或 onnx
+    'model_path': None,         # onnx 后端的模型文件，None 表示 pose_landmark_full.onnx
     
     # 可视化配置
     'draw_landmarks': True,
@@ -18,5 +20,25 @@ POSE_CONFIG = {
     'camera_id': 0,  # 默认使用第一个摄像头
     'camera_width': 640,
     'camera_height': 480,
-    'camera_fps': 30
+    'camera_fps': 30,
+    'tracking_interval': 1,     # 每隔多少帧做一次完整检测，中间帧用光流跟踪（1 表示每帧检测）
+
+    # 质量调节（见 quality_governor.py）：延迟超出帧预算时逐级降低输入分辨率、ROI外扩和模型复杂度
+    'quality_governor': False,
+    'frame_budget_ms': None,    # 每帧延迟预算，None 表示 1000 / camera_fps
+    'quality_levels': None,     # 质量级别列表，None 表示使用 DEFAULT_QUALITY_LEVELS
+
+    # 回放配置（无摄像头时用录像或图片文件夹模拟摄像头，见 replay_capture.py）
+    'replay_source': None,      # 视频路径或图片文件夹，None 表示使用摄像头
+    'replay_jitter_ms': 0.0,    # 帧到达抖动上限（毫秒）
+    'replay_drop_rate': 0.0,    # 模拟丢帧比例
+    'replay_seed': 0,           # 抖动与丢帧的随机种子，保证多次运行可比较
+    'show_window': True,        # 是否显示画面窗口（无显示器的机器设为 False）
+
+    # 关键帧片段（见 key_frame_clips.py）：环形缓冲保存最近画面，只把在线检测到的关键帧前后片段写盘
+    'key_frame_clips': False,
+    'clip_move': 'tantui',      # 在线检测的动作：tantui 或 gongbu
+    'clip_output_folder': 'key_frame_clips',
+    'pre_roll_seconds': 2.0,    # 关键帧之前保存的时长
+    'post_roll_seconds': 1.0    # 关键帧之后保存的时长
 }
\ No newline at end of file
@@ -0,0 +1,63 @@
+import os
+import glob
+import numpy as np
+import pytest
+from landmark_io import parse_frame_file
+"""
+测试公用的合成帧序列
+以 selected_frames 中保存的真实关键帧姿态为基础，每个姿态保持若干帧并叠加高斯噪声，
+得到可重复的 frame_sequence（与 load_sequence_data 格式相同），分析/评分流程无需视频和 mediapipe
+"""
+
+BASE_FRAME_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'selected_frames')
+
+
+def load_base_frames():
+    """selected_frames 中的关键帧姿态，按帧号排序"""
+    paths = glob.glob(os.path.join(BASE_FRAME_FOLDER, 'frame_*_data.txt'))
+    paths.sort(key=lambda path: int(os.path.basename(path).split('_')[1]))
+    return [parse_frame_file(path, verbose=False) for path in paths]
+
+
+def make_sequence(length=300, hold_frames=20, noise=0.01, seed=0):
+    """生成合成序列：依次保持每个基础姿态 hold_frames 帧，x/y/z 叠加噪声，可见度不变"""
+    base_frames = load_base_frames()
+    rng = np.random.default_rng(seed)
+    sequence = []
+    for i in range(length):
+        base = base_frames[(i // hold_frames) % len(base_frames)]
+        sequence.append({
+            body_part: {field: value + rng.normal(0, noise) if field in ('x', 'y', 'z') else value
+                        for field, value in coord.items()}
+            for body_part, coord in base.items()
+        })
+    return sequence
+
+
+# 左弓步腿部姿态：左膝约 90 度，右腿伸直，双脚着地
+GONGBU_LEGS = {
+    '左髋': (0.45, 0.5), '左膝': (0.35, 0.5), '左踝': (0.35, 0.7),
+    '右髋': (0.55, 0.5), '右膝': (0.62, 0.6), '右踝': (0.69, 0.7)
+}
+
+
+def make_gongbu_sequence(length=300, hold_frames=20, noise=0.005, seed=0):
+    """在 make_sequence 的基础上，每隔一个保持段把腿部换成弓步姿态（同样叠加噪声）"""
+    sequence = make_sequence(length, hold_frames, noise, seed)
+    rng = np.random.default_rng(seed + 1)
+    for i, frame_data in enumerate(sequence):
+        if (i // hold_frames) % 2 == 0:
+            for body_part, (x, y) in GONGBU_LEGS.items():
+                frame_data[body_part] = dict(frame_data[body_part], x=x + rng.normal(0, noise),
+                                             y=y + rng.normal(0, noise), z=rng.normal(0, noise))
+    return sequence
+
+
+@pytest.fixture
+def synthetic_sequence():
+    return make_sequence
+
+
+@pytest.fixture
+def gongbu_sequence():
+    return make_gongbu_sequence
@@ -0,0 +1,339 @@
+import os
+import json
+import time
+import socket
+import struct
+import tempfile
+import threading
+import socketserver
+import numpy as np
+"""
+常驻检测服务
+每次运行脚本都要重新导入 mediapipe、创建 Pose 图并做第一次推理预热，处理大量短片段时这部分开销占了大头。
+这里用一个常驻进程保持已预热的检测器，通过 Unix 域套接字接收任务：
+    video   视频路径，按 process_video 写出 frame_N.txt 等结果，返回输出文件夹
+    image   图片路径，静态图片模式检测，返回关键点（可选写入帧文件）
+    frames  原始 BGR 帧（随请求发送的二进制数据），视频模式逐帧检测，返回每帧关键点
+    stats   服务统计，包括相对冷启动节省的时间
+    shutdown 关闭服务
+
+消息格式：4 字节大端长度 + JSON 头，头中 payload_bytes 大于 0 时其后紧跟二进制数据
+视频模式的检测后端（mediapipe Pose）带有跨帧跟踪状态，每个视频 / 帧序列任务使用一个新的后端实例，
+新实例在任务之间的空闲时间里于后台线程中创建并预热，不计入任务耗时
+任务按到达顺序逐个处理
+"""
+
+DEFAULT_SOCKET_PATH = os.path.join(tempfile.gettempdir(), 'pose_detector.sock')
+
+
+def send_message(sock, header, payload=b''):
+    header = dict(header, payload_bytes=len(payload))
+    data = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    sock.sendall(struct.pack('>I', len(data)) + data)
+    if payload:
+        sock.sendall(payload)
+
+
+def _recv_exact(sock, size):
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:], size - received)
+        if count == 0:
+            raise ConnectionError("连接已关闭")
+        received += count
+    return bytes(buffer)
+
+
+def recv_message(sock):
+    """读取一条消息，返回 (头, 二进制数据)；对方关闭连接时返回 (None, None)"""
+    try:
+        size = struct.unpack('>I', _recv_exact(sock, 4))[0]
+    except ConnectionError:
+        return None, None
+    header = json.loads(_recv_exact(sock, size).decode('utf-8'))
+    payload = _recv_exact(sock, header['payload_bytes']) if header.get('payload_bytes') else b''
+    return header, payload
+
+
+class WarmDetectorPool:
+    """保持已预热的检测器：一个静态图片模式检测器 + 一个备用的视频模式后端"""
+
+    def __init__(self, model_complexity=1, backend='mediapipe', model_path=None):
+        # 冷启动耗时 = 导入 mediapipe + 创建检测器 + 首次推理，即每次独立运行脚本需要付出的开销
+        # 单独运行的脚本只创建它需要的一个检测器，按任务类型分别计时
+        start = time.perf_counter()
+        import pose_detection
+        self.pose_detection = pose_detection
+        self.import_seconds = time.perf_counter() - start
+
+        self.video_detector, video_create, video_warmup = self._create_detector(
+            model_complexity=model_complexity, backend=backend, model_path=model_path)
+        self.image_detector, image_create, image_warmup = self._create_detector(
+            static_image_mode=True, model_complexity=model_complexity, backend=backend, model_path=model_path)
+        self.create_seconds = video_create + image_create
+        self.warmup_seconds = video_warmup + image_warmup
+        video_seconds = self.import_seconds + video_create + video_warmup
+        self.cold_start_seconds = {
+            'video': video_seconds,
+            'frames': video_seconds,
+            'image': self.import_seconds + image_create + image_warmup
+        }
+
+        self.spare_backend = None
+        self.spare_thread = None
+        self._prepare_spare()
+
+    def _create_detector(self, **kwargs):
+        """创建并预热一个检测器，返回 (检测器, 创建耗时, 预热耗时)"""
+        start = time.perf_counter()
+        detector = self.pose_detection.PoseDetector(**kwargs)
+        create_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        self._warm_up(detector.backend)
+        return detector, create_seconds, time.perf_counter() - start
+
+    def _warm_up(self, backend):
+        """用空白帧做一次推理，完成模型加载和内存分配"""
+        backend.process(np.zeros((256, 256, 3), dtype=np.uint8))
+
+    def _prepare_spare(self):
+        """在后台线程中创建并预热下一个任务使用的视频模式后端"""
+        def create():
+            try:
+                backend = self.video_detector._create_backend()
+                self._warm_up(backend)
+            except Exception as e:
+                # 失败时 spare_backend 保持为 None，取用时再同步创建
+                print(f"Error: 备用检测后端创建失败: {str(e)}")
+                return
+            self.spare_backend = backend
+
+        self.spare_thread = threading.Thread(target=create, daemon=True)
+        self.spare_thread.start()
+
+    def fresh_video_detector(self):
+        """换上一个没有跟踪状态的后端，返回视频模式检测器"""
+        self.spare_thread.join()
+        spare_backend = self.spare_backend
+        self.spare_backend = None
+        if spare_backend is None:
+            # 后台创建失败，在本任务中同步创建（仍失败时异常作为任务错误返回）
+            spare_backend = self.video_detector._create_backend()
+        old_backend = self.video_detector.backend
+        self.video_detector.backend = spare_backend
+        old_backend.close()
+        return self.video_detector
+
+    def job_finished(self):
+        """任务结束后，备用后端已被取用时在后台准备下一个"""
+        if self.spare_backend is None and not self.spare_thread.is_alive():
+            self._prepare_spare()
+
+    def close(self):
+        self.spare_thread.join()
+        for backend in (self.video_detector.backend, self.image_detector.backend, self.spare_backend):
+            if backend is not None:
+                backend.close()
+
+
+class DetectorRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        # 一个连接上可以连续提交多个任务
+        while True:
+            header, payload = recv_message(self.request)
+            if header is None:
+                return
+            response, response_payload = self.server.run_job(header, payload)
+            send_message(self.request, response, response_payload)
+            if header.get('type') == 'shutdown':
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+
+
+class DetectorDaemon(socketserver.UnixStreamServer):
+    def __init__(self, socket_path=None, model_complexity=1, backend='mediapipe', model_path=None):
+        socket_path = socket_path or DEFAULT_SOCKET_PATH
+        if os.path.exists(socket_path):
+            # 能连上说明已有服务在运行，不能接管其套接字；连不上才是上次遗留的文件
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(socket_path)
+            except OSError:
+                os.remove(socket_path)
+            else:
+                raise RuntimeError(f"检测服务已在运行: {socket_path}")
+            finally:
+                probe.close()
+        self.socket_path = socket_path
+        self.pool = WarmDetectorPool(model_complexity, backend, model_path)
+        self.started = time.time()
+        self.jobs = {'video': 0, 'image': 0, 'frames': 0}
+        self.frames_processed = 0
+        self.job_seconds = 0.0
+        self.saved_seconds = 0.0
+        super().__init__(socket_path, DetectorRequestHandler)
+
+    def run_job(self, header, payload):
+        """执行一个任务，返回 (响应头, 响应二进制数据)"""
+        job_type = header.get('type')
+        handlers = {
+            'video': self._run_video,
+            'image': self._run_image,
+            'frames': self._run_frames
+        }
+        if job_type in ('stats', 'shutdown'):
+            return dict(self.stats(), ok=True), b''
+        if job_type not in handlers:
+            return {'ok': False, 'error': f"未知任务类型: {job_type}"}, b''
+
+        start = time.perf_counter()
+        try:
+            result = handlers[job_type](header, payload)
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}, b''
+        finally:
+            self.pool.job_finished()
+        seconds = time.perf_counter() - start
+
+        self.jobs[job_type] += 1
+        self.job_seconds += seconds
+        saved_seconds = self.pool.cold_start_seconds[job_type]
+        self.saved_seconds += saved_seconds
+        return dict(result, ok=True, job_seconds=seconds, saved_seconds=saved_seconds), b''
+
+    def _run_video(self, header, payload):
+        detector = self.pool.fresh_video_detector()
+        output_dir = detector.process_video(header['path'], header.get('output_dir'),
+                                            resume=header.get('resume', False))
+        if output_dir is None:
+            raise RuntimeError(f"视频处理失败: {header['path']}")
+        return {'output_dir': output_dir}
+
+    def _run_image(self, header, payload):
+        import cv2
+
+        frame = cv2.imread(header['path'])
+        if frame is None:
+            raise RuntimeError(f"无法读取图片: {header['path']}")
+        landmarks = self._detect(self.pool.image_detector, frame)
+        self.frames_processed += 1
+        if landmarks is not None and header.get('output'):
+            self.pool.pose_detection.write_frame_file(header['output'], landmarks)
+        return {'landmarks': landmarks}
+
+    def _run_frames(self, header, payload):
+        frames = np.frombuffer(payload, dtype=np.uint8).reshape(header['shape'])
+        detector = self.pool.fresh_video_detector()
+        landmarks = [self._detect(detector, frame) for frame in frames]
+        self.frames_processed += len(frames)
+        return {'landmarks': landmarks}
+
+    def _detect(self, detector, frame):
+        """与 process_video 相同的预处理，返回坐标列表（未检测到时为 None）"""
+        _, frame_rgb = self.pool.pose_detection.preprocess_frame(frame)
+        landmarks = detector.detect(frame_rgb)
+        if landmarks is None:
+            return None
+        return self.pool.pose_detection.landmarks_to_coordinates(landmarks)
+
+    def stats(self):
+        return {
+            'jobs': dict(self.jobs),
+            'frames': self.frames_processed,
+            'job_seconds': self.job_seconds,
+            'uptime_seconds': time.time() - self.started,
+            'cold_start_seconds': dict(self.pool.cold_start_seconds),
+            'import_seconds': self.pool.import_seconds,
+            'create_seconds': self.pool.create_seconds,
+            'warmup_seconds': self.pool.warmup_seconds,
+            # 每个任务若单独运行脚本都要付出一次该类任务的冷启动
+            'saved_seconds': self.saved_seconds
+        }
+
+    def server_close(self):
+        super().server_close()
+        self.pool.close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+
+class DetectorClient:
+    def __init__(self, socket_path=None, timeout=None):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(socket_path or DEFAULT_SOCKET_PATH)
+
+    def request(self, header, payload=b''):
+        send_message(self.sock, header, payload)
+        response, _ = recv_message(self.sock)
+        if response is None:
+            raise ConnectionError("检测服务已断开")
+        if not response.get('ok'):
+            raise RuntimeError(response.get('error', '检测服务返回错误'))
+        return response
+
+    def detect_video(self, video_path, output_dir=None, resume=False):
+        return self.request({'type': 'video', 'path': os.path.abspath(video_path),
+                             'output_dir': os.path.abspath(output_dir) if output_dir else None,
+                             'resume': resume})
+
+    def detect_image(self, image_path, output=None):
+        return self.request({'type': 'image', 'path': os.path.abspath(image_path),
+                             'output': os.path.abspath(output) if output else None})
+
+    def detect_frames(self, frames):
+        """frames: (帧数, 高, 宽, 3) 的 uint8 BGR 数组或帧列表"""
+        frames = np.ascontiguousarray(np.asarray(frames, dtype=np.uint8))
+        return self.request({'type': 'frames', 'shape': list(frames.shape)}, frames.tobytes())
+
+    def stats(self):
+        return self.request({'type': 'stats'})
+
+    def shutdown(self):
+        return self.request({'type': 'shutdown'})
+
+    def close(self):
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def serve(socket_path=None, model_complexity=1, backend='mediapipe', model_path=None):
+    if not hasattr(socket, 'AF_UNIX'):
+        print("Error: 当前系统不支持 Unix 域套接字")
+        return
+
+    try:
+        daemon = DetectorDaemon(socket_path, model_complexity, backend, model_path)
+    except RuntimeError as e:
+        print(f"Error: {str(e)}")
+        return
+    pool = daemon.pool
+    print(f"检测服务已启动: {daemon.socket_path}")
+    print(f"启动耗时：导入 {pool.import_seconds:.2f} 秒，创建检测器 {pool.create_seconds:.2f} 秒，"
+          f"预热 {pool.warmup_seconds:.2f} 秒")
+    print(f"之后每个任务可省去的冷启动：视频/帧序列 {pool.cold_start_seconds['video']:.2f} 秒，"
+          f"图片 {pool.cold_start_seconds['image']:.2f} 秒")
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stats = daemon.stats()
+        daemon.server_close()
+        print(f"检测服务已关闭：共 {sum(stats['jobs'].values())} 个任务，{stats['frames']} 帧，"
+              f"相对冷启动节省约 {stats['saved_seconds']:.1f} 秒")
+
+
+def main():
+    serve()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import os
+import json
+import time
+import cv2
+import numpy as np
+from pose_detection import PREPROCESS_SCALE, preprocess_frame
+"""
+预解码帧缓存
+调整置信度阈值、比较 model_complexity 等检测实验，每次都要重新解码视频并重做 缩放/对比度/模糊 预处理。
+这里一次性把预处理后的 RGB 帧（即送入 pose.process 的输入，推理分辨率）按顺序写入一个 uint8 原始文件，
+配一个索引文件记录帧数、尺寸、各帧时间戳和源视频信息：
+    <视频名>_framecache/frames.u8     (帧数, 高, 宽, 3) RGB
+    <视频名>_framecache/index.json    帧索引，最后写入，存在即表示缓存完整
+之后的检测通过 np.memmap 只读映射，按帧号直接取视图，不解码、不预处理、不复制
+源视频大小或修改时间、预处理参数变化时缓存失效，需要重新生成
+
+注意缓存体积 = 帧数 × 推理分辨率 × 3 字节（1080p 视频约 4MB/帧），适合反复实验的短片段
+"""
+
+FRAMES_FILE = 'frames.u8'
+INDEX_FILE = 'index.json'
+# 预处理方式（preprocess_frame）改变时修改版本号，使旧缓存失效
+CACHE_VERSION = 1
+
+
+def default_cache_dir(video_path):
+    return os.path.splitext(video_path)[0] + '_framecache'
+
+
+def _source_info(video_path):
+    stat = os.stat(video_path)
+    return {
+        'path': os.path.abspath(video_path),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns
+    }
+
+
+def build_frame_cache(video_path, cache_dir=None):
+    """解码并预处理整段视频，写入帧缓存，返回 FrameCache；视频无法打开时返回 None"""
+    cache_dir = cache_dir or default_cache_dir(video_path)
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        print(f"Error: 无法打开视频文件: {video_path}")
+        return None
+    os.makedirs(cache_dir, exist_ok=True)
+
+    index_path = os.path.join(cache_dir, INDEX_FILE)
+    if os.path.exists(index_path):
+        os.remove(index_path)  # 写入过程中中断时不会留下看似完整的缓存
+
+    start = time.perf_counter()
+    shape = None
+    timestamps = []
+    with open(os.path.join(cache_dir, FRAMES_FILE), 'wb') as f:
+        while True:
+            success, frame = cap.read()
+            if not success:
+                break
+            timestamps.append(cap.get(cv2.CAP_PROP_POS_MSEC))
+            _, frame_rgb = preprocess_frame(frame)
+            if shape is None:
+                shape = frame_rgb.shape
+                frame_size = [frame.shape[1], frame.shape[0]]
+            f.write(np.ascontiguousarray(frame_rgb).data)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    cap.release()
+
+    if shape is None:
+        print(f"Error: 视频中没有可读取的帧: {video_path}")
+        return None
+
+    index = {
+        'version': CACHE_VERSION,
+        'preprocess_scale': PREPROCESS_SCALE,
+        'source': _source_info(video_path),
+        'fps': fps,
+        'frame_size': frame_size,           # 原始视频帧尺寸 [宽, 高]
+        'shape': [len(timestamps)] + list(shape),
+        'timestamps_ms': timestamps
+    }
+    temp_path = index_path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f)
+    os.replace(temp_path, index_path)
+
+    seconds = time.perf_counter() - start
+    size_mb = os.path.getsize(os.path.join(cache_dir, FRAMES_FILE)) / 1024 / 1024
+    print(f"已缓存 {len(timestamps)} 帧（{shape[1]}x{shape[0]}，{size_mb:.0f} MB），"
+          f"用时 {seconds:.1f} 秒: {cache_dir}")
+    return FrameCache(cache_dir)
+
+
+class FrameCache:
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        with open(os.path.join(cache_dir, INDEX_FILE), 'r', encoding='utf-8') as f:
+            self.index = json.load(f)
+        self.fps = self.index['fps']
+        self.frame_size = tuple(self.index['frame_size'])
+        self.frames = np.memmap(os.path.join(cache_dir, FRAMES_FILE), dtype=np.uint8, mode='r',
+                                shape=tuple(self.index['shape']))
+
+    def __len__(self):
+        return len(self.frames)
+
+    def frame(self, frame_number):
+        """第 frame_number 帧预处理后的 RGB 图像（只读的内存映射视图）"""
+        return self.frames[frame_number]
+
+    def __iter__(self):
+        for frame_number in range(len(self.frames)):
+            yield frame_number, self.frames[frame_number]
+
+    def timestamp_ms(self, frame_number):
+        return self.index['timestamps_ms'][frame_number]
+
+    def is_valid_for(self, video_path):
+        """缓存是否对应该视频的当前版本和当前预处理方式"""
+        return (self.index.get('version') == CACHE_VERSION and
+                self.index.get('preprocess_scale') == PREPROCESS_SCALE and
+                os.path.exists(video_path) and
+                self.index.get('source') == _source_info(video_path))
+
+
+def open_frame_cache(video_path, cache_dir=None, build=True):
+    """
+    打开视频的帧缓存，不存在或已失效时（build=True）重新生成
+    返回 FrameCache，无法生成时返回 None
+    """
+    cache_dir = cache_dir or default_cache_dir(video_path)
+    if os.path.exists(os.path.join(cache_dir, INDEX_FILE)):
+        cache = FrameCache(cache_dir)
+        if cache.is_valid_for(video_path):
+            return cache
+        print(f"帧缓存已失效（视频或预处理方式已改变）: {cache_dir}")
+        del cache
+    if not build:
+        return None
+    return build_frame_cache(video_path, cache_dir)
+
+
+def main():
+    video_path = '1.mp4'
+    try:
+        cache = open_frame_cache(video_path)
+        if cache is not None:
+            print(f"{len(cache)} 帧，推理分辨率 {cache.frames.shape[2]}x{cache.frames.shape[1]}，{cache.fps:.1f} 帧/秒")
+
+    except Exception as e:
+        print(f"程序执行出错: {str(e)}")
+
+if __name__ == "__main__":
+    main()
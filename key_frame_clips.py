@@ -0,0 +1,155 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+from annotation_renderer import AnnotationRenderer
+from landmark_io import BODY_PARTS, write_frame_file
+from streaming_analysis import FrameWindow, window_size_for
+"""
+实时模式关键帧片段保存
+内存中用固定大小的环形缓冲保存最近几秒的原始画面，同时逐帧做在线关键帧检测，
+检测到关键帧后等到后滚帧采集完，把 前滚 + 关键帧 + 后滚 的画面拷出环形缓冲，交给后台线程写盘：
+    frame_N.jpg          关键帧原始画面
+    frame_N_marked.jpg   绘制骨架和得分的关键帧
+    frame_N_data.txt     关键帧姿态数据
+    frame_N_clip.mp4     关键帧前后的片段
+写盘量与关键帧数量成正比，与训练时长无关；后台写入来不及时丢弃新片段而不阻塞采集
+"""
+
+def pose_landmarks_to_frame(pose_landmarks):
+    """mediapipe 检测结果 -> 与 parse_frame_file 相同格式的帧数据（未检测到人时为空字典）"""
+    if pose_landmarks is None:
+        return {}
+    return {
+        BODY_PARTS[i]: {'x': lm.x, 'y': lm.y, 'z': lm.z, 'v': lm.visibility}
+        for i, lm in enumerate(pose_landmarks.landmark)
+    }
+
+
+class KeyFrameClipRecorder:
+    def __init__(self, output_dir, analyzer, scorer=None, fps=30.0,
+                 pre_roll_seconds=2.0, post_roll_seconds=1.0, max_pending=4, jpeg_quality=95):
+        self.output_dir = output_dir
+        self.analyzer = analyzer      # 提供 reset_detection / update_key_frame / build_analysis_result 的分析器
+        self.scorer = scorer          # 可选，提供时在标注图上列出扣分项
+        self.fps = fps
+        self.pre_roll = int(round(pre_roll_seconds * fps))
+        self.post_roll = int(round(post_roll_seconds * fps))
+        self.max_pending = max_pending  # 后台最多排队的片段数
+        self.jpeg_quality = jpeg_quality
+        # 实时模式的关键点相对原始画面归一化，没有预处理缩放
+        self.renderer = AnnotationRenderer(coord_scale=1.0, jpeg_quality=jpeg_quality)
+
+        # 关键帧最迟在其后 consecutive_frames - 1 帧确定，缓冲需同时覆盖前滚和这段延迟
+        self.capacity = self.pre_roll + max(self.post_roll, analyzer.consecutive_frames) + 1
+        self.ring = None              # (capacity, 高, 宽, 3) 原始画面，首帧到达时按画面尺寸分配
+        self.writer = ThreadPoolExecutor(max_workers=1)
+        os.makedirs(output_dir, exist_ok=True)
+        self.reset()
+
+    def reset(self):
+        self.count = 0                # 已加入的帧数（即序列下标）
+        self.window = FrameWindow(window_size_for(self.analyzer, self.scorer))
+        self.pending = []             # 等待后滚帧的片段
+        self.futures = []
+        self.saved = []               # 已保存的关键帧序号
+        self.skipped = 0              # 因后台写入来不及而放弃的片段
+        self.write_seconds = 0.0
+        self.analyzer.reset_detection()
+        self.deductions = self.scorer.new_deductions() if self.scorer is not None else None
+
+    def add(self, frame, pose_landmarks):
+        """加入一帧原始画面及其检测结果（在绘制标注之前调用），返回新确定的关键帧序号或 None"""
+        if self.ring is None or self.ring.shape[1:] != frame.shape:
+            self.ring = np.empty((self.capacity,) + frame.shape, dtype=np.uint8)
+        index = self.count
+        np.copyto(self.ring[index % self.capacity], frame)
+        self.window.append(pose_landmarks_to_frame(pose_landmarks))
+        self.count += 1
+
+        key_frame = self.analyzer.update_key_frame(index, self.window)
+        if key_frame is not None:
+            self._on_key_frame(key_frame)
+
+        # 后滚帧已采集完（或延迟已超过后滚时长）的片段交给后台写入
+        ready = [clip for clip in self.pending if clip['end'] <= self.count]
+        for clip in ready:
+            self.pending.remove(clip)
+            self._submit(clip)
+        return key_frame
+
+    def _on_key_frame(self, key_frame):
+        # 关键帧仍在回看窗口内，此时生成其得分与扣分项
+        result = self.analyzer.build_analysis_result(self.window, [key_frame])
+        deductions = []
+        if self.scorer is not None:
+            new_deductions = self.scorer.new_deductions()
+            for detail in result['details']:
+                self.scorer.score_key_frame(detail, self.window, new_deductions)
+            for category, items in new_deductions.items():
+                self.deductions[category].extend(items)
+                deductions.extend(item['type'] for item in items)
+
+        self.pending.append({
+            'key_frame': key_frame,
+            'start': max(0, key_frame - self.pre_roll, self.count - self.capacity),
+            'end': key_frame + self.post_roll + 1,
+            'annotation': {
+                'landmarks': self.window[key_frame],
+                'score': result['scores'][0]['score'] if result['scores'] else None,
+                'deductions': deductions
+            }
+        })
+
+    def _submit(self, clip):
+        self.futures = [future for future in self.futures if not future.done()]
+        if len(self.futures) >= self.max_pending:
+            self.skipped += 1
+            return
+
+        # 只拷出这一片段的画面，环形缓冲随后可被覆盖
+        end = min(clip['end'], self.count)
+        frames = np.stack([self.ring[i % self.capacity] for i in range(clip['start'], end)])
+        self.futures.append(self.writer.submit(self._write_clip, clip, frames))
+
+    def _write_clip(self, clip, frames):
+        start_time = time.perf_counter()
+        key_frame = clip['key_frame']
+        prefix = os.path.join(self.output_dir, f'frame_{key_frame}')
+        key_image = frames[key_frame - clip['start']]
+
+        cv2.imwrite(f'{prefix}.jpg', key_image, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        marked = self.renderer.draw(key_image.copy(), key_frame, clip['annotation'])
+        cv2.imwrite(f'{prefix}_marked.jpg', marked, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if clip['annotation']['landmarks']:
+            write_frame_file(f'{prefix}_data.txt', [
+                {'x': coord['x'], 'y': coord['y'], 'z': coord['z'], 'visibility': coord['v']}
+                for coord in clip['annotation']['landmarks'].values()
+            ])
+
+        height, width = frames.shape[1:3]
+        out = cv2.VideoWriter(f'{prefix}_clip.mp4', cv2.VideoWriter_fourcc(*'mp4v'), self.fps, (width, height))
+        for frame in frames:
+            out.write(frame)
+        out.release()
+
+        self.write_seconds += time.perf_counter() - start_time
+        self.saved.append(key_frame)
+
+    def close(self):
+        """写出后滚帧不足的剩余片段并等待后台写入完成，返回统计"""
+        for clip in self.pending:
+            self._submit(clip)
+        self.pending = []
+        self.writer.shutdown(wait=True)
+        return self.stats()
+
+    def stats(self):
+        return {
+            'key_frames': len(self.saved) + self.skipped,
+            'clips_saved': len(self.saved),
+            'clips_skipped': self.skipped,
+            'clip_write_seconds': self.write_seconds,
+            'ring_frames': self.capacity
+        }
@@ -0,0 +1,279 @@
+import os
+import bz2
+import lzma
+import zlib
+import struct
+import numpy as np
+from landmark_io import BODY_PARTS, LANDMARK_FIELDS, frames_to_array, array_to_frame, load_landmark_sequence
+"""
+关键点压缩归档（冷存储）
+frame_N.txt 每个关键点约 60 字节文本，相邻帧几乎相同，冗余很大。归档格式：
+1. 每 chunk_frames 帧为一块，块内 x/y/z/v 按分量量化为 16 位定点数：
+       code = round((value - min) / step)，step = (max - min) / 65535
+   min/step 按块、按分量保存为 float32
+2. 沿时间做差分（uint16 回绕相减），zigzag 映射为小正数，再按高/低字节分平面排列
+3. 每块用标准库编解码器（lzma / zlib / bz2）单独压缩，文件末尾保存块索引，
+   读取一段时间范围时只解压涉及的块
+
+误差上界：每个值的量化误差 <= step / 2 = (块内该分量的 max - min) / 131070
+    x/y 的取值范围通常在 [0, 1.25] 内，误差 <= 1.0e-5；v 在 [0, 1] 内，误差 <= 7.7e-6
+    均远小于文本格式保留 4 位小数带来的 5e-5 舍入误差
+写入时返回实际的最大量化误差，可以直接核对
+
+缺失的关键点/帧中没有的部位用存在位图记录，解码后与 parse_frame_file 的结果一致（不含该部位）
+沿用关键点的 carried_over 标记行不保存
+"""
+
+MAGIC = b'LMKARC1\0'
+FOOTER = struct.Struct('<QI8s')        # 索引偏移, 块数, MAGIC
+HEADER = struct.Struct('<8sBI')        # MAGIC, 编解码器编号, 每块帧数
+CHUNK_HEADER = struct.Struct('<II')    # 块内帧数, 压缩后字节数
+INDEX_ENTRY = struct.Struct('<QqqI')   # 块偏移, 首帧号, 末帧号, 块内帧数
+
+CODECS = {
+    'lzma': (1, lzma.compress, lzma.decompress),
+    'zlib': (2, lambda data: zlib.compress(data, 9), zlib.decompress),
+    'bz2': (3, bz2.compress, bz2.decompress)
+}
+CODEC_BY_ID = {codec_id: name for name, (codec_id, _, _) in CODECS.items()}
+
+QUANT_LEVELS = 65535
+NUM_POINTS = len(BODY_PARTS)
+NUM_FIELDS = len(LANDMARK_FIELDS)
+
+
+def _encode_chunk(frame_numbers, array):
+    """
+    编码一块（未压缩）
+    frame_numbers: (n,) 帧号；array: (n, 33, 4) 关键点数组，缺失为 NaN
+    返回 (字节串, 最大量化误差)
+    """
+    n = len(frame_numbers)
+    present = ~np.isnan(array[:, :, 0])
+    values = np.where(present[:, :, None], array, np.nan).astype(np.float64)
+
+    # 按分量求范围，整列缺失时范围取 [0, 0]
+    with np.errstate(invalid='ignore'):
+        mins = np.nan_to_num(np.nanmin(values, axis=(0, 1)) if present.any() else np.zeros(NUM_FIELDS))
+        maxs = np.nan_to_num(np.nanmax(values, axis=(0, 1)) if present.any() else np.zeros(NUM_FIELDS))
+    mins = mins.astype(np.float32)
+    steps = ((maxs - mins) / QUANT_LEVELS).astype(np.float32)
+    safe_steps = np.where(steps > 0, steps, 1.0).astype(np.float64)
+
+    filled = np.where(present[:, :, None], values, mins.astype(np.float64))
+    codes = np.clip(np.round((filled - mins) / safe_steps), 0, QUANT_LEVELS).astype(np.uint16)
+    decoded = mins + codes.astype(np.float64) * np.where(steps > 0, steps, 0.0)
+    max_error = float(np.max(np.abs(decoded - filled)[present])) if present.any() else 0.0
+
+    # 时间放到最内层，沿时间差分：uint16 回绕相减，再 zigzag 映射为小正数
+    codes = codes.transpose(1, 2, 0)  # (33, 4, n)
+    deltas = np.diff(codes, axis=2, prepend=np.zeros((NUM_POINTS, NUM_FIELDS, 1), dtype=np.uint16))
+    signed = deltas.view(np.int16).astype(np.int32)
+    zigzag = ((signed << 1) ^ (signed >> 31)).astype(np.uint16)
+    # 高低字节分平面，高字节几乎全为0，压缩效果更好
+    planes = np.ascontiguousarray(zigzag, dtype='<u2').view(np.uint8).reshape(-1, 2).T
+
+    frame_deltas = np.diff(np.asarray(frame_numbers, dtype=np.int64), prepend=0).astype(np.int32)
+    payload = b''.join([
+        frame_deltas.tobytes(),
+        np.packbits(present, axis=1).tobytes(),
+        mins.tobytes(),
+        steps.tobytes(),
+        planes.tobytes()
+    ])
+    return payload, max_error
+
+
+def _decode_chunk(payload, n):
+    """解码一块，返回 (帧号数组, (n, 33, 4) float32 数组，缺失为 NaN)"""
+    offset = 0
+
+    def take(nbytes):
+        nonlocal offset
+        data = payload[offset:offset + nbytes]
+        offset += nbytes
+        return data
+
+    frame_numbers = np.cumsum(np.frombuffer(take(4 * n), dtype=np.int32).astype(np.int64))
+    mask_bytes = (NUM_POINTS + 7) // 8
+    present = np.unpackbits(np.frombuffer(take(n * mask_bytes), dtype=np.uint8).reshape(n, mask_bytes),
+                            axis=1, count=NUM_POINTS).astype(bool)
+    mins = np.frombuffer(take(4 * NUM_FIELDS), dtype=np.float32)
+    steps = np.frombuffer(take(4 * NUM_FIELDS), dtype=np.float32)
+
+    planes = np.frombuffer(take(2 * NUM_POINTS * NUM_FIELDS * n), dtype=np.uint8).reshape(2, -1)
+    zigzag = np.ascontiguousarray(planes.T).view('<u2').reshape(NUM_POINTS, NUM_FIELDS, n).astype(np.int32)
+    deltas = ((zigzag >> 1) ^ -(zigzag & 1)).astype(np.int16).view(np.uint16)
+    codes = np.cumsum(deltas, axis=2, dtype=np.uint16).transpose(2, 0, 1)  # 回绕累加还原
+
+    array = (mins.astype(np.float64) + codes.astype(np.float64) * steps.astype(np.float64)).astype(np.float32)
+    array[~present] = np.nan
+    return frame_numbers, array
+
+
+class ArchiveWriter:
+    """流式写入归档，每积累 chunk_frames 帧写出一块"""
+    def __init__(self, path, chunk_frames=256, codec='lzma'):
+        if codec not in CODECS:
+            raise ValueError(f"不支持的编解码器: {codec}，可选 {list(CODECS)}")
+        self.chunk_frames = chunk_frames
+        self.codec_id, self.compress, _ = CODECS[codec]
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, self.codec_id, chunk_frames))
+
+        self.pending = []   # [(帧号, 帧数据)]
+        self.index = []
+        self.frames = 0
+        self.raw_bytes = 0
+        self.max_error = 0.0
+
+    def add(self, frame_num, frame_data):
+        if self.pending and frame_num <= self.pending[-1][0]:
+            raise ValueError(f"帧号必须递增: {frame_num}")
+        self.pending.append((frame_num, frame_data))
+        if len(self.pending) >= self.chunk_frames:
+            self._flush()
+
+    def _flush(self):
+        if not self.pending:
+            return
+        frame_numbers = [frame_num for frame_num, _ in self.pending]
+        payload, max_error = _encode_chunk(frame_numbers, frames_to_array([data for _, data in self.pending]))
+        compressed = self.compress(payload)
+
+        self.index.append((self.file.tell(), frame_numbers[0], frame_numbers[-1], len(frame_numbers)))
+        self.file.write(CHUNK_HEADER.pack(len(frame_numbers), len(compressed)))
+        self.file.write(compressed)
+
+        self.frames += len(frame_numbers)
+        self.raw_bytes += len(payload)
+        self.max_error = max(self.max_error, max_error)
+        self.pending = []
+
+    def close(self):
+        """写出剩余帧和块索引，返回统计信息"""
+        self._flush()
+        index_offset = self.file.tell()
+        for entry in self.index:
+            self.file.write(INDEX_ENTRY.pack(*entry))
+        self.file.write(FOOTER.pack(index_offset, len(self.index), MAGIC))
+        size = self.file.tell()
+        self.file.close()
+        return {
+            'frames': self.frames,
+            'chunks': len(self.index),
+            'bytes': size,
+            'max_error': self.max_error
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.file.closed:
+            return
+        if exc_type is None:
+            self.close()
+        else:
+            # 出错时不写块索引，读取时会报告文件不完整
+            self.file.close()
+
+
+class LandmarkArchive:
+    """读取归档，按帧号范围只解压涉及的块"""
+    def __init__(self, path):
+        self.path = path
+        if os.path.getsize(path) < HEADER.size + FOOTER.size:
+            raise ValueError(f"归档文件不完整: {path}")
+        self.file = open(path, 'rb')
+        magic, codec_id, self.chunk_frames = HEADER.unpack(self.file.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"不是关键点归档文件: {path}")
+        self.codec = CODEC_BY_ID[codec_id]
+        self.decompress = CODECS[self.codec][2]
+
+        self.file.seek(-FOOTER.size, os.SEEK_END)
+        index_offset, chunk_count, magic = FOOTER.unpack(self.file.read(FOOTER.size))
+        if magic != MAGIC:
+            raise ValueError(f"归档文件不完整（缺少块索引）: {path}")
+        self.file.seek(index_offset)
+        self.index = [INDEX_ENTRY.unpack(self.file.read(INDEX_ENTRY.size)) for _ in range(chunk_count)]
+
+    def __len__(self):
+        return sum(entry[3] for entry in self.index)
+
+    def frame_numbers(self):
+        """所有块覆盖的帧号范围 [(首帧号, 末帧号)]"""
+        return [(first, last) for _, first, last, _ in self.index]
+
+    def read_chunk(self, chunk):
+        offset = self.index[chunk][0]
+        self.file.seek(offset)
+        n, size = CHUNK_HEADER.unpack(self.file.read(CHUNK_HEADER.size))
+        return _decode_chunk(self.decompress(self.file.read(size)), n)
+
+    def iter_arrays(self, start=None, stop=None):
+        """按块产生 (帧号数组, 关键点数组)，只包含帧号在 [start, stop) 内的帧"""
+        for chunk, (_, first, last, _) in enumerate(self.index):
+            if (start is not None and last < start) or (stop is not None and first >= stop):
+                continue
+            frame_numbers, array = self.read_chunk(chunk)
+            keep = np.ones(len(frame_numbers), dtype=bool)
+            if start is not None:
+                keep &= frame_numbers >= start
+            if stop is not None:
+                keep &= frame_numbers < stop
+            yield frame_numbers[keep], array[keep]
+
+    def iter_frames(self, start=None, stop=None):
+        """逐帧产生 (帧号, 帧数据)，帧数据格式与 parse_frame_file 相同"""
+        for frame_numbers, array in self.iter_arrays(start, stop):
+            for frame_num, frame_array in zip(frame_numbers, array):
+                yield int(frame_num), array_to_frame(frame_array)
+
+    def load_sequence(self, start=None, stop=None):
+        """返回与 main.load_sequence_data 相同格式的帧数据列表"""
+        return [frame_data for _, frame_data in self.iter_frames(start, stop)]
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def archive_folder(output_folder, archive_path, chunk_frames=256, codec='lzma'):
+    """把 frame_N.txt 文件夹写成归档，返回统计信息（含原始文本字节数与压缩比）"""
+    with ArchiveWriter(archive_path, chunk_frames, codec) as writer:
+        for frame_num, frame_data in load_landmark_sequence(output_folder):
+            writer.add(frame_num, frame_data)
+        stats = writer.close()
+
+    text_bytes = sum(os.path.getsize(os.path.join(output_folder, f))
+                     for f in os.listdir(output_folder)
+                     if f.startswith('frame_') and f.endswith('.txt'))
+    stats['text_bytes'] = text_bytes
+    stats['ratio'] = text_bytes / stats['bytes'] if stats['bytes'] else 0.0
+    return stats
+
+
+def main():
+    output_folder = os.path.join(os.getcwd(), 'output1')
+    archive_path = output_folder + '.lmk'
+    try:
+        stats = archive_folder(output_folder, archive_path)
+        print(f"{stats['frames']} 帧，{stats['text_bytes']} 字节 -> {stats['bytes']} 字节，"
+              f"压缩比 {stats['ratio']:.1f}，最大量化误差 {stats['max_error']:.2e}")
+
+        with LandmarkArchive(archive_path) as archive:
+            frame_sequence = archive.load_sequence()
+            print(f"读回 {len(frame_sequence)} 帧")
+
+    except Exception as e:
+        print(f"程序执行出错: {str(e)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+关键点数据文件读写
+frame_N.txt 格式：每行一个关键点
+    左髋: x=0.7110, y=0.8464, z=-0.0463, v=0.9992
+不含 ':' 的行会被读取时忽略（沿用上一次检测结果的帧以 "# carried_over from frame N" 标记）
+本模块只依赖标准库和 numpy，分析/评分流程无需导入 cv2 和 mediapipe
+"""
+import os
+import numpy as np
+
+# 定义身体部位映射（与 mediapipe pose 的 33 个关键点顺序一致）
+BODY_PARTS = {
+    0: "鼻子",
+    1: "左眼(内)", 2: "左眼", 3: "左眼(外)",
+    4: "右眼(内)", 5: "右眼", 6: "右眼(外)",
+    7: "左耳", 8: "右耳",
+    9: "嘴(左)", 10: "嘴(右)",
+    11: "左肩", 12: "右肩",
+    13: "左肘", 14: "右肘",
+    15: "左手腕", 16: "右手腕",
+    17: "左手", 18: "右手",
+    19: "左小指", 20: "右小指",
+    21: "左食指", 22: "右食指",
+    23: "左髋", 24: "右髋",
+    25: "左膝", 26: "右膝",
+    27: "左踝", 28: "右踝",
+    29: "左脚", 30: "右脚",
+    31: "左脚趾", 32: "右脚趾"
+}
+
+# 部位名 -> 关键点序号
+PART_INDEX = {name: index for index, name in BODY_PARTS.items()}
+
+# 数组形式中每个关键点的分量顺序
+LANDMARK_FIELDS = ('x', 'y', 'z', 'v')
+
+# 骨架连线（与 mp.solutions.pose.POSE_CONNECTIONS 相同）
+POSE_CONNECTIONS = [
+    (0, 1), (1, 2), (2, 3), (3, 7), (0, 4), (4, 5), (5, 6), (6, 8), (9, 10),
+    (11, 12), (11, 13), (13, 15), (15, 17), (15, 19), (15, 21), (17, 19),
+    (12, 14), (14, 16), (16, 18), (16, 20), (16, 22), (18, 20),
+    (11, 23), (12, 24), (23, 24), (23, 25), (24, 26), (25, 27), (26, 28),
+    (27, 29), (28, 30), (29, 31), (30, 32), (27, 31), (28, 32)
+]
+
+
+def format_landmarks(landmarks):
+    """
+    将关键点列表格式化为 frame_N.txt 文本
+    landmarks: 33个包含 x, y, z, visibility 的字典
+    """
+    lines = []
+    for i, coord in enumerate(landmarks):
+        body_part = BODY_PARTS.get(i, f"未知点{i}")
+        lines.append(f"{body_part}: x={coord['x']:.4f}, y={coord['y']:.4f}, z={coord['z']:.4f}, v={coord['visibility']:.4f}\n")
+    return ''.join(lines)
+
+
+def coordinates_to_frame(landmarks):
+    """将33个包含 x, y, z, visibility 的字典转换为与 parse_frame_file 相同格式的帧数据"""
+    return {
+        BODY_PARTS.get(i, f"未知点{i}"): {'x': coord['x'], 'y': coord['y'], 'z': coord['z'], 'v': coord['visibility']}
+        for i, coord in enumerate(landmarks)
+    }
+
+
+# 沿用关键点的标记行前缀（不含 ':'，解析时被忽略）
+CARRIED_OVER_MARK = '# carried_over from frame'
+
+
+def write_frame_file(filename, landmarks, carried_over_from=None):
+    """
+    保存一帧关键点数据
+    carried_over_from: 该帧未做检测、沿用了第 N 帧的检测结果时传入 N，文件首行写入标记
+    """
+    with open(filename, 'w', encoding='utf-8') as f:
+        if carried_over_from is not None:
+            f.write(f"{CARRIED_OVER_MARK} {carried_over_from}\n")
+        f.write(format_landmarks(landmarks))
+
+
+def read_carried_over(file_path):
+    """返回帧文件沿用的源帧号，实际检测的帧返回 None"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        first_line = f.readline()
+    if first_line.startswith(CARRIED_OVER_MARK):
+        return int(first_line[len(CARRIED_OVER_MARK):])
+    return None
+
+
+def parse_frame_lines(lines, verbose=True):
+    """解析关键点文本行，返回 {部位名: {'x', 'y', 'z', 'v'}}"""
+    frame_data = {}
+    for line in lines:
+        if ':' not in line:
+            continue
+
+        try:
+            key, value_str = line.strip().split(': ')
+            values = {}
+
+            for item in value_str.split(', '):
+                coord, val = item.split('=')
+                values[coord] = float(val)
+
+            frame_data[key] = values
+        except Exception as e:
+            if verbose:
+                print(f"解析错误 - 行: {line.strip()}")
+                print(f"错误信息: {str(e)}")
+    return frame_data
+
+
+def parse_frame_file(file_path, verbose=True):
+    """读取一个 frame_N.txt 文件"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return parse_frame_lines(f, verbose)
+
+
+def parse_frame_number(filename, prefix='frame_', suffix='.txt'):
+    """从 frame_N.txt 格式的文件名中提取帧号，不匹配时返回None"""
+    if not (filename.startswith(prefix) and filename.endswith(suffix)):
+        return None
+    try:
+        return int(filename[len(prefix):len(filename) - len(suffix)])
+    except ValueError:
+        return None
+
+
+def list_frame_files(output_folder, verbose=False):
+    """列出文件夹中的帧数据文件，返回按帧号排序的 [(帧号, 文件名)]"""
+    frame_files = []
+    for f in os.listdir(output_folder):
+        frame_num = parse_frame_number(f)
+        if frame_num is not None:
+            frame_files.append((frame_num, f))
+            if verbose:
+                print(f"找到文件: {f}")
+        elif verbose and f.startswith('frame_') and f.endswith('.txt'):
+            print(f"跳过文件 {f}: 无法解析帧号")
+
+    frame_files.sort(key=lambda x: x[0])
+    return frame_files
+
+
+def load_landmark_sequence(output_folder, verbose=False):
+    """加载文件夹中的全部帧，返回按帧号排序的 [(帧号, 帧数据)]"""
+    sequence = []
+    for frame_num, frame_file in list_frame_files(output_folder):
+        file_path = os.path.join(output_folder, frame_file)
+        sequence.append((frame_num, parse_frame_file(file_path, verbose)))
+    return sequence
+
+
+def frames_to_array(frame_sequence):
+    """
+    将帧数据列表转换为 (帧数, 33, 4) 的 float32 数组，分量顺序为 x, y, z, v
+    缺失的关键点填充为 NaN
+    """
+    array = np.full((len(frame_sequence), len(BODY_PARTS), len(LANDMARK_FIELDS)), np.nan, dtype=np.float32)
+    for i, frame_data in enumerate(frame_sequence):
+        for body_part, coord in frame_data.items():
+            index = PART_INDEX.get(body_part)
+            if index is None:
+                continue
+            array[i, index] = [coord.get(field, np.nan) for field in LANDMARK_FIELDS]
+    return array
+
+
+def array_to_frame(frame_array):
+    """将 (33, 4) 数组还原为与 parse_frame_file 相同格式的帧数据，跳过 NaN 关键点"""
+    frame_data = {}
+    for index, values in enumerate(frame_array):
+        if np.isnan(values[0]):
+            continue
+        frame_data[BODY_PARTS[index]] = {
+            field: float(value) for field, value in zip(LANDMARK_FIELDS, values)
+        }
+    return frame_data
+
+
+def array_to_frames(array):
+    """将 (帧数, 33, 4) 数组还原为帧数据列表"""
+    return [array_to_frame(frame_array) for frame_array in array]
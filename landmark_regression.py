@@ -0,0 +1,213 @@
+import sys
+import json
+import warnings
+import argparse
+import numpy as np
+from landmark_io import BODY_PARTS, frames_to_array, load_landmark_sequence
+"""
+关键点回归检查（金标准对比）
+对 PoseDetector 做提速优化（降低模型复杂度、ROI裁剪、跳帧等）后，
+将优化后的整段关键点序列与基准序列（golden）逐帧逐点向量化比较：
+- 每个关键点、每帧的误差统计（x/y 平面欧氏距离，归一化坐标）
+- 以两侧可见度较小值加权的误差
+- analyze_sequence 的关键帧和得分、score_sequence 总分是否变化
+任一指标超过容差即判定失败
+"""
+
+# 默认容差
+DEFAULT_TOLERANCES = {
+    'mean_error': 0.01,             # 全部关键点平均误差
+    'p95_error': 0.03,              # 95分位误差
+    'max_frame_error': 0.08,        # 单帧平均误差的最大值
+    'weighted_error': 0.01,         # 可见度加权平均误差
+    'missing_frames': 0,            # 一侧有、另一侧缺失的帧数
+    'key_frame_changes': 0,         # 关键帧新增+消失的数量
+    'key_frame_score_delta': 2.0,   # 相同关键帧的单帧得分最大变化
+    'total_score_delta': 0.0        # 套路总分变化
+}
+
+
+def align_sequences(baseline_folder, candidate_folder):
+    """
+    按帧号对齐两个文件夹的关键点序列
+    返回 (共同帧号, 基准数组, 待测数组, 仅一侧存在的帧号, 基准帧序列, 待测帧序列)
+    帧序列只包含共同帧，与共同帧号一一对应
+    """
+    baseline = load_landmark_sequence(baseline_folder)
+    candidate = load_landmark_sequence(candidate_folder)
+
+    baseline_frames = dict(baseline)
+    candidate_frames = dict(candidate)
+    common = sorted(set(baseline_frames) & set(candidate_frames))
+    missing = sorted(set(baseline_frames) ^ set(candidate_frames))
+
+    baseline_sequence = [baseline_frames[n] for n in common]
+    candidate_sequence = [candidate_frames[n] for n in common]
+    return (common, frames_to_array(baseline_sequence), frames_to_array(candidate_sequence), missing,
+            baseline_sequence, candidate_sequence)
+
+
+def landmark_error_stats(baseline_array, candidate_array):
+    """
+    向量化计算误差统计
+    输入为 (帧数, 33, 4) 数组，返回逐关键点、逐帧和总体统计
+    """
+    diff = candidate_array[:, :, :2] - baseline_array[:, :, :2]
+    error = np.sqrt(np.sum(diff * diff, axis=2))  # (帧数, 33)
+    valid = ~np.isnan(error)
+
+    # 可见度权重取两侧较小值，缺失点权重为0
+    weight = np.fmin(baseline_array[:, :, 3], candidate_array[:, :, 3])
+    weight = np.where(valid, np.nan_to_num(weight), 0.0)
+    error_filled = np.where(valid, error, 0.0)
+
+    if not valid.any():
+        raise ValueError("没有可比较的关键点")
+
+    # 整列/整行缺失时 nanmean 会给出空切片警告，结果为 NaN 即可
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        per_joint_mean = np.nanmean(error, axis=0)
+        per_joint_max = np.nanmax(error, axis=0)
+        per_frame_mean = np.nanmean(error, axis=1)
+        per_frame_max = np.nanmax(error, axis=1)
+
+    weight_sum = weight.sum()
+    per_joint = {
+        BODY_PARTS[i]: {'mean': float(per_joint_mean[i]), 'max': float(per_joint_max[i])}
+        for i in range(error.shape[1])
+    }
+    worst_frame = int(np.nanargmax(per_frame_mean))
+
+    return {
+        'mean_error': float(np.nanmean(error)),
+        'p95_error': float(np.nanpercentile(error, 95)),
+        'max_error': float(np.nanmax(error)),
+        'weighted_error': float((weight * error_filled).sum() / weight_sum) if weight_sum > 0 else 0.0,
+        'max_frame_error': float(per_frame_mean[worst_frame]),
+        'worst_frame_position': worst_frame,
+        'per_joint': per_joint,
+        'per_frame_mean': per_frame_mean,
+        'per_frame_max': per_frame_max
+    }
+
+
+def compare_analysis(baseline_sequence, candidate_sequence, frame_numbers=None):
+    """
+    比较两个序列的弹腿关键帧、单帧得分和套路总分
+    两个序列须逐帧对齐（align_sequences 给出的共同帧），缺帧由 missing_frames 单独统计，
+    否则缺一帧会使其后的全部关键帧错位
+    frame_numbers: 序列下标对应的视频帧号，提供时关键帧按帧号报告
+    """
+    from pose_analysis_tantui import PoseAnalyzer_tantui
+    from score_tantuidengtui import TanTuiDengTuiScorer
+
+    results = []
+    for frame_sequence in (baseline_sequence, candidate_sequence):
+        analysis_result = PoseAnalyzer_tantui().analyze_sequence(frame_sequence)
+        score_result = TanTuiDengTuiScorer().score_sequence(analysis_result, frame_sequence)
+        results.append((analysis_result, score_result))
+    (baseline_analysis, baseline_score), (candidate_analysis, candidate_score) = results
+
+    if frame_numbers is None:
+        frame_numbers = range(len(baseline_sequence))
+    baseline_key_frames = {frame_numbers[idx] for idx in baseline_analysis['key_frames']}
+    candidate_key_frames = {frame_numbers[idx] for idx in candidate_analysis['key_frames']}
+    baseline_scores = {frame_numbers[s['frame_index']]: s['score'] for s in baseline_analysis['scores']}
+    candidate_scores = {frame_numbers[s['frame_index']]: s['score'] for s in candidate_analysis['scores']}
+    score_deltas = {idx: candidate_scores[idx] - baseline_scores[idx]
+                    for idx in baseline_key_frames & candidate_key_frames}
+
+    return {
+        'added_key_frames': sorted(candidate_key_frames - baseline_key_frames),
+        'removed_key_frames': sorted(baseline_key_frames - candidate_key_frames),
+        'key_frame_changes': len(baseline_key_frames ^ candidate_key_frames),
+        'key_frame_score_delta': max((abs(d) for d in score_deltas.values()), default=0.0),
+        'baseline_total_score': baseline_score['score'],
+        'candidate_total_score': candidate_score['score'],
+        'total_score_delta': abs(candidate_score['score'] - baseline_score['score'])
+    }
+
+
+def run_regression(baseline_folder, candidate_folder, tolerances=None):
+    """
+    执行回归检查，返回报告字典，report['passed'] 表示是否在容差范围内
+    """
+    tolerances = dict(DEFAULT_TOLERANCES, **(tolerances or {}))
+
+    common, baseline_array, candidate_array, missing, baseline_sequence, candidate_sequence = \
+        align_sequences(baseline_folder, candidate_folder)
+    if not common:
+        raise ValueError("两个序列没有共同的帧")
+
+    stats = landmark_error_stats(baseline_array, candidate_array)
+    analysis = compare_analysis(baseline_sequence, candidate_sequence, common)
+
+    metrics = {
+        'mean_error': stats['mean_error'],
+        'p95_error': stats['p95_error'],
+        'max_frame_error': stats['max_frame_error'],
+        'weighted_error': stats['weighted_error'],
+        'missing_frames': len(missing),
+        'key_frame_changes': analysis['key_frame_changes'],
+        'key_frame_score_delta': analysis['key_frame_score_delta'],
+        'total_score_delta': analysis['total_score_delta']
+    }
+    failures = [
+        {'metric': name, 'value': value, 'tolerance': tolerances[name]}
+        for name, value in metrics.items() if value > tolerances[name]
+    ]
+
+    return {
+        'passed': not failures,
+        'failures': failures,
+        'metrics': metrics,
+        'compared_frames': len(common),
+        'missing_frame_numbers': missing,
+        'worst_frame': common[stats['worst_frame_position']],
+        'per_joint': stats['per_joint'],
+        'analysis': analysis
+    }
+
+
+def print_report(report, top_joints=5):
+    print(f"比较帧数: {report['compared_frames']}，缺失帧数: {report['metrics']['missing_frames']}")
+    for name, value in report['metrics'].items():
+        print(f"  {name}: {value:.4f}" if isinstance(value, float) else f"  {name}: {value}")
+    print(f"误差最大的帧: {report['worst_frame']}")
+
+    worst_joints = sorted(report['per_joint'].items(), key=lambda item: -np.nan_to_num(item[1]['mean']))
+    print(f"误差最大的 {top_joints} 个关键点:")
+    for body_part, joint_stats in worst_joints[:top_joints]:
+        print(f"  {body_part}: 平均 {joint_stats['mean']:.4f}, 最大 {joint_stats['max']:.4f}")
+
+    analysis = report['analysis']
+    if analysis['added_key_frames'] or analysis['removed_key_frames']:
+        print(f"新增关键帧: {analysis['added_key_frames']}，消失关键帧: {analysis['removed_key_frames']}")
+
+    if report['passed']:
+        print("回归检查通过")
+    else:
+        print("回归检查失败:")
+        for failure in report['failures']:
+            print(f"  {failure['metric']} = {failure['value']:.4g} 超过容差 {failure['tolerance']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='比较两段关键点序列的精度差异')
+    parser.add_argument('baseline', help='基准帧数据文件夹（如 output1）')
+    parser.add_argument('candidate', help='待测帧数据文件夹')
+    parser.add_argument('--tolerances', help='容差配置 JSON 文件，覆盖默认值')
+    args = parser.parse_args()
+
+    tolerances = None
+    if args.tolerances:
+        with open(args.tolerances, 'r', encoding='utf-8') as f:
+            tolerances = json.load(f)
+
+    report = run_regression(args.baseline, args.candidate, tolerances)
+    print_report(report)
+    sys.exit(0 if report['passed'] else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+import os
+import json
+import sqlite3
+import numpy as np
+from landmark_io import BODY_PARTS, LANDMARK_FIELDS, frames_to_array, array_to_frames
+"""
+本地 SQLite 结果库
+保存训练场次、关键点数据块、analyze_sequence 的关键帧详情和 score_sequence 的扣分项，
+按 运动员 / 场次 / 动作 / 帧 建立索引，可直接查询，例如：
+    store.query_key_frames(move='tantui', since='2026-10-01', max_support_leg_angle=150)
+    store.query_deductions(athlete='张三', deduction_type='heel_lifted')
+
+关键点按 block_size 帧为一块，以 float32 (帧数, 33, 4) 二进制存储，写入全部在单个事务中批量完成
+写入结果时在同一事务中更新 progress_aggregates 的运动员进步汇总
+"""
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    athlete TEXT NOT NULL,
+    session_date TEXT NOT NULL,      -- ISO 日期 YYYY-MM-DD
+    source TEXT,                     -- 原始数据来源（如 output1 文件夹）
+    frame_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_athlete ON sessions (athlete, session_date);
+CREATE INDEX IF NOT EXISTS idx_sessions_date ON sessions (session_date);
+
+CREATE TABLE IF NOT EXISTS landmark_blocks (
+    session_id INTEGER NOT NULL REFERENCES sessions (id) ON DELETE CASCADE,
+    start_index INTEGER NOT NULL,    -- 块内第一帧的序列下标
+    frame_count INTEGER NOT NULL,
+    data BLOB NOT NULL,              -- float32 (frame_count, 33, 4)
+    PRIMARY KEY (session_id, start_index)
+);
+
+CREATE TABLE IF NOT EXISTS session_scores (
+    session_id INTEGER NOT NULL REFERENCES sessions (id) ON DELETE CASCADE,
+    move TEXT NOT NULL,
+    score REAL,
+    specs_deduction REAL,
+    error_deduction REAL,
+    PRIMARY KEY (session_id, move)
+);
+
+CREATE TABLE IF NOT EXISTS key_frames (
+    session_id INTEGER NOT NULL REFERENCES sessions (id) ON DELETE CASCADE,
+    move TEXT NOT NULL,
+    frame_index INTEGER NOT NULL,
+    score REAL,
+    support_leg TEXT,
+    support_leg_angle REAL,
+    kick_leg_angle REAL,
+    kick_height_ratio REAL,
+    is_heel_lifted INTEGER,
+    front_knee_angle REAL,
+    back_knee_angle REAL,
+    details TEXT,                    -- 完整详情 JSON
+    PRIMARY KEY (session_id, move, frame_index)
+);
+CREATE INDEX IF NOT EXISTS idx_key_frames_support ON key_frames (move, support_leg_angle);
+CREATE INDEX IF NOT EXISTS idx_key_frames_height ON key_frames (move, kick_height_ratio);
+
+CREATE TABLE IF NOT EXISTS deductions (
+    session_id INTEGER NOT NULL REFERENCES sessions (id) ON DELETE CASCADE,
+    move TEXT NOT NULL,
+    frame_index INTEGER NOT NULL,
+    category TEXT NOT NULL,          -- specs / errors / performance
+    type TEXT NOT NULL,
+    message TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_deductions_type ON deductions (type, session_id);
+CREATE INDEX IF NOT EXISTS idx_deductions_session ON deductions (session_id, move, frame_index);
+'''
+
+# key_frames 表中单独成列、可建索引查询的详情字段
+DETAIL_COLUMNS = ['support_leg_angle', 'kick_leg_angle', 'kick_height_ratio', 'is_heel_lifted',
+                  'front_knee_angle', 'back_knee_angle']
+
+
+class LandmarkStore:
+    def __init__(self, db_path='landmarks.db', block_size=256):
+        self.db_path = db_path
+        self.block_size = block_size
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('PRAGMA foreign_keys=ON')
+        self.conn.executescript(SCHEMA)
+
+        from progress_aggregates import ProgressAggregates
+        self.aggregates = ProgressAggregates(conn=self.conn)
+
+    def close(self):
+        self.conn.close()
+
+    def add_session(self, athlete, session_date, frame_sequence=None, source=None,
+                    results=None):
+        """
+        批量写入一个训练场次
+        frame_sequence: load_sequence_data 返回的帧数据列表（可选）
+        results: {动作名: (analysis_result, score_result或None)}（可选）
+        返回场次 id
+        """
+        with self.conn:
+            cursor = self.conn.execute(
+                'INSERT INTO sessions (athlete, session_date, source, frame_count) VALUES (?, ?, ?, ?)',
+                (athlete, session_date, source, len(frame_sequence) if frame_sequence else 0)
+            )
+            session_id = cursor.lastrowid
+
+            if frame_sequence:
+                self._insert_landmarks(session_id, frame_sequence)
+            for move, (analysis_result, score_result) in (results or {}).items():
+                self._insert_results(session_id, move, analysis_result, score_result)
+                self.aggregates.update(athlete, session_date, move, analysis_result, score_result)
+
+        return session_id
+
+    def add_results(self, session_id, move, analysis_result, score_result=None):
+        """
+        为已有场次追加一个动作的分析与评分结果
+        同一场次的同一动作只能写入一次：进步汇总是增量合并的，重复写入会被重复计数
+        """
+        session = self.conn.execute(
+            'SELECT athlete, session_date FROM sessions WHERE id = ?', (session_id,)
+        ).fetchone()
+        if session is None:
+            raise ValueError(f"场次不存在: {session_id}")
+        if self.has_results(session_id, move):
+            raise ValueError(f"场次 {session_id} 已有动作 {move} 的结果")
+        with self.conn:
+            self._insert_results(session_id, move, analysis_result, score_result)
+            self.aggregates.update(session['athlete'], session['session_date'], move,
+                                   analysis_result, score_result)
+
+    def has_results(self, session_id, move):
+        """场次是否已写入该动作的关键帧或评分"""
+        for table in ('key_frames', 'session_scores'):
+            row = self.conn.execute(
+                f'SELECT 1 FROM {table} WHERE session_id = ? AND move = ? LIMIT 1', (session_id, move)
+            ).fetchone()
+            if row is not None:
+                return True
+        return False
+
+    def _insert_landmarks(self, session_id, frame_sequence):
+        array = frames_to_array(frame_sequence)
+        rows = []
+        for start in range(0, len(array), self.block_size):
+            block = np.ascontiguousarray(array[start:start + self.block_size])
+            rows.append((session_id, start, len(block), block.tobytes()))
+        self.conn.executemany(
+            'INSERT INTO landmark_blocks (session_id, start_index, frame_count, data) VALUES (?, ?, ?, ?)',
+            rows
+        )
+
+    def _insert_results(self, session_id, move, analysis_result, score_result):
+        scores = {s['frame_index']: s for s in analysis_result['scores']}
+        key_frame_rows = []
+        for detail in analysis_result['details']:
+            score_info = scores.get(detail['frame_index'], {})
+            values = [detail.get(column) for column in DETAIL_COLUMNS]
+            values = [float(v) if v is not None else None for v in values]
+            key_frame_rows.append((
+                session_id, move, detail['frame_index'], float(score_info.get('score', 0)),
+                detail.get('support_leg', score_info.get('support_leg')),
+                *values,
+                json.dumps(detail, ensure_ascii=False, default=float)
+            ))
+        self.conn.executemany(
+            f'INSERT OR REPLACE INTO key_frames (session_id, move, frame_index, score, support_leg, '
+            f'{", ".join(DETAIL_COLUMNS)}, details) VALUES ({", ".join("?" * (len(DETAIL_COLUMNS) + 6))})',
+            key_frame_rows
+        )
+
+        if score_result is None:
+            return
+
+        self.conn.execute(
+            'INSERT OR REPLACE INTO session_scores (session_id, move, score, specs_deduction, error_deduction) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (session_id, move, score_result['score'],
+             score_result['details']['specs_deduction'], score_result['details']['error_deduction'])
+        )
+        deduction_rows = []
+        for category, items in score_result['deductions'].items():
+            for item in items:
+                deduction_rows.append((session_id, move, item['frame'], category,
+                                       item['type'], item.get('message')))
+        self.conn.executemany(
+            'INSERT INTO deductions (session_id, move, frame_index, category, type, message) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            deduction_rows
+        )
+
+    def load_landmarks(self, session_id, start=0, stop=None):
+        """读取场次的关键点，返回帧下标 [start, stop) 的 (帧数, 33, 4) 数组"""
+        query = 'SELECT start_index, frame_count, data FROM landmark_blocks WHERE session_id = ? ' \
+                'AND start_index + frame_count > ?'
+        params = [session_id, start]
+        if stop is not None:
+            query += ' AND start_index < ?'
+            params.append(stop)
+        query += ' ORDER BY start_index'
+
+        blocks = []
+        first_index = None
+        for row in self.conn.execute(query, params):
+            block = np.frombuffer(row['data'], dtype=np.float32).reshape(
+                row['frame_count'], len(BODY_PARTS), len(LANDMARK_FIELDS))
+            if first_index is None:
+                first_index = row['start_index']
+            blocks.append(block)
+
+        if not blocks:
+            return np.empty((0, len(BODY_PARTS), len(LANDMARK_FIELDS)), dtype=np.float32)
+        array = np.concatenate(blocks)
+        offset = start - first_index
+        end = None if stop is None else stop - first_index
+        return array[offset:end]
+
+    def load_frame_sequence(self, session_id, start=0, stop=None):
+        """读取场次的关键点，返回与 load_sequence_data 相同格式的帧数据列表"""
+        return array_to_frames(self.load_landmarks(session_id, start, stop))
+
+    def query_sessions(self, athlete=None, since=None, until=None):
+        """按运动员和日期范围查询场次"""
+        where, params = self._session_filter(athlete, since, until)
+        query = 'SELECT * FROM sessions s' + (' WHERE ' + ' AND '.join(where) if where else '')
+        return [dict(row) for row in self.conn.execute(query + ' ORDER BY s.session_date', params)]
+
+    def query_key_frames(self, move=None, athlete=None, since=None, until=None,
+                         min_support_leg_angle=None, max_support_leg_angle=None,
+                         min_kick_height_ratio=None, max_kick_height_ratio=None):
+        """
+        查询关键帧详情（日期范围为闭区间，ISO 日期字符串）
+        例：本月支撑腿角度小于150度的弹腿关键帧
+            query_key_frames(move='tantui', since='2026-10-01', max_support_leg_angle=150)
+        """
+        where, params = self._session_filter(athlete, since, until)
+        if move is not None:
+            where.append('k.move = ?')
+            params.append(move)
+        for column, op, value in (('support_leg_angle', '>=', min_support_leg_angle),
+                                  ('support_leg_angle', '<', max_support_leg_angle),
+                                  ('kick_height_ratio', '>=', min_kick_height_ratio),
+                                  ('kick_height_ratio', '<', max_kick_height_ratio)):
+            if value is not None:
+                where.append(f'k.{column} {op} ?')
+                params.append(value)
+
+        query = 'SELECT s.athlete, s.session_date, k.* FROM key_frames k ' \
+                'JOIN sessions s ON s.id = k.session_id'
+        if where:
+            query += ' WHERE ' + ' AND '.join(where)
+        query += ' ORDER BY s.session_date, k.session_id, k.frame_index'
+        return [dict(row) for row in self.conn.execute(query, params)]
+
+    def query_deductions(self, athlete=None, deduction_type=None, move=None, since=None, until=None):
+        """
+        查询扣分项
+        例：运动员X的全部支撑脚跟离地扣分
+            query_deductions(athlete='X', deduction_type='heel_lifted')
+        """
+        where, params = self._session_filter(athlete, since, until)
+        for column, value in (('type', deduction_type), ('move', move)):
+            if value is not None:
+                where.append(f'd.{column} = ?')
+                params.append(value)
+
+        query = 'SELECT s.athlete, s.session_date, d.* FROM deductions d ' \
+                'JOIN sessions s ON s.id = d.session_id'
+        if where:
+            query += ' WHERE ' + ' AND '.join(where)
+        query += ' ORDER BY s.session_date, d.session_id, d.frame_index'
+        return [dict(row) for row in self.conn.execute(query, params)]
+
+    def _session_filter(self, athlete, since, until):
+        where, params = [], []
+        if athlete is not None:
+            where.append('s.athlete = ?')
+            params.append(athlete)
+        if since is not None:
+            where.append('s.session_date >= ?')
+            params.append(since)
+        if until is not None:
+            where.append('s.session_date <= ?')
+            params.append(until)
+        return where, params
+
+
+def main():
+    from datetime import date
+    from main import load_sequence_data
+    from pose_analysis_tantui import PoseAnalyzer_tantui
+    from score_tantuidengtui import TanTuiDengTuiScorer
+
+    output_folder = os.path.join(os.getcwd(), 'output1')
+    frame_sequence = load_sequence_data(output_folder, verbose=False)
+    analysis_result = PoseAnalyzer_tantui().analyze_sequence(frame_sequence)
+    score_result = TanTuiDengTuiScorer().score_sequence(analysis_result, frame_sequence)
+
+    store = LandmarkStore()
+    session_id = store.add_session('默认运动员', date.today().isoformat(), frame_sequence,
+                                   source=output_folder,
+                                   results={'tantui': (analysis_result, score_result)})
+    print(f"已保存场次 {session_id}")
+
+    for row in store.query_key_frames(move='tantui', max_support_leg_angle=170):
+        print(f"{row['session_date']} 帧 {row['frame_index']}: 支撑腿角度 {row['support_leg_angle']:.1f}")
+    store.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import copy
+import cv2
+import numpy as np
+from landmark_io import PART_INDEX
+"""
+光流关键点跟踪（实时模式）
+低配笔记本上 pose.process 跟不上 30 帧/秒，这里每 K 帧做一次完整检测，
+中间帧用金字塔 Lucas-Kanade 稀疏光流在灰度图上把 33 个关键点推到当前帧：
+- 前向-后向一致性检查：点跟到当前帧后再反向跟回上一帧，偏差超过阈值视为跟踪失败
+- 跟踪失败的点沿用上一位置（叠加成功点的平均位移），可见度衰减
+- 可跟踪点中成功比例过低，或腿部关键点平均可见度过低时，立即在当前帧重新检测
+这样关键点输出帧率与摄像头一致，而检测只在部分帧上进行
+"""
+
+# 判断是否需要重新检测时关注的腿部关键点
+LEG_INDICES = [PART_INDEX[name] for name in ('左髋', '右髋', '左膝', '右膝', '左踝', '右踝')]
+
+
+class FlowLandmarkTracker:
+    def __init__(self, detect_interval=3, min_visibility=0.5, min_tracked_ratio=0.7,
+                 max_fb_error=2.0, visibility_decay=0.5):
+        self.detect_interval = detect_interval        # 每隔多少帧做一次完整检测
+        self.min_visibility = min_visibility          # 可见度低于该值的点不跟踪；腿部平均可见度低于该值时重新检测
+        self.min_tracked_ratio = min_tracked_ratio    # 跟踪成功比例低于该值时重新检测
+        self.max_fb_error = max_fb_error              # 前向-后向误差阈值（像素）
+        self.visibility_decay = visibility_decay      # 跟踪失败的点每帧可见度乘以该系数
+        self.lk_params = dict(
+            winSize=(21, 21),
+            maxLevel=3,
+            criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03)
+        )
+        self.reset()
+
+    def reset(self):
+        self.pose_landmarks = None  # 当前关键点（LandmarkList，访问方式与 mediapipe 的 pose_landmarks 相同）
+        self.prev_gray = None
+        self.since_detection = 0
+        self.frames = 0
+        self.detections = 0
+        self.redetections = 0       # 因跟踪质量下降提前检测的次数
+
+    def update(self, frame, detect):
+        """
+        处理一帧，返回该帧的关键点（未检测到人时为 None）
+        detect: 回调函数，输入 BGR 帧，返回 pose_landmarks 或 None
+        """
+        self.frames += 1
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        tracked = None
+        if self.pose_landmarks is not None and self.since_detection < self.detect_interval - 1:
+            tracked = self._track(gray)
+            if tracked is None:
+                self.redetections += 1
+
+        if tracked is None:
+            self.pose_landmarks = detect(frame)
+            self.detections += 1
+            self.since_detection = 0
+        else:
+            self.pose_landmarks = tracked
+            self.since_detection += 1
+
+        self.prev_gray = gray
+        return self.pose_landmarks
+
+    def _track(self, gray):
+        """光流跟踪到当前帧，跟踪质量不足时返回 None"""
+        height, width = gray.shape
+        landmarks = self.pose_landmarks.landmark
+        points = np.array([[lm.x * width, lm.y * height] for lm in landmarks], dtype=np.float32)
+        visibility = np.array([lm.visibility for lm in landmarks])
+
+        candidates = (visibility >= self.min_visibility) \
+            & (points[:, 0] >= 0) & (points[:, 0] < width) & (points[:, 1] >= 0) & (points[:, 1] < height)
+        if not candidates.any():
+            return None
+
+        prev_points = points[candidates].reshape(-1, 1, 2)
+        next_points, status, _ = cv2.calcOpticalFlowPyrLK(self.prev_gray, gray, prev_points, None, **self.lk_params)
+        back_points, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, self.prev_gray, next_points, None, **self.lk_params)
+        fb_error = np.linalg.norm((back_points - prev_points).reshape(-1, 2), axis=1)
+        good = (status.ravel() == 1) & (back_status.ravel() == 1) & (fb_error < self.max_fb_error)
+
+        if good.mean() < self.min_tracked_ratio:
+            return None
+
+        # 成功的点取光流结果，其余点（含不跟踪的点）叠加成功点的平均位移
+        displacement = (next_points.reshape(-1, 2) - prev_points.reshape(-1, 2))[good].mean(axis=0)
+        new_points = points + displacement
+        candidate_indices = np.flatnonzero(candidates)
+        new_points[candidate_indices[good]] = next_points.reshape(-1, 2)[good]
+
+        failed = np.ones(len(points), dtype=bool)
+        failed[candidate_indices[good]] = False
+        new_visibility = np.where(failed, visibility * self.visibility_decay, visibility)
+        if new_visibility[LEG_INDICES].mean() < self.min_visibility:
+            return None
+
+        tracked = copy.deepcopy(self.pose_landmarks)
+        for lm, (x, y), v in zip(tracked.landmark, new_points, new_visibility):
+            lm.x = float(x / width)
+            lm.y = float(y / height)
+            lm.visibility = float(v)
+        return tracked
+
+    def stats(self):
+        return {
+            'tracked_frames': self.frames - self.detections,
+            'inferred_frames': self.detections,
+            'redetections': self.redetections,
+            'inference_ratio': self.detections / self.frames if self.frames else 0.0
+        }
@@ -1,76 +1,76 @@
 from pose_analysis_gongbu import PoseAnalyzer_gongbu
 from pose_analysis_tantui import PoseAnalyzer_tantui
 from score_tantuidengtui import TanTuiDengTuiScorer
+from landmark_io import list_frame_files, parse_frame_file
 import os
 import json
 
-def load_sequence_data(output_folder):
-    """加载整个序列的帧数据"""
+def load_sequence_data(output_folder, verbose=True):
+    """加载整个序列的帧数据
+    verbose: 是否打印逐文件的处理信息（批量处理时可关闭）
+    """
     frame_sequence = []
     
     # 打印当前工作目录和目标文件夹
-    print(f"当前工作目录: {os.getcwd()}")
-    print(f"要读取的文件夹: {os.path.abspath(output_folder)}")
+    if verbose:
+        print(f"当前工作目录: {os.getcwd()}")
+        print(f"要读取的文件夹: {os.path.abspath(output_folder)}")
     
     # 检查文件夹是否存在
     if not os.path.exists(output_folder):
         raise FileNotFoundError(f"文件夹不存在: {output_folder}")
     
-    # 修改文件匹配模式
-    frame_files = []
-    for f in os.listdir(output_folder):
-        try:
-            # 修改为匹配 frame_0.txt 格式
-            if f.startswith('frame_') and f.endswith('.txt'):
-                frame_num = int(f[6:-4])  # 提取frame_X.txt中的X
-                frame_files.append((frame_num, f))
-                print(f"找到文件: {f}")
-        except ValueError as e:
-            print(f"跳过文件 {f}: {str(e)}")
+    # 查找 frame_X.txt 格式的文件（已按帧号排序）
+    frame_files = list_frame_files(output_folder, verbose=verbose)
     
     if not frame_files:
         raise ValueError(f"在 {output_folder} 中没有找到帧数据文件")
     
-    # 按帧号排序
-    frame_files.sort(key=lambda x: x[0])
-    print(f"\n找到 {len(frame_files)} 个帧文件")
-
-
+    if verbose:
+        print(f"\n找到 {len(frame_files)} 个帧文件")
     
     # 处理每个帧文件
     for frame_num, frame_file in frame_files:
         try:
             file_path = os.path.join(output_folder, frame_file)
-            print(f"处理: {frame_file}")
-            
-            with open(file_path, 'r', encoding='utf-8') as f:
-                frame_data = {}
-                for line in f:
-                    if ':' not in line:
-                        continue
-                    
-                    try:
-                        key, value_str = line.strip().split(': ')
-                        values = {}
-                        
-                        for item in value_str.split(', '):
-                            coord, val = item.split('=')
-                            values[coord] = float(val)
-                            
-                        frame_data[key] = values
-                    except Exception as e:
-                        print(f"解析错误 - 行: {line.strip()}")
-                        print(f"错误信息: {str(e)}")
-                
-                frame_sequence.append(frame_data)
+            if verbose:
+                print(f"处理: {frame_file}")
+            frame_sequence.append(parse_frame_file(file_path, verbose))
                 
         except Exception as e:
             print(f"处理文件失败: {frame_file}")
             print(f"错误信息: {str(e)}")
     
-    print(f"成功加载 {len(frame_sequence)} 帧数据")
+    if verbose:
+        print(f"成功加载 {len(frame_sequence)} 帧数据")
     return frame_sequence
 
+def iter_sequence_data(output_folder, verbose=False):
+    """按帧号顺序逐帧读取序列数据（生成器），内存中只保留当前帧
+    output_folder 也可以是 landmark_archive 生成的 .lmk 归档文件，按块解压读取
+    """
+    if not os.path.exists(output_folder):
+        raise FileNotFoundError(f"文件夹不存在: {output_folder}")
+
+    if os.path.isfile(output_folder):
+        from landmark_archive import LandmarkArchive
+        with LandmarkArchive(output_folder) as archive:
+            for _, frame_data in archive.iter_frames():
+                yield frame_data
+        return
+    
+    frame_files = list_frame_files(output_folder)
+    if not frame_files:
+        raise ValueError(f"在 {output_folder} 中没有找到帧数据文件")
+    
+    for frame_num, frame_file in frame_files:
+        file_path = os.path.join(output_folder, frame_file)
+        try:
+            yield parse_frame_file(file_path, verbose)
+        except Exception as e:
+            print(f"处理文件失败: {frame_file}")
+            print(f"错误信息: {str(e)}")
+
 def main():
     try:
         # 创建分析器实例
@@ -0,0 +1,87 @@
+import time
+import numpy as np
+"""
+运动门控：跳过静止帧的姿态检测
+训练录像中踢腿之间的站立、弓步保持等静止片段，连续多帧画面几乎不变，
+这些帧的关键点与上一次检测结果相同，没必要每帧都调用 pose.process
+
+做法：
+1. 把帧缩小为很小的灰度图（默认 64x36），计算与"上一次实际检测的帧"的平均绝对差
+   （与上次检测帧比较而不是与前一帧比较，缓慢移动不会被逐帧累积漏掉）
+2. 差异低于阈值时沿用上一次的关键点，帧文件中标记为 carried_over
+3. 距上次实际检测超过 max_interval 帧时强制检测一次，避免长时间不更新
+"""
+
+class MotionGate:
+    def __init__(self, threshold=3.0, max_interval=15, size=(64, 36)):
+        self.threshold = threshold          # 平均灰度差阈值（0-255）
+        self.max_interval = max_interval    # 最多连续沿用的帧数
+        self.size = size                    # 比较用缩略图尺寸 (宽, 高)
+        self.reset()
+
+    def reset(self):
+        self.reference = None       # 上一次实际检测帧的缩略图
+        self.reference_frame = None # 上一次实际检测的帧号
+        self.since_inference = 0
+        self.frames = 0
+        self.skipped = 0
+        self.gate_seconds = 0.0
+        self.inference_seconds = 0.0
+
+    def _thumbnail(self, frame):
+        import cv2
+
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small.astype(np.int16)
+
+    def should_infer(self, frame, frame_number):
+        """
+        判断该帧是否需要实际检测
+        返回 True 时本帧成为新的参考帧；返回 False 时调用方应沿用 reference_frame 的结果
+        """
+        start = time.perf_counter()
+        self.frames += 1
+        thumbnail = self._thumbnail(frame)
+
+        infer = (self.reference is None
+                 or self.since_inference >= self.max_interval
+                 or float(np.mean(np.abs(thumbnail - self.reference))) >= self.threshold)
+        if infer:
+            self.reference = thumbnail
+            self.reference_frame = frame_number
+            self.since_inference = 0
+        else:
+            self.since_inference += 1
+            self.skipped += 1
+
+        self.gate_seconds += time.perf_counter() - start
+        return infer
+
+    def record_inference(self, seconds):
+        """记录一次实际检测的耗时，用于估算加速比"""
+        self.inference_seconds += seconds
+
+    def report(self):
+        """统计跳过比例和加速比（按平均检测耗时估算全部帧都检测所需的时间）"""
+        inferred = self.frames - self.skipped
+        skip_ratio = self.skipped / self.frames if self.frames else 0.0
+        speedup = 1.0
+        if inferred and self.inference_seconds > 0:
+            full_seconds = self.inference_seconds / inferred * self.frames
+            speedup = full_seconds / (self.inference_seconds + self.gate_seconds)
+        return {
+            'frames': self.frames,
+            'skipped': self.skipped,
+            'skip_ratio': skip_ratio,
+            'inference_seconds': self.inference_seconds,
+            'gate_seconds': self.gate_seconds,
+            'speedup': speedup
+        }
+
+    def print_report(self):
+        report = self.report()
+        print(f"运动门控: 共 {report['frames']} 帧，跳过 {report['skipped']} 帧 "
+              f"({report['skip_ratio'] * 100:.1f}%)，检测部分加速 {report['speedup']:.2f}x")
+        return report
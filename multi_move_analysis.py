@@ -0,0 +1,141 @@
+import os
+import json
+import numpy as np
+from pose_analysis_gongbu import PoseAnalyzer_gongbu
+from pose_analysis_tantui import PoseAnalyzer_tantui
+from score_tantuidengtui import TanTuiDengTuiScorer
+
+# 各动作判定共用的腿部关键点
+LEG_POINTS = ['左髋', '右髋', '左膝', '右膝', '左踝', '右踝']
+
+
+def _knee_angle(hip, knee, ankle):
+    """计算髋-膝-踝形成的膝关节角度（与分析器中的计算方式一致，点重合时为 NaN）"""
+    a = np.array([hip['x'], hip['y'], hip.get('z', 0)])
+    b = np.array([knee['x'], knee['y'], knee.get('z', 0)])
+    c = np.array([ankle['x'], ankle['y'], ankle.get('z', 0)])
+
+    ba = a - b
+    bc = c - b
+    norm = np.linalg.norm(ba) * np.linalg.norm(bc)
+    if norm == 0:
+        return np.nan
+
+    cosine_angle = np.clip(np.dot(ba, bc) / norm, -1.0, 1.0)
+    return np.degrees(np.arccos(cosine_angle))
+
+
+def compute_frame_features(frame_data):
+    """
+    计算一帧中各动作判定共用的特征，每帧只计算一次
+    缺少腿部关键点时返回None（所有动作都不会判定为关键帧）
+    """
+    if not all(frame_data.get(point) for point in LEG_POINTS):
+        return None
+
+    return {
+        'left_knee_angle': _knee_angle(frame_data['左髋'], frame_data['左膝'], frame_data['左踝']),
+        'right_knee_angle': _knee_angle(frame_data['右髋'], frame_data['右膝'], frame_data['右踝'])
+    }
+
+
+class MultiMoveAnalyzer:
+    """
+    多动作联合分析引擎
+    对同一序列只遍历一次，所有已注册动作共享已加载的帧数据与公共特征，
+    每个动作返回一份与其 analyze_sequence 相同格式的结果
+
+    注册的分析器需提供 reset_detection / update_key_frame / build_analysis_result，
+    新动作（如蹬腿）按相同接口实现后调用 register 即可加入
+    """
+
+    def __init__(self, register_defaults=True):
+        self.moves = {}  # 动作名 -> {'analyzer': ..., 'scorer': ...}
+
+        if register_defaults:
+            self.register('tantui', PoseAnalyzer_tantui(), TanTuiDengTuiScorer())
+            self.register('gongbu', PoseAnalyzer_gongbu())
+
+    def register(self, name, analyzer, scorer=None):
+        """注册一个动作的分析器，scorer 为可选的套路评分器"""
+        if name in self.moves:
+            raise ValueError(f"动作已注册: {name}")
+        self.moves[name] = {
+            'analyzer': analyzer,
+            'scorer': scorer
+        }
+
+    def analyze_sequence(self, frame_sequence):
+        """
+        单次遍历分析所有已注册动作
+        返回 {动作名: {'analysis': 分析结果, 'score': 评分结果或None}}
+        """
+        key_frames = {name: [] for name in self.moves}
+        features = []
+
+        for move in self.moves.values():
+            move['analyzer'].reset_detection()
+
+        for i, frame_data in enumerate(frame_sequence):
+            # 公共特征每帧只计算一次，供所有动作复用
+            features.append(compute_frame_features(frame_data))
+            if features[i] is None:
+                # 缺少腿部关键点的帧对所有动作都不成立，按原逻辑重置连续计数
+                for move in self.moves.values():
+                    analyzer = move['analyzer']
+                    if i - analyzer.last_key_frame >= analyzer.min_frame_interval:
+                        analyzer.potential_key_frame_count = 0
+                continue
+
+            for name, move in self.moves.items():
+                if getattr(move['analyzer'], 'key_frame_mode', 'consecutive') == 'peak':
+                    continue
+                best_frame_idx = move['analyzer'].update_key_frame(i, frame_sequence, features)
+                if best_frame_idx is not None and best_frame_idx not in key_frames[name]:
+                    key_frames[name].append(best_frame_idx)
+
+        results = {}
+        for name, move in self.moves.items():
+            analyzer = move['analyzer']
+            if getattr(analyzer, 'key_frame_mode', 'consecutive') == 'peak':
+                # 峰值检测需要整段高度曲线，不参与逐帧检测
+                key_frames[name] = analyzer.detect_key_frames(frame_sequence)
+            analysis_result = analyzer.build_analysis_result(frame_sequence, key_frames[name])
+            score_result = None
+            if move['scorer'] is not None:
+                score_result = move['scorer'].score_sequence(analysis_result, frame_sequence)
+            results[name] = {
+                'analysis': analysis_result,
+                'score': score_result
+            }
+
+        return results
+
+
+def main():
+    from main import load_sequence_data
+
+    try:
+        engine = MultiMoveAnalyzer()
+        output_folder = os.path.join(os.getcwd(), 'output1')
+        frame_sequence = load_sequence_data(output_folder)
+
+        if frame_sequence:
+            results = engine.analyze_sequence(frame_sequence)
+
+            for name, result in results.items():
+                print(f"\n=== {name} ===")
+                for score_info in result['analysis']['scores']:
+                    print(f"帧 {score_info['frame_index']}: 得分 {score_info['score']:.2f}")
+                if result['score'] is not None:
+                    print(f"总分: {result['score']['score']:.1f}")
+
+                # 每个动作单独保存结果
+                with open(f'analysis_result_{name}.json', 'w', encoding='utf-8') as f:
+                    json.dump(result['analysis'], f, ensure_ascii=False, indent=2)
+
+    except Exception as e:
+        print(f"程序执行出错: {str(e)}")
+
+if __name__ == "__main__":
+    main()
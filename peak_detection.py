@@ -0,0 +1,83 @@
+import numpy as np
+"""
+一维信号峰值检测（线性时间）
+用于在整段序列中寻找踢腿脚踝高度的局部最高点：
+1. 一次扫描找出局部极大值（平台取中点）
+2. 单调栈一次正向、一次反向扫描求每个点左右两侧的基准最低点，得到突出度(prominence)
+3. 按最小间隔筛选：间隔内只保留最高的峰
+"""
+
+def _side_bases(values):
+    """
+    对每个点求其左侧基准：从左侧最近的更高点（不含）到该点之间的最小值，
+    左侧没有更高点时取到序列开头。单调栈实现，O(n)
+    """
+    bases = np.empty(len(values))
+    stack = []  # (索引, 该索引与栈中前一元素之间区间的最小值)
+    for i, value in enumerate(values):
+        segment_min = value
+        while stack and values[stack[-1][0]] <= value:
+            segment_min = min(segment_min, stack.pop()[1])
+        bases[i] = segment_min
+        stack.append((i, segment_min))
+    return bases
+
+
+def find_local_maxima(values):
+    """找出局部极大值的索引，连续相等的平台取中点"""
+    peaks = []
+    n = len(values)
+    i = 1
+    while i < n - 1:
+        if values[i] > values[i - 1]:
+            # 跳过平台
+            j = i
+            while j + 1 < n and values[j + 1] == values[i]:
+                j += 1
+            if j + 1 < n and values[j + 1] < values[i]:
+                peaks.append((i + j) // 2)
+            i = j + 1
+        else:
+            i += 1
+    return peaks
+
+
+def peak_prominences(values):
+    """计算每个点的突出度：高度减去左右两侧基准中较高的一个"""
+    left = _side_bases(values)
+    right = _side_bases(values[::-1])[::-1]
+    return values - np.maximum(left, right)
+
+
+def find_peaks(signal, prominence=0.0, distance=1):
+    """
+    寻找峰值
+    signal: 一维数组，NaN 视为最低值
+    prominence: 最小突出度
+    distance: 两个峰之间的最小间隔（帧），间隔内优先保留更高的峰
+    返回按索引升序排列的峰值索引列表
+    """
+    values = np.asarray(signal, dtype=float)
+    if len(values) < 3 or np.all(np.isnan(values)):
+        return []
+    values = np.where(np.isnan(values), np.nanmin(values), values)
+
+    peaks = find_local_maxima(values)
+    if not peaks:
+        return []
+
+    prominences = peak_prominences(values)
+    peaks = [p for p in peaks if prominences[p] >= prominence]
+
+    if distance > 1 and len(peaks) > 1:
+        # 峰值数量远小于帧数，这里按高度排序筛选
+        kept = []
+        occupied = np.zeros(len(values), dtype=bool)
+        for p in sorted(peaks, key=lambda p: -values[p]):
+            if occupied[p]:
+                continue
+            kept.append(p)
+            occupied[max(0, p - distance + 1):p + distance] = True
+        peaks = sorted(kept)
+
+    return peaks
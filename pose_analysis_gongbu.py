@@ -1,5 +1,111 @@
 import numpy as np
 import math
+from collections import deque
+
+# 稳定性（位置抖动）统计的关键点
+STABILITY_POINTS = ['左髋', '右髋', '左膝', '右膝', '左踝', '右踝']
+
+
+def _stability_points(frame_data):
+    """一帧中髋、膝、踝的 (x, y) 位置、是否存在，以及腿长（两侧髋到踝距离的平均，缺失时为 NaN）"""
+    positions = np.zeros((len(STABILITY_POINTS), 2))
+    valid = np.zeros(len(STABILITY_POINTS), dtype=bool)
+    for k, name in enumerate(STABILITY_POINTS):
+        point = frame_data.get(name)
+        if point:
+            positions[k] = (point['x'], point['y'])
+            valid[k] = True
+
+    legs = [np.linalg.norm(positions[hip] - positions[ankle])
+            for hip, ankle in ((0, 4), (1, 5)) if valid[hip] and valid[ankle]]
+    leg_length = float(np.mean(legs)) if legs else np.nan
+    return positions, valid, leg_length
+
+
+def _jitter_from_sums(count, total, total_sq, leg_total, leg_count):
+    """
+    由窗口内的累计量计算抖动：各关键点位置标准差的平均 / 平均腿长
+    count: (..., 点数)；total, total_sq: (..., 点数, 2)；leg_total, leg_count: (...)
+    窗口内可用数据不足时为 NaN
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / count[..., None]
+        variance = np.maximum(total_sq / count[..., None] - mean ** 2, 0).sum(axis=-1)
+        spread = np.where(count >= 2, np.sqrt(variance), np.nan)
+        usable = (count >= 2).sum(axis=-1)
+        spread_mean = np.where(usable > 0, np.nansum(spread, axis=-1) / usable, np.nan)
+        return spread_mean / (leg_total / leg_count)
+
+
+def rolling_stability(frame_sequence, window=15):
+    """
+    整个序列每帧的位置抖动（以该帧结尾、长度为 window 的窗口）
+    使用累计和计算滚动方差，每帧代价与窗口大小无关；返回长度与序列相同的数组，数据不足处为 NaN
+    """
+    n = len(frame_sequence)
+    positions = np.zeros((n, len(STABILITY_POINTS), 2))
+    valid = np.zeros((n, len(STABILITY_POINTS)), dtype=bool)
+    leg_length = np.full(n, np.nan)
+    for i, frame_data in enumerate(frame_sequence):
+        positions[i], valid[i], leg_length[i] = _stability_points(frame_data)
+
+    # 减去整体均值后再累加，减小长序列累计平方和的舍入误差
+    if valid.any():
+        positions = positions - positions[valid].mean(axis=0)
+    positions[~valid] = 0
+    leg_valid = ~np.isnan(leg_length)
+
+    def windowed(values):
+        cumulative = np.concatenate([np.zeros((1,) + values.shape[1:]), np.cumsum(values, axis=0)])
+        start = np.maximum(np.arange(1, n + 1) - window, 0)
+        return cumulative[1:] - cumulative[start]
+
+    return _jitter_from_sums(
+        windowed(valid.astype(float)),
+        windowed(positions),
+        windowed(positions ** 2),
+        windowed(np.where(leg_valid, leg_length, 0)),
+        windowed(leg_valid.astype(float))
+    )
+
+
+class RollingStability:
+    """
+    rolling_stability 的逐帧在线版本（流式分析、多动作联合分析使用）
+    维护窗口内的累计量，每帧加入新帧、移出最旧帧，代价与窗口大小无关
+    """
+    def __init__(self, window=15):
+        self.window = window
+        self.frames = deque()
+        self.count = np.zeros(len(STABILITY_POINTS))
+        self.total = np.zeros((len(STABILITY_POINTS), 2))
+        self.total_sq = np.zeros((len(STABILITY_POINTS), 2))
+        self.leg_total = 0.0
+        self.leg_count = 0
+
+    def push(self, frame_data):
+        """加入一帧，返回以该帧结尾的窗口抖动（数据不足时为 None）"""
+        positions, valid, leg_length = _stability_points(frame_data)
+        positions[~valid] = 0
+        self._accumulate(positions, valid, leg_length, 1)
+        self.frames.append((positions, valid, leg_length))
+        if len(self.frames) > self.window:
+            self._accumulate(*self.frames.popleft(), -1)
+        if self.leg_count == 0:
+            return None  # 整个窗口都没有腿部关键点（如人离开画面）
+
+        jitter = float(_jitter_from_sums(self.count, self.total, self.total_sq,
+                                         self.leg_total, self.leg_count))
+        return None if math.isnan(jitter) else jitter
+
+    def _accumulate(self, positions, valid, leg_length, sign):
+        self.count += sign * valid
+        self.total += sign * positions
+        self.total_sq += sign * positions ** 2
+        if not math.isnan(leg_length):
+            self.leg_total += sign * leg_length
+            self.leg_count += sign
+
 
 class PoseAnalyzer_gongbu:
     def __init__(self):
@@ -26,6 +132,12 @@ class PoseAnalyzer_gongbu:
         self.consecutive_frames = 5     # 减少需要保持的连续帧数(由5改为3)
         self.min_frame_interval = 15  # 两个关键帧之间的最小间隔帧数
         self.last_key_frame = -self.min_frame_interval  # 上一个关键帧的索引
+        self.potential_key_frame_count = 0  # 连续满足弓步条件的帧数
+
+        # 稳定性：髋、膝、踝位置在最近 stability_window 帧内的抖动（位置标准差 / 腿长）
+        self.stability_window = 15
+        self.stability_tolerance = 0.05  # 抖动达到该值时稳定性得分为0
+        self.reset_detection()
     
     def calculate_angle(self, point1, point2, point3):
         """计算三个点形成的角度"""
@@ -41,8 +153,11 @@ class PoseAnalyzer_gongbu:
         
         return np.degrees(angle)
     
-    def is_gong_bu_frame(self, frame_data):
-        """判断是否为弓步关键帧"""
+    def is_gong_bu_frame(self, frame_data, features=None):
+        """判断是否为弓步关键帧
+        features: 可选的预计算帧特征（见 multi_move_analysis.compute_frame_features），
+                  提供时复用其中的膝关节角度
+        """
         # 获取关键点
         left_hip = frame_data.get('左髋')
         right_hip = frame_data.get('右髋')
@@ -74,8 +189,12 @@ class PoseAnalyzer_gongbu:
             return False   
         
         # 计算左右膝盖角度
-        left_knee_angle = self.calculate_angle(left_hip, left_knee, left_ankle)
-        right_knee_angle = self.calculate_angle(right_hip, right_knee, right_ankle)
+        if features:
+            left_knee_angle = features['left_knee_angle']
+            right_knee_angle = features['right_knee_angle']
+        else:
+            left_knee_angle = self.calculate_angle(left_hip, left_knee, left_ankle)
+            right_knee_angle = self.calculate_angle(right_hip, right_knee, right_ankle)
         
         # 当前的严格判断条件
         is_left_forward = (
@@ -95,21 +214,27 @@ class PoseAnalyzer_gongbu:
         
         return (is_left_forward or is_right_forward)
     
-    def score_gong_bu(self, frame_data):
-        """对弓步动作进行打分"""
-        if not self.is_gong_bu_frame(frame_data):
+    def score_gong_bu(self, frame_data, features=None, stability=None):
+        """对弓步动作进行打分
+        stability: 该帧的位置抖动（见 rolling_stability），未提供时按关键点可见度估计稳定性
+        """
+        if not self.is_gong_bu_frame(frame_data, features):
             return 0
             
         scores = {}
         
+        if features:
+            knee_angles = (features['left_knee_angle'], features['right_knee_angle'])
+        else:
+            knee_angles = (self.calculate_angle(frame_data['左髋'], frame_data['左膝'], frame_data['左踝']),
+                           self.calculate_angle(frame_data['右髋'], frame_data['右膝'], frame_data['右踝']))
+        
         # 1. 前腿膝盖角度评分
-        front_knee = min(self.calculate_angle(frame_data['左髋'], frame_data['左膝'], frame_data['左踝']),
-                        self.calculate_angle(frame_data['右髋'], frame_data['右膝'], frame_data['右踝']))
+        front_knee = min(knee_angles)
         scores['front_knee_angle'] = 100 - abs(front_knee - self.standards['front_knee_angle'])
         
         # 2. 后腿伸直程度评分
-        back_knee = max(self.calculate_angle(frame_data['左髋'], frame_data['左膝'], frame_data['左踝']),
-                       self.calculate_angle(frame_data['右髋'], frame_data['右膝'], frame_data['右踝']))
+        back_knee = max(knee_angles)
         scores['back_leg_straight'] = 100 - abs(back_knee - self.standards['back_knee_angle'])
         
         # 3. 躯干垂直度评分
@@ -120,7 +245,19 @@ class PoseAnalyzer_gongbu:
         )
         scores['body_vertical'] = 100 - abs(spine_angle - self.standards['vertical_angle'])
         
-        # 4. 计算稳定性得分（通过关键点的可见性和位置变化）
+        # 4. 计算稳定性得分（通过最近若干帧髋、膝、踝的位置抖动）
+        if stability is not None:
+            scores['stability'] = max(0.0, 100 * (1 - stability / self.stability_tolerance))
+        else:
+            scores['stability'] = self._visibility_stability(frame_data)
+        
+        # 计算总分
+        final_score = sum(score * self.weights[key] for key, score in scores.items())
+        
+        return final_score
+
+    def _visibility_stability(self, frame_data):
+        """没有时序数据时，用关键点的可见性估计稳定性"""
         key_points_visibility = [
             frame_data['左髋']['v'],
             frame_data['右髋']['v'],
@@ -128,58 +265,115 @@ class PoseAnalyzer_gongbu:
             frame_data['右膝']['v'],
             frame_data['左踝']['v'],                                                                                  
         ]
-        scores['stability'] = sum(key_points_visibility) / len(key_points_visibility) * 100
-        
-        # 计算总分
-        final_score = sum(score * self.weights[key] for key, score in scores.items())
-        
-        return final_score
+        return sum(key_points_visibility) / len(key_points_visibility) * 100
 
-    def detect_key_frames(self, frame_sequence):
+    def reset_detection(self):
+        """重置关键帧检测状态（分析新序列前调用）"""
+        self.last_key_frame = -self.min_frame_interval
+        self.potential_key_frame_count = 0
+        self.reset_stability()
+
+    def reset_stability(self):
+        self.sequence_stability = None  # detect_key_frames 预先计算的整段抖动
+        self.stability_tracker = RollingStability(self.stability_window)
+        self.recent_stability = deque(maxlen=self.frame_window)  # 在线计算的最近若干帧抖动
+        self.stability_end = 0          # 已计算抖动的帧数
+        self.key_frame_stability = {}   # 关键帧索引 -> 抖动
+
+    def _update_stability(self, i, frame_sequence):
+        """在线计算到第i帧为止的抖动（已有整段结果时跳过）"""
+        if self.sequence_stability is not None:
+            return
+        while self.stability_end <= i:
+            self.recent_stability.append(self.stability_tracker.push(frame_sequence[self.stability_end]))
+            self.stability_end += 1
+
+    def _stability_at(self, i):
+        """第i帧的抖动，未计算或数据不足时返回 None"""
+        if self.sequence_stability is not None:
+            value = self.sequence_stability[i]
+            return None if np.isnan(value) else float(value)
+        offset = i - (self.stability_end - len(self.recent_stability))
+        if 0 <= offset < len(self.recent_stability):
+            return self.recent_stability[offset]
+        return None
+
+    def update_key_frame(self, i, frame_sequence, features=None):
+        """
+        增量检测第i帧，确定新的关键帧时返回其索引，否则返回None
+        frame_sequence: 只需支持访问 [i - consecutive_frames + 1, i] 范围内的帧
+        features: 与frame_sequence对齐的预计算帧特征（可选）
+        """
+        # 抖动需要逐帧累计，放在间隔判断之前
+        self._update_stability(i, frame_sequence)
+
+        # 检查是否满足最小帧间隔要求
+        if i - self.last_key_frame < self.min_frame_interval:
+            return None
+
+        frame_features = features[i] if features is not None else None
+
+        # 判断是否为弓步姿势
+        if self.is_gong_bu_frame(frame_sequence[i], frame_features):
+            self.potential_key_frame_count += 1
+
+            # 如果连续多帧都是弓步姿势
+            if self.potential_key_frame_count >= self.consecutive_frames:
+                # 从这些连续帧中选择得分最高的作为关键帧
+                # 抖动与可见度估计的稳定性不在同一尺度，窗口内数据不足（抖动为 None）的帧不参与比较，
+                # 只有全部帧都没有抖动时才一起按可见度估计
+                start_idx = i - self.consecutive_frames + 1
+                candidates = [j for j in range(start_idx, i + 1) if self._stability_at(j) is not None]
+                candidates = candidates or list(range(start_idx, i + 1))
+                scores = [self.score_gong_bu(frame_sequence[j],
+                                             features[j] if features is not None else None,
+                                             self._stability_at(j))
+                        for j in candidates]
+
+                best_frame_idx = candidates[scores.index(max(scores))]
+                self.key_frame_stability[best_frame_idx] = self._stability_at(best_frame_idx)
+                self.last_key_frame = best_frame_idx  # 更新最后关键帧索引
+                self.potential_key_frame_count = 0  # 重置计数器
+                return best_frame_idx
+        else:
+            self.potential_key_frame_count = 0
+
+        return None
+
+    def detect_key_frames(self, frame_sequence, intervals=None):
         """
         检测关键帧序列
         frame_sequence: 包含连续帧数据的列表
+        intervals: 只在这些 (起始帧, 结束帧) 区间内检测（如 action_segmentation 的 gongbu_hold 区间）
         返回关键帧的索引列表
         """
         key_frames = []
-        potential_key_frame_count = 0
+        self.potential_key_frame_count = 0
+        # 整段序列已知，用累计和一次算出每帧抖动
+        self.reset_stability()
+        self.sequence_stability = rolling_stability(frame_sequence, self.stability_window)
         
-        for i in range(len(frame_sequence)):
-            # 检查是否满足最小帧间隔要求
-            if i - self.last_key_frame < self.min_frame_interval:
-                continue
-                
-            frame_data = frame_sequence[i]
-            
-            # 判断是否为弓步姿势
-            if self.is_gong_bu_frame(frame_data):
-                potential_key_frame_count += 1
-                
-                # 如果连续多帧都是弓步姿势
-                if potential_key_frame_count >= self.consecutive_frames:
-                    # 从这些连续帧中选择得分最高的作为关键帧
-                    start_idx = i - self.consecutive_frames + 1
-                    scores = [self.score_gong_bu(frame_sequence[j]) 
-                            for j in range(start_idx, i + 1)]
-                    
-                    best_frame_idx = start_idx + scores.index(max(scores))
-                    
-                    if best_frame_idx not in key_frames:
-                        key_frames.append(best_frame_idx)
-                        self.last_key_frame = best_frame_idx  # 更新最后关键帧索引
-                        potential_key_frame_count = 0  # 重置计数器
-            else:
-                potential_key_frame_count = 0
+        for start, end in intervals if intervals is not None else [(0, len(frame_sequence))]:
+            self.potential_key_frame_count = 0
+            for i in range(start, end):
+                best_frame_idx = self.update_key_frame(i, frame_sequence)
+                if best_frame_idx is not None and best_frame_idx not in key_frames:
+                    key_frames.append(best_frame_idx)
                 
         return key_frames
 
-    def analyze_sequence(self, frame_sequence):
+    def analyze_sequence(self, frame_sequence, intervals=None):
         """
         分析整个动作序列
         frame_sequence: 包含连续帧数据的列表
+        intervals: 可选的检测区间，见 detect_key_frames
         返回关键帧信息和得分
         """
-        key_frames = self.detect_key_frames(frame_sequence)
+        key_frames = self.detect_key_frames(frame_sequence, intervals)
+        return self.build_analysis_result(frame_sequence, key_frames)
+
+    def build_analysis_result(self, frame_sequence, key_frames):
+        """根据已检测的关键帧生成得分与详细分析信息"""
         analysis_result_gongbu = {
             'key_frames': key_frames,
             'scores': [],
@@ -188,7 +382,8 @@ class PoseAnalyzer_gongbu:
         
         for frame_idx in key_frames:
             frame_data = frame_sequence[frame_idx]
-            score = self.score_gong_bu(frame_data)
+            stability = self.key_frame_stability.get(frame_idx, self._stability_at(frame_idx))
+            score = self.score_gong_bu(frame_data, stability=stability)
             
             analysis_result_gongbu['scores'].append({
                 'frame_index': frame_idx,
@@ -205,7 +400,8 @@ class PoseAnalyzer_gongbu:
                 'back_knee_angle': max(
                     self.calculate_angle(frame_data['左髋'], frame_data['左膝'], frame_data['左踝']),
                     self.calculate_angle(frame_data['右髋'], frame_data['右膝'], frame_data['右踝'])
-                )
+                ),
+                'position_jitter': stability
             })
             
         return analysis_result_gongbu
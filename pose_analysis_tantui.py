@@ -1,8 +1,9 @@
 import numpy as np
 import math
+from peak_detection import find_peaks
 
 class PoseAnalyzer_tantui:
-    def __init__(self):
+    def __init__(self, key_frame_mode='consecutive'):
         # 评分权重
         self.weights = {
             'kick_height': 0.4,        # 踢腿高度权重
@@ -23,9 +24,19 @@ class PoseAnalyzer_tantui:
         self.consecutive_frames = 3     # 连续帧数要求
         self.min_frame_interval = 15   # 最小帧间隔
         self.last_key_frame = -self.min_frame_interval
+        self.potential_key_frame_count = 0
 
-    def is_tan_tui_frame(self, frame_data):
-        """判断是否为弹腿关键帧"""
+        # 关键帧检测方式：
+        # 'consecutive' 连续 consecutive_frames 帧满足条件时取其中得分最高的一帧
+        # 'peak'        在整段序列的踢腿脚踝高度曲线上找局部最高点，只在峰值处做完整判定
+        self.key_frame_mode = key_frame_mode
+        self.peak_prominence = 0.05     # 峰值最小突出度（归一化坐标）
+
+    def is_tan_tui_frame(self, frame_data, features=None):
+        """判断是否为弹腿关键帧
+        features: 可选的预计算帧特征（见 multi_move_analysis.compute_frame_features），
+                  提供时复用其中的膝关节角度
+        """
         # 获取关键点
         left_hip = frame_data.get('左髋')
         right_hip = frame_data.get('右髋')
@@ -64,11 +75,14 @@ class PoseAnalyzer_tantui:
             }
 
         # 2. 检查支撑腿是否稳定
-        support_leg_angle = self.calculate_angle(
-            support_leg['hip'],
-            support_leg['knee'],
-            support_leg['ankle']
-        )
+        if features:
+            support_leg_angle = features['left_knee_angle' if is_left_support else 'right_knee_angle']
+        else:
+            support_leg_angle = self.calculate_angle(
+                support_leg['hip'],
+                support_leg['knee'],
+                support_leg['ankle']
+            )
         if support_leg_angle < self.standards['support_leg_angle']:
             return False
 
@@ -81,22 +95,24 @@ class PoseAnalyzer_tantui:
             return False
 
         # 新增：检查踢腿是否完全伸直
-        kick_leg_angle = self.calculate_angle(
-            kick_leg['hip'],
-            kick_leg['knee'],
-            kick_leg['ankle']
-        )
+        if features:
+            kick_leg_angle = features['right_knee_angle' if is_left_support else 'left_knee_angle']
+        else:
+            kick_leg_angle = self.calculate_angle(
+                kick_leg['hip'],
+                kick_leg['knee'],
+                kick_leg['ankle']
+            )
         # 踢腿必须接近伸直（例如>165度）才能算作关键帧
         if kick_leg_angle < 130:  # 增加踢腿伸直度的要求
             return False
 
-        # 新增：检查是否达到局部最高点
-        # 通过比较前后帧来判断是否是最高点
+        # 单帧无法判断是否为最高点：key_frame_mode='peak' 时由 detect_key_frames_by_peaks 只在踢腿高度的峰值帧上调用本判定
         return True
 
-    def score_tan_tui(self, frame_data):
+    def score_tan_tui(self, frame_data, features=None):
         """对弹腿动作进行打分"""
-        if not self.is_tan_tui_frame(frame_data):
+        if not self.is_tan_tui_frame(frame_data, features):
             return 0
             
         scores = {}
@@ -106,7 +122,7 @@ class PoseAnalyzer_tantui:
         scores['kick_height'] = min(100, kick_height_ratio * 100)
         
         # 2. 支撑腿稳定性评分
-        support_leg_score = self._evaluate_support_leg(frame_data)
+        support_leg_score = self._evaluate_support_leg(frame_data, features)
         scores['support_leg'] = support_leg_score
         
         # 3. 躯干垂直度评分
@@ -134,10 +150,12 @@ class PoseAnalyzer_tantui:
         height_diff = support_knee_y - kick_ankle_y
         return height_diff / self.standards['min_kick_height']
 
-    def _evaluate_support_leg(self, frame_data):
+    def _evaluate_support_leg(self, frame_data, features=None):
         """评估支撑腿稳定性"""
         is_left_support = frame_data['左踝']['y'] > frame_data['右踝']['y']
-        if is_left_support:
+        if features:
+            angle = features['left_knee_angle' if is_left_support else 'right_knee_angle']
+        elif is_left_support:
             angle = self.calculate_angle(
                 frame_data['左髋'],
                 frame_data['左膝'],
@@ -156,40 +174,101 @@ class PoseAnalyzer_tantui:
         """检查脚跟是否离地"""
         return ankle['y'] < self.standards['heel_ground_threshold']
 
-    def detect_key_frames(self, frame_sequence):
-        """检测关键帧序列"""
-        key_frames = []
-        potential_key_frame_count = 0
-        
-        for i in range(len(frame_sequence)):
-            if i - self.last_key_frame < self.min_frame_interval:
+    def reset_detection(self):
+        """重置关键帧检测状态（分析新序列前调用）"""
+        self.last_key_frame = -self.min_frame_interval
+        self.potential_key_frame_count = 0
+
+    def update_key_frame(self, i, frame_sequence, features=None):
+        """
+        增量检测第i帧，确定新的关键帧时返回其索引，否则返回None
+        frame_sequence: 只需支持访问 [i - consecutive_frames + 1, i] 范围内的帧
+        features: 与frame_sequence对齐的预计算帧特征（可选）
+        """
+        if i - self.last_key_frame < self.min_frame_interval:
+            return None
+
+        frame_features = features[i] if features is not None else None
+        if self.is_tan_tui_frame(frame_sequence[i], frame_features):
+            self.potential_key_frame_count += 1
+
+            if self.potential_key_frame_count >= self.consecutive_frames:
+                start_idx = i - self.consecutive_frames + 1
+                scores = [self.score_tan_tui(frame_sequence[j],
+                                             features[j] if features is not None else None)
+                        for j in range(start_idx, i + 1)]
+
+                best_frame_idx = start_idx + scores.index(max(scores))
+                self.last_key_frame = best_frame_idx
+                self.potential_key_frame_count = 0
+                return best_frame_idx
+        else:
+            self.potential_key_frame_count = 0
+
+        return None
+
+    def kick_height_curve(self, frame_sequence):
+        """
+        计算每帧踢腿脚踝相对支撑腿膝盖的高度（y轴向下，差值越大踢得越高）
+        缺少腿部关键点的帧为 NaN
+        """
+        heights = np.full(len(frame_sequence), np.nan)
+        for i, frame_data in enumerate(frame_sequence):
+            left_knee = frame_data.get('左膝')
+            right_knee = frame_data.get('右膝')
+            left_ankle = frame_data.get('左踝')
+            right_ankle = frame_data.get('右踝')
+            if not all([left_knee, right_knee, left_ankle, right_ankle]):
                 continue
-                
-            frame_data = frame_sequence[i]
-            
-            if self.is_tan_tui_frame(frame_data):
-                potential_key_frame_count += 1
-                
-                if potential_key_frame_count >= self.consecutive_frames:
-                    start_idx = i - self.consecutive_frames + 1
-                    scores = [self.score_tan_tui(frame_sequence[j]) 
-                            for j in range(start_idx, i + 1)]
-                    
-                    best_frame_idx = start_idx + scores.index(max(scores))
-                    
-                    if best_frame_idx not in key_frames:
-                        key_frames.append(best_frame_idx)
-                        self.last_key_frame = best_frame_idx
-                        potential_key_frame_count = 0
+
+            if left_ankle['y'] > right_ankle['y']:
+                heights[i] = left_knee['y'] - right_ankle['y']
             else:
-                potential_key_frame_count = 0
+                heights[i] = right_knee['y'] - left_ankle['y']
+        return heights
+
+    def detect_key_frames_by_peaks(self, frame_sequence):
+        """
+        基于峰值的关键帧检测
+        先在踢腿高度曲线上线性时间找出局部最高点（突出度 >= peak_prominence，
+        间隔 >= min_frame_interval），再只在这些峰值帧上检查支撑腿、踢腿角度等判定条件，
+        选出的关键帧即动作的真实最高点
+        """
+        heights = self.kick_height_curve(frame_sequence)
+        peaks = find_peaks(heights, prominence=self.peak_prominence,
+                           distance=self.min_frame_interval)
+        return [i for i in peaks if self.is_tan_tui_frame(frame_sequence[i])]
+
+    def detect_key_frames(self, frame_sequence, intervals=None):
+        """检测关键帧序列
+        intervals: 只在这些 (起始帧, 结束帧) 区间内检测（如 action_segmentation 的 tantui_extension 区间）
+        """
+        if self.key_frame_mode == 'peak':
+            peaks = self.detect_key_frames_by_peaks(frame_sequence)
+            if intervals is None:
+                return peaks
+            return [i for i in peaks if any(start <= i < end for start, end in intervals)]
+
+        key_frames = []
+        self.potential_key_frame_count = 0
+        
+        for start, end in intervals if intervals is not None else [(0, len(frame_sequence))]:
+            self.potential_key_frame_count = 0
+            for i in range(start, end):
+                best_frame_idx = self.update_key_frame(i, frame_sequence)
+                if best_frame_idx is not None and best_frame_idx not in key_frames:
+                    key_frames.append(best_frame_idx)
                 
         return key_frames
 
 
-    def analyze_sequence(self, frame_sequence):
-        """分析整个弹腿动作序列"""
-        key_frames = self.detect_key_frames(frame_sequence)
+    def analyze_sequence(self, frame_sequence, intervals=None):
+        """分析整个弹腿动作序列，intervals 见 detect_key_frames"""
+        key_frames = self.detect_key_frames(frame_sequence, intervals)
+        return self.build_analysis_result(frame_sequence, key_frames)
+
+    def build_analysis_result(self, frame_sequence, key_frames):
+        """根据已检测的关键帧生成得分与详细分析信息"""
         analysis_result_tantui = {
             'key_frames': key_frames,
             'scores': [],
@@ -0,0 +1,320 @@
+import os
+import time
+import numpy as np
+from landmark_io import BODY_PARTS
+from quality_governor import roi_from_landmarks
+"""
+姿态检测后端接口
+所有后端输出相同格式：每帧 33 个关键点（顺序同 BODY_PARTS），
+每个关键点为 {'x', 'y', 'z', 'visibility'}，x/y 为相对输入图像的归一化坐标；
+未检测到人体的帧输出 None
+
+- MediaPipeBackend: mp.solutions.pose，逐帧处理
+- OnnxPoseBackend:  ONNX Runtime CPU 推理，一次处理一批帧以分摊单次调用开销
+
+PoseDetector 通过 create_backend 创建后端，命令行用 --backend 选择
+重型依赖（mediapipe / onnxruntime / cv2）在创建后端时才导入
+"""
+
+NUM_LANDMARKS = len(BODY_PARTS)
+BACKENDS = ('mediapipe', 'onnx')
+
+
+class Landmark:
+    """单个关键点，属性与 mediapipe 的 NormalizedLandmark 相同"""
+
+    def __init__(self, x, y, z, visibility):
+        self.x = x
+        self.y = y
+        self.z = z
+        self.visibility = visibility
+
+
+class LandmarkList:
+    """
+    与 mediapipe 结果中 pose_landmarks 相同的访问方式（.landmark[i].x 等），
+    供实时模式中按属性访问关键点的代码（光流跟踪、ROI、关键帧片段）使用
+    """
+
+    def __init__(self, landmarks):
+        self.landmark = [Landmark(lm['x'], lm['y'], lm['z'], lm['visibility']) for lm in landmarks]
+
+
+def to_landmark_list(landmarks):
+    """后端输出的关键点列表 -> LandmarkList，未检测到人体时返回 None"""
+    return LandmarkList(landmarks) if landmarks is not None else None
+
+
+class PoseBackend:
+    """姿态检测后端基类"""
+    name = 'base'
+
+    def process_batch(self, frames_rgb):
+        """处理一批RGB帧，返回与输入等长的列表，每项为33个关键点或None"""
+        raise NotImplementedError
+
+    def process(self, frame_rgb):
+        """处理单帧"""
+        return self.process_batch([frame_rgb])[0]
+
+    def close(self):
+        pass
+
+
+class MediaPipeBackend(PoseBackend):
+    name = 'mediapipe'
+
+    def __init__(self, static_image_mode=False, model_complexity=1,
+                 min_detection_confidence=0.6, min_tracking_confidence=0.6):
+        import mediapipe as mp
+
+        # 默认参数与 PoseDetector 保持一致
+        self.pose = mp.solutions.pose.Pose(
+            static_image_mode=static_image_mode,
+            model_complexity=model_complexity,
+            smooth_landmarks=True,
+            enable_segmentation=True,
+            smooth_segmentation=True,
+            min_detection_confidence=min_detection_confidence,
+            min_tracking_confidence=min_tracking_confidence
+        )
+
+    def process_batch(self, frames_rgb):
+        landmarks = []
+        for frame_rgb in frames_rgb:
+            results = self.pose.process(frame_rgb)
+            if not results.pose_landmarks:
+                landmarks.append(None)
+                continue
+            landmarks.append([{
+                'x': landmark.x,
+                'y': landmark.y,
+                'z': landmark.z,
+                'visibility': landmark.visibility
+            } for landmark in results.pose_landmarks.landmark])
+        return landmarks
+
+    def close(self):
+        self.pose.close()
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+class OnnxPoseBackend(PoseBackend):
+    """
+    ONNX Runtime CPU 后端
+    适配导出为 ONNX 的 BlazePose 关键点模型（与 mediapipe 使用的模型相同）：
+        输入:  (N, H, W, 3) 或 (N, 3, H, W) float32，取值 0~1
+        关键点输出:   (N, 195) 即 39 个点 × (x, y, z, visibility, presence)，x/y/z 以输入像素为单位，
+                      visibility 为 logit；取前 33 个点
+        人体存在输出: (N, 1) 人体存在置信度 logit（可选）
+        模型通常还有分割图、热力图、世界坐标等输出，不使用
+    输出按名称选取：landmarks_output / presence_output 未指定时按形状在模型输出中查找
+    （关键点输出最后一维为 195，人体存在输出每个样本只有 1 个值）
+    输入裁剪（与 mediapipe 的跟踪模式相同思路）：
+        roi_padding 不为 None 时，用上一批最后一帧的关键点经 roi_from_landmarks 得到人物框，
+        本批各帧都裁剪该区域；没有上一帧结果时使用整帧
+        裁剪框按模型输入的宽高比向外扩展，超出画面的部分补黑边（不拉伸变形），输出坐标换算回整帧
+    限制：没有单独的人体检测模型，首帧和跟丢后只能在整帧上推理，
+    画面中人物很小或有多人时效果差，适合以运动员为主体的单人训练视频
+    """
+    name = 'onnx'
+
+    def __init__(self, model_path, batch_size=8, num_threads=None, min_presence=0.5,
+                 landmarks_output=None, presence_output=None, roi_padding=0.25):
+        import onnxruntime as ort
+
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"模型文件不存在: {model_path}")
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = num_threads or os.cpu_count() or 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        shape = model_input.shape
+        self.channels_first = shape[1] == 3
+        if self.channels_first:
+            self.input_height, self.input_width = shape[2], shape[3]
+        else:
+            self.input_height, self.input_width = shape[1], shape[2]
+
+        # 固定 batch 导出的模型每次必须送入该数量的帧，不足时补齐
+        self.fixed_batch = shape[0] if isinstance(shape[0], int) else None
+        self.batch_size = self.fixed_batch or batch_size
+        self.min_presence = min_presence
+        self.roi_padding = roi_padding          # None: 不裁剪，每帧都用整帧（静态图片模式）
+        self.previous_landmarks = None
+        self.landmarks_output, self.presence_output = self._select_outputs(landmarks_output, presence_output)
+        # 只取这两个输出，session.run 按 output_names 的顺序返回
+        self.output_names = [self.landmarks_output] + ([self.presence_output] if self.presence_output else [])
+
+    def _select_outputs(self, landmarks_output, presence_output):
+        """确定关键点输出和人体存在输出的名称"""
+        outputs = {output.name: output.shape for output in self.session.get_outputs()}
+        for name in (landmarks_output, presence_output):
+            if name is not None and name not in outputs:
+                raise ValueError(f"模型中没有名为 {name} 的输出，可用输出: {list(outputs)}")
+
+        if landmarks_output is None:
+            landmarks_output = next((name for name, shape in outputs.items()
+                                     if shape and shape[-1] == 195), None)
+            if landmarks_output is None:
+                raise ValueError(f"无法确定关键点输出（最后一维应为 195），请指定 landmarks_output，"
+                                 f"可用输出: {outputs}")
+        if presence_output is None:
+            presence_output = next((name for name, shape in outputs.items()
+                                    if name != landmarks_output and len(shape) >= 2
+                                    and all(dim == 1 for dim in shape[1:])), None)
+        return landmarks_output, presence_output
+
+    def _crop_box(self, width, height):
+        """本批使用的裁剪框 (x0, y0, box_w, box_h)，宽高比与模型输入一致，可超出画面"""
+        x0, y0, x1, y1 = 0, 0, width, height
+        if self.roi_padding is not None and self.previous_landmarks is not None:
+            x0, y0, x1, y1 = roi_from_landmarks(to_landmark_list(self.previous_landmarks),
+                                                width, height, self.roi_padding)
+        box_w, box_h = x1 - x0, y1 - y0
+        aspect = self.input_width / self.input_height
+        if box_w / box_h < aspect:
+            box_w = box_h * aspect
+        else:
+            box_h = box_w / aspect
+        return (x0 + x1 - box_w) / 2, (y0 + y1 - box_h) / 2, box_w, box_h
+
+    def _prepare(self, frames_rgb):
+        """裁剪并缩放到模型输入，返回 (输入张量, 每帧的 (裁剪框, 画面宽, 画面高))"""
+        import cv2
+
+        batch = np.zeros((self.fixed_batch or len(frames_rgb), self.input_height, self.input_width, 3),
+                         dtype=np.float32)
+        boxes = []
+        for i, frame_rgb in enumerate(frames_rgb):
+            height, width = frame_rgb.shape[:2]
+            x0, y0, box_w, box_h = box = self._crop_box(width, height)
+            scale_x, scale_y = self.input_width / box_w, self.input_height / box_h
+            # 平移缩放一次完成裁剪和缩放，框外区域填 0
+            matrix = np.float32([[scale_x, 0, -x0 * scale_x], [0, scale_y, -y0 * scale_y]])
+            warped = cv2.warpAffine(frame_rgb, matrix, (self.input_width, self.input_height),
+                                    flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT, borderValue=0)
+            np.multiply(warped, 1.0 / 255.0, out=batch[i], casting='unsafe')
+            boxes.append((box, width, height))
+        if self.channels_first:
+            batch = np.ascontiguousarray(batch.transpose(0, 3, 1, 2))
+        return batch, boxes
+
+    def _decode(self, outputs, boxes):
+        """outputs: session.run 按 output_names 顺序返回的结果；boxes: _prepare 返回的裁剪框，只解码这些帧"""
+        n_frames = len(boxes)
+        raw = outputs[0].reshape(outputs[0].shape[0], -1, 5)[:n_frames, :NUM_LANDMARKS]
+        # 模型输入像素 -> 裁剪框内比例 -> 整帧归一化坐标；z 与 x 同尺度
+        box_x0, box_y0, box_w, box_h = np.array([box for box, _, _ in boxes], dtype=np.float64).T[:, :, None]
+        widths = np.array([width for _, width, _ in boxes], dtype=np.float64)[:, None]
+        heights = np.array([height for _, _, height in boxes], dtype=np.float64)[:, None]
+        xs = (raw[:, :, 0] / self.input_width * box_w + box_x0) / widths
+        ys = (raw[:, :, 1] / self.input_height * box_h + box_y0) / heights
+        zs = raw[:, :, 2] / self.input_width * box_w / widths
+        visibility = _sigmoid(raw[:, :, 3])
+
+        if self.presence_output is not None:
+            presence = _sigmoid(outputs[1].reshape(-1)[:n_frames])
+        else:
+            presence = np.ones(n_frames)
+
+        landmarks = []
+        for n in range(n_frames):
+            if presence[n] < self.min_presence:
+                landmarks.append(None)
+                continue
+            landmarks.append([{
+                'x': float(xs[n, i]),
+                'y': float(ys[n, i]),
+                'z': float(zs[n, i]),
+                'visibility': float(visibility[n, i])
+            } for i in range(NUM_LANDMARKS)])
+        return landmarks
+
+    def process_batch(self, frames_rgb):
+        landmarks = []
+        for start in range(0, len(frames_rgb), self.batch_size):
+            batch, boxes = self._prepare(frames_rgb[start:start + self.batch_size])
+            outputs = self.session.run(self.output_names, {self.input_name: batch})
+            decoded = self._decode(outputs, boxes)
+            # 下一批的裁剪区域取自本批最后一帧，跟丢时回到整帧
+            self.previous_landmarks = decoded[-1]
+            landmarks.extend(decoded)
+        return landmarks
+
+
+def create_backend(name, **kwargs):
+    """按名称创建后端: 'mediapipe' 或 'onnx'，kwargs 传给对应后端的构造函数"""
+    if name == 'mediapipe':
+        return MediaPipeBackend(**kwargs)
+    if name == 'onnx':
+        return OnnxPoseBackend(**kwargs)
+    raise ValueError(f"未知的姿态检测后端: {name}")
+
+
+def benchmark_backends(backends, frames_rgb, batch_size=8, warmup=2):
+    """
+    在同一组帧上比较各后端吞吐量
+    每个后端以 batch_size 为单位送入帧（MediaPipe 内部仍逐帧处理），
+    返回 {后端名: {'frames', 'seconds', 'fps', 'detected'}}
+    """
+    report = {}
+    for backend in backends:
+        # 预热，排除首次调用的图初始化开销
+        for _ in range(warmup):
+            backend.process_batch(frames_rgb[:batch_size])
+
+        detected = 0
+        start = time.perf_counter()
+        for i in range(0, len(frames_rgb), batch_size):
+            results = backend.process_batch(frames_rgb[i:i + batch_size])
+            detected += sum(1 for landmarks in results if landmarks is not None)
+        seconds = time.perf_counter() - start
+
+        report[backend.name] = {
+            'frames': len(frames_rgb),
+            'seconds': seconds,
+            'fps': len(frames_rgb) / seconds if seconds > 0 else 0.0,
+            'detected': detected
+        }
+        print(f"{backend.name}: {report[backend.name]['fps']:.1f} 帧/秒, "
+              f"检测到姿态 {detected}/{len(frames_rgb)} 帧")
+    return report
+
+
+def load_video_frames(video_path, max_frames=300):
+    """读取视频前 max_frames 帧并转为RGB，用于后端对比"""
+    import cv2
+
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    while len(frames) < max_frames:
+        success, frame = cap.read()
+        if not success:
+            break
+        frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    cap.release()
+    return frames
+
+
+def main():
+    frames = load_video_frames('1.mp4')
+    if not frames:
+        print("Error: 无法读取视频帧")
+        return
+
+    backends = [MediaPipeBackend()]
+    if os.path.exists('pose_landmark_full.onnx'):
+        backends.append(OnnxPoseBackend('pose_landmark_full.onnx'))
+
+    benchmark_backends(backends, frames)
+
+if __name__ == "__main__":
+    main()
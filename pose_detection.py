@@ -1,10 +1,15 @@
 import cv2
-import mediapipe as mp
 import numpy as np
 import os
 import glob
+import json
+import time
+import shutil
+import subprocess
+from landmark_io import BODY_PARTS, coordinates_to_frame, format_landmarks, write_frame_file, list_frame_files, parse_frame_file
+from pose_backends import create_backend
 """
-mediapipe
+mediapipe（默认后端，见 pose_backends.py，也可用 --backend onnx 换成 ONNX Runtime）
 用途：3d人体姿态估计
 提供 33 个人体关键点检测
 支持实时视频处理
@@ -20,40 +25,162 @@ opencv
 可视化（关键点绘制、文字标注）
 图像和视频保存
 """
+# 检测前的缩放系数，保存坐标时除以该系数
+PREPROCESS_SCALE = 0.8
+
+
+def preprocess_frame(frame):
+    """
+    预处理用于显示和检测的帧，返回 (处理后的BGR帧, 送入 pose.process 的RGB帧)
+    图像缩放 减少计算量，加快处理速度
+    亮度和对比度调整 提高图像清晰度，便于检测关键点
+    高斯模糊降噪 减少图像噪声
+    颜色空间转换 将BGR格式转换为RGB格式 MediaPipe需要RGB格式的输入
+    """
+    processed_frame = cv2.resize(frame, (0, 0), fx=PREPROCESS_SCALE, fy=PREPROCESS_SCALE)
+    processed_frame = cv2.convertScaleAbs(processed_frame, alpha=1.2, beta=10)
+    processed_frame = cv2.GaussianBlur(processed_frame, (3, 3), 0)
+    frame_rgb = cv2.cvtColor(processed_frame, cv2.COLOR_BGR2RGB)
+    return processed_frame, frame_rgb
+
+
+def landmarks_to_coordinates(landmarks):
+    """将检测结果（后端输出的关键点列表）转换为保存用的坐标列表（x/y 除以预处理缩放系数）"""
+    return [{
+        'x': landmark['x'] / PREPROCESS_SCALE,  # 还原缩放
+        'y': landmark['y'] / PREPROCESS_SCALE,
+        'z': landmark['z'],
+        'visibility': landmark['visibility']
+    } for landmark in landmarks]
+
+
+# 断点续跑的检查点文件，保存在输出文件夹中
+CHECKPOINT_FILE = 'checkpoint.json'
+
+
+def load_checkpoint(output_dir):
+    """读取输出文件夹中的检查点，不存在或损坏时返回 None"""
+    path = os.path.join(output_dir, CHECKPOINT_FILE)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"警告: 检查点文件无法读取 {path}: {str(e)}")
+        return None
+
+
+def save_checkpoint(output_dir, state):
+    """写入检查点，先写临时文件再替换，避免中断时留下半个文件"""
+    path = os.path.join(output_dir, CHECKPOINT_FILE)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def concat_videos(paths, output_path):
+    """用 ffmpeg 的 concat 按流拼接编码参数相同的视频，不重新编码；没有 ffmpeg 或失败时返回 False"""
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        return False
+    list_path = output_path + '.parts.txt'
+    with open(list_path, 'w', encoding='utf-8') as f:
+        for path in paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+    try:
+        result = subprocess.run([ffmpeg, '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0',
+                                 '-i', list_path, '-c', 'copy', output_path])
+    finally:
+        os.remove(list_path)
+    return result.returncode == 0 and os.path.exists(output_path)
+
+
+# 图片文件夹模式支持的扩展名
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def parse_image_frame_number(filename):
+    """从图片文件名中提取帧号：frame_0059.jpg -> 59，取文件名末尾的数字，没有数字时返回 None"""
+    stem = os.path.splitext(filename)[0]
+    digits = ''
+    for char in reversed(stem):
+        if not char.isdigit():
+            break
+        digits = char + digits
+    return int(digits) if digits else None
+
+
+# 图片工作进程中的检测器（每个进程创建一次）
+_image_detector = None
+
+
+def _init_image_worker(backend, model_path):
+    global _image_detector
+    _image_detector = PoseDetector(static_image_mode=True, backend=backend, model_path=model_path)
+
+
+def _detect_image(task):
+    """工作进程：检测一张图片并写入 frame_N.txt，返回 (帧号, 是否检测到姿态, 错误信息)"""
+    image_path, frame_num, output_dir = task
+    frame = cv2.imread(image_path)
+    if frame is None:
+        return frame_num, False, f"无法读取图片: {image_path}"
+
+    _, frame_rgb = preprocess_frame(frame)
+    landmarks = _image_detector.detect(frame_rgb)
+    if landmarks is None:
+        return frame_num, False, ''
+
+    coordinates = landmarks_to_coordinates(landmarks)
+    write_frame_file(os.path.join(output_dir, f'frame_{frame_num}.txt'), coordinates)
+    return frame_num, True, ''
+
+
 class PoseDetector:
     # 定义身体部位映射
-    BODY_PARTS = {
-        0: "鼻子",
-        1: "左眼(内)", 2: "左眼", 3: "左眼(外)",
-        4: "右眼(内)", 5: "右眼", 6: "右眼(外)",
-        7: "左耳", 8: "右耳",
-        9: "嘴(左)", 10: "嘴(右)",
-        11: "左肩", 12: "右肩",
-        13: "左肘", 14: "右肘",
-        15: "左手腕", 16: "右手腕",
-        17: "左手", 18: "右手",
-        19: "左小指", 20: "右小指",
-        21: "左食指", 22: "右食指",
-        23: "左髋", 24: "右髋",
-        25: "左膝", 26: "右膝",
-        27: "左踝", 28: "右踝",
-        29: "左脚", 30: "右脚",
-        31: "左脚趾", 32: "右脚趾"
-    }
+    BODY_PARTS = BODY_PARTS
     
-    def __init__(self):
-        self.mp_pose = mp.solutions.pose
-        self.pose = self.mp_pose.Pose(
-            static_image_mode=False,     # 动态视频模式
-            model_complexity=1,          # 提高模型复杂度 (0-2)
-            smooth_landmarks=True,       # 启用平滑
-            enable_segmentation=True,    # 启用分割以提高准确性
-            smooth_segmentation=True,    # 平滑分割
-            min_detection_confidence=0.6, # 提高检测置信度
-            min_tracking_confidence=0.6   # 提高追踪置信度
+    def __init__(self, static_image_mode=False, model_complexity=1,
+                 min_detection_confidence=0.6, min_tracking_confidence=0.6,
+                 backend='mediapipe', model_path=None):
+        self.static_image_mode = static_image_mode  # 默认动态视频模式，图片文件夹使用静态图片模式
+        self.model_complexity = model_complexity    # 提高模型复杂度 (0-2)
+        self.min_detection_confidence = min_detection_confidence
+        self.min_tracking_confidence = min_tracking_confidence
+        self.backend_name = backend                 # 姿态检测后端：'mediapipe' 或 'onnx'
+        self.model_path = model_path                # onnx 后端的模型文件
+        self.backend = self._create_backend()
+
+    def _create_backend(self):
+        if self.backend_name == 'onnx':
+            # ONNX 模型的复杂度由模型文件决定；图片模式不沿用上一帧的裁剪区域
+            return create_backend('onnx', model_path=self.model_path or 'pose_landmark_full.onnx',
+                                  roi_padding=None if self.static_image_mode else 0.25)
+        return create_backend(
+            self.backend_name,
+            static_image_mode=self.static_image_mode,
+            model_complexity=self.model_complexity,
+            min_detection_confidence=self.min_detection_confidence, # 提高检测置信度
+            min_tracking_confidence=self.min_tracking_confidence    # 提高追踪置信度
         )
-        self.mp_draw = mp.solutions.drawing_utils
-        self.mp_drawing_styles = mp.solutions.drawing_styles
+
+    def detect(self, frame_rgb):
+        """检测一帧RGB图像，返回33个关键点（相对输入图像归一化）或 None"""
+        return self.backend.process(frame_rgb)
+
+    def set_model_complexity(self, model_complexity):
+        """运行中切换模型复杂度（重新创建后端，跟踪状态重置）"""
+        if model_complexity == self.model_complexity:
+            return
+        if self.backend_name == 'onnx':
+            print(f"ONNX 后端的模型复杂度由模型文件决定，忽略 model_complexity={model_complexity}")
+            return
+        self.model_complexity = model_complexity
+        self.backend.close()
+        self.backend = self._create_backend()
 
     def get_next_output_folder(self, base_dir):
         # 查找所有output开头的文件夹
@@ -78,7 +205,37 @@ class PoseDetector:
         next_num = max(numbers) + 1
         return os.path.join(base_dir, f'output{next_num}')
 
-    def process_video(self, video_path):
+    def find_resumable_output_folder(self, base_dir, video_path):
+        """查找同一视频未完成的输出文件夹（编号最大的一个），没有则返回 None"""
+        video_path = os.path.abspath(video_path)
+        candidates = []
+        for folder in glob.glob(os.path.join(base_dir, 'output*')):
+            checkpoint = load_checkpoint(folder)
+            if checkpoint is None or checkpoint.get('completed'):
+                continue
+            if checkpoint.get('video_path') != video_path:
+                continue
+            try:
+                num = int(folder.replace(os.path.join(base_dir, 'output'), ''))
+            except ValueError:
+                continue
+            candidates.append((num, folder))
+        return max(candidates)[1] if candidates else None
+
+    def process_video(self, video_path, output_dir=None, resume=False, checkpoint_interval=300, motion_gate=None):
+        """
+        视频姿态检测，关键点逐帧保存为 frame_N.txt，处理后的视频保存为 processed_video.mp4
+        output_dir: 输出文件夹，默认取下一个 output* 文件夹
+        resume: 从检查点继续。未指定 output_dir 时自动找到该视频未完成的输出文件夹，
+                从上次完成的帧之后继续，已有关键点文件的帧不再重复检测
+        checkpoint_interval: 每隔多少帧写一次检查点
+        motion_gate: 可选的 MotionGate，画面与上次检测帧几乎相同时跳过检测，沿用上次的关键点
+
+        处理后的视频按检查点分段写入 processed_video_partK.mp4，每段在检查点处关闭，
+        并与进度在同一次检查点写入中记录，进程被强制结束时已记录的分段都是完整的
+        （mp4 文件在关闭前不可读，只有正在写的分段会丢失，续跑时从检查点重写）；
+        全部处理完成后合并为 processed_video.mp4（见 _merge_video_segments）
+        """
         # 检查文件是否存在
         if not os.path.exists(video_path):
             print(f"Error: 视频文件不存在: {video_path}")
@@ -95,95 +252,261 @@ class PoseDetector:
             print("3. 缺少必要的视频解码器")
             return
 
-        # 获取新的输出文件夹路径
-        output_dir = self.get_next_output_folder(os.path.dirname(video_path))
+        # 获取输出文件夹路径：续跑时复用原文件夹，否则新建
+        base_dir = os.path.dirname(video_path)
+        if output_dir is None and resume:
+            output_dir = self.find_resumable_output_folder(base_dir, video_path)
+        if output_dir is None:
+            output_dir = self.get_next_output_folder(base_dir)
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir)
         
         # 获取视频基本信息
         fps = int(cap.get(cv2.CAP_PROP_FPS))
         frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
         frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        
-        # 创建视频写入器保存处理后的视频
-        output_video_path = os.path.join(output_dir, 'processed_video.mp4')
+
+        checkpoint = load_checkpoint(output_dir) if resume else None
+        if checkpoint is not None and checkpoint.get('video_path') != os.path.abspath(video_path):
+            print(f"Error: 检查点对应的视频为 {checkpoint.get('video_path')}，与 {video_path} 不一致")
+            cap.release()
+            return
+        if checkpoint is not None and checkpoint.get('completed'):
+            print(f"该视频已处理完成，结果在: {output_dir}")
+            cap.release()
+            return
+
+        state = checkpoint or {
+            'video_path': os.path.abspath(video_path),
+            'fps': fps,
+            'frame_size': [frame_width, frame_height],
+            'next_frame': 0,
+            'video_segments': [],
+            'completed': False
+        }
+        # 上次中断后已经保存了关键点的帧，续跑时直接读取，不再检测
+        existing_frames = {num for num, _ in list_frame_files(output_dir)} if resume else set()
+        from annotation_renderer import AnnotationRenderer
+        renderer = AnnotationRenderer(coord_scale=PREPROCESS_SCALE)
+        landmarks = None
+        if motion_gate is not None:
+            motion_gate.reset()
+
+        # 跳过已完成的帧（grab 只解码不取出图像）
+        start_frame = state['next_frame']
+        while frame_count < start_frame and cap.grab():
+            frame_count += 1
+        if start_frame > 0:
+            print(f"从第 {start_frame} 帧继续处理，输出文件夹: {output_dir}")
+
+        # 创建视频写入器保存处理后的视频（分段，首次写帧时打开）
         fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(output_video_path, fourcc, fps, (frame_width, frame_height))
+        out = None
+        segment_frames = 0
+        finished = False
+
+        def close_segment():
+            # 关闭当前分段并记入检查点
+            nonlocal out, segment_frames
+            if out is not None:
+                out.release()
+                state['video_segments'].append({
+                    'file': f"processed_video_part{len(state['video_segments'])}.mp4",
+                    'frames': segment_frames
+                })
+                out = None
+                segment_frames = 0
         
-        while cap.isOpened():
-            success, frame = cap.read()
-            if not success:
-                print("视频读取完成或出错")
-                break
+        try:
+            while cap.isOpened():
+                success, frame = cap.read()
+                if not success:
+                    print("视频读取完成或出错")
+                    finished = True
+                    break
 
-            # 保存原始帧
-            original_frame = frame.copy()
-            
-            # 预处理用于显示和检测的帧
-            processed_frame = cv2.resize(frame, (0, 0), fx=0.8, fy=0.8)
-            processed_frame = cv2.convertScaleAbs(processed_frame, alpha=1.2, beta=10)
-            processed_frame = cv2.GaussianBlur(processed_frame, (3, 3), 0)
-            frame_rgb = cv2.cvtColor(processed_frame, cv2.COLOR_BGR2RGB)
-            #图像缩放 减少计算量，加快处理速度
-            #亮度和对比度调整 提高图像清晰度，便于检测关键点
-            #高斯模糊降噪 减少图像噪声
-            #颜色空间转换 将BGR格式转换为RGB格式 MediaPipe需要RGB格式的输入
-
-            # 处理图像
-            results = self.pose.process(frame_rgb)
-
-            if results.pose_landmarks:
-                # 在处理后的帧上绘制姿态标记
-                self.mp_draw.draw_landmarks(
-                    processed_frame,
-                    results.pose_landmarks,
-                    self.mp_pose.POSE_CONNECTIONS,
-                    landmark_drawing_spec=self.mp_drawing_styles.get_default_pose_landmarks_style()
-                )
-                
-                # 添加帧号信息
-                frame_info = f'Frame: {frame_count}'
-                cv2.putText(processed_frame, frame_info, (10, 30), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-                
-                # 保存坐标数据 - 使用原始尺寸
-                coordinates = []
-                for landmark in results.pose_landmarks.landmark:
-                    # 还原到原始尺寸
-                    x = landmark.x / 0.8  # 还原缩放
-                    y = landmark.y / 0.8
-                    coordinates.append({
-                        'x': x,
-                        'y': y,
-                        'z': landmark.z,
-                        'visibility': landmark.visibility
-                    })
-                
-                # 创建输出文件夹
-                if not os.path.exists(output_dir):
-                    os.makedirs(output_dir)
+                # 预处理用于显示和检测的帧
+                processed_frame, frame_rgb = preprocess_frame(frame)
+
+                if frame_count in existing_frames:
+                    # 关键点已存在，只重绘画面
+                    filename = os.path.join(output_dir, f'frame_{frame_count}.txt')
+                    frame_data = parse_frame_file(filename, verbose=False)
+                    has_pose = True
+                else:
+                    # 处理图像（启用运动门控时，静止帧沿用上一次的检测结果）
+                    carried_over_from = None
+                    if motion_gate is None or motion_gate.should_infer(processed_frame, frame_count):
+                        infer_start = time.perf_counter()
+                        landmarks = self.detect(frame_rgb)
+                        if motion_gate is not None:
+                            motion_gate.record_inference(time.perf_counter() - infer_start)
+                    else:
+                        carried_over_from = motion_gate.reference_frame
+                    has_pose = landmarks is not None
+
+                    if has_pose:
+                        # 只保存一次坐标数据，使用原始尺寸
+                        coordinates = landmarks_to_coordinates(landmarks)
+                        filename = os.path.join(output_dir, f'frame_{frame_count}.txt')
+                        write_frame_file(filename, coordinates, carried_over_from)
+                        frame_data = coordinates_to_frame(coordinates)
+
+                if has_pose:
+                    # 在处理后的帧上绘制姿态标记和帧号
+                    annotation = {'landmarks': frame_data, 'score': None, 'deductions': []}
+                    processed_frame = renderer.draw(processed_frame, frame_count, annotation)
+
+                    # 保存处理后的帧用于视频输出
+                    if out is None:
+                        segment_path = os.path.join(output_dir, f"processed_video_part{len(state['video_segments'])}.mp4")
+                        out = cv2.VideoWriter(segment_path, fourcc, fps, (frame_width, frame_height))
+                    resized_processed = cv2.resize(processed_frame, (frame_width, frame_height))
+                    out.write(resized_processed)
+                    segment_frames += 1
                     
-                # 只保存一次坐标数据，使用原始尺寸
-                filename = os.path.join(output_dir, f'frame_{frame_count}.txt')
-                with open(filename, 'w', encoding='utf-8') as f:
-                    for i, coord in enumerate(coordinates):
-                        body_part = self.BODY_PARTS.get(i, f"未知点{i}")
-                        f.write(f"{body_part}: x={coord['x']:.4f}, y={coord['y']:.4f}, z={coord['z']:.4f}, v={coord['visibility']:.4f}\n")
-
-                # 保存处理后的帧用于视频输出
-                resized_processed = cv2.resize(processed_frame, (frame_width, frame_height))
-                out.write(resized_processed)
-                
-                # 显示处理后的帧
-                cv2.imshow('Pose Detection', processed_frame)
-                
-            frame_count += 1
+                    # 显示处理后的帧
+                    cv2.imshow('Pose Detection', processed_frame)
+                    
+                frame_count += 1
 
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
+                # 定期写检查点：先关闭分段，分段与进度一起记录，保证记录的分段都可读
+                if frame_count % checkpoint_interval == 0:
+                    close_segment()
+                    state['next_frame'] = frame_count
+                    save_checkpoint(output_dir, state)
 
-        cap.release()
-        out.release()
-        cv2.destroyAllWindows()
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
+        finally:
+            # 正常结束、按 q 退出或出错时都记录进度，下次可从 frame_count 继续
+            cap.release()
+            close_segment()
+            state['next_frame'] = frame_count
+            save_checkpoint(output_dir, state)
+            cv2.destroyAllWindows()
+
+        if motion_gate is not None:
+            motion_gate.print_report()
+        if finished:
+            self._merge_video_segments(output_dir, state)
+            state['completed'] = True
+            save_checkpoint(output_dir, state)
+        else:
+            print(f"处理在第 {frame_count} 帧中断，可使用 resume=True 继续")
         print(f"坐标数据已保存到文件夹: {output_dir}")
+        return output_dir
+
+    def _merge_video_segments(self, output_dir, state):
+        """
+        将分段视频合并为 processed_video.mp4（不重新检测）
+        只有一段时直接改名；有 ffmpeg 时按流拼接，不重新编码；否则逐帧解码再编码
+        """
+        segments = [os.path.join(output_dir, segment['file']) for segment in state['video_segments']]
+        segments = [path for path in segments if os.path.exists(path)]
+        output_video_path = os.path.join(output_dir, 'processed_video.mp4')
+
+        if len(segments) == 1:
+            os.replace(segments[0], output_video_path)
+        elif segments and concat_videos(segments, output_video_path):
+            for path in segments:
+                os.remove(path)
+        elif segments:
+            frame_width, frame_height = state['frame_size']
+            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+            out = cv2.VideoWriter(output_video_path, fourcc, state['fps'], (frame_width, frame_height))
+            for path in segments:
+                cap = cv2.VideoCapture(path)
+                while True:
+                    success, frame = cap.read()
+                    if not success:
+                        break
+                    out.write(frame)
+                cap.release()
+            out.release()
+            for path in segments:
+                os.remove(path)
+        state['video_segments'] = []
+
+    def process_frame_cache(self, frame_cache, output_dir, batch_size=32):
+        """
+        在预解码帧缓存（见 frame_cache.py）上检测，关键点保存为 frame_N.txt，格式与 process_video 相同
+        直接读取内存映射中已预处理的 RGB 帧，不解码视频、不重复预处理；不输出处理后的视频
+        （需要时用 AnnotationRenderer 根据关键点重新渲染）
+        """
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+
+        start = time.perf_counter()
+        detected = 0
+        # 按批送入后端（onnx 后端一次推理一批，mediapipe 后端内部仍逐帧处理）
+        for batch_start in range(0, len(frame_cache), batch_size):
+            batch = frame_cache.frames[batch_start:batch_start + batch_size]
+            for frame_number, landmarks in enumerate(self.backend.process_batch(batch), batch_start):
+                if landmarks is not None:
+                    coordinates = landmarks_to_coordinates(landmarks)
+                    write_frame_file(os.path.join(output_dir, f'frame_{frame_number}.txt'), coordinates)
+                    detected += 1
+
+        seconds = time.perf_counter() - start
+        print(f"共 {len(frame_cache)} 帧，检测到姿态 {detected} 帧，用时 {seconds:.1f} 秒 "
+              f"({len(frame_cache) / seconds:.1f} 帧/秒)")
+        print(f"坐标数据已保存到文件夹: {output_dir}")
+        return output_dir
+
+    def process_image_folder(self, image_dir, output_dir=None, workers=None):
+        """
+        图片文件夹姿态检测：静态图片模式，多进程并行
+        每张图片独立检测（不做跨帧跟踪），结果按文件名中的帧号写为 frame_N.txt，
+        格式与 process_video 相同，可直接用于 load_sequence_data
+        """
+        from concurrent.futures import ProcessPoolExecutor
+        import multiprocessing
+
+        if not os.path.isdir(image_dir):
+            print(f"Error: 图片文件夹不存在: {image_dir}")
+            return
+
+        if output_dir is None:
+            output_dir = self.get_next_output_folder(os.path.dirname(os.path.abspath(image_dir)))
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+
+        tasks = []
+        for filename in sorted(os.listdir(image_dir)):
+            if not filename.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            frame_num = parse_image_frame_number(filename)
+            if frame_num is None:
+                print(f"跳过文件 {filename}: 无法解析帧号")
+                continue
+            tasks.append((os.path.join(image_dir, filename), frame_num, output_dir))
+
+        if not tasks:
+            print(f"在 {image_dir} 中没有找到图片")
+            return
+
+        workers = workers or os.cpu_count() or 1
+        start = time.perf_counter()
+        detected = []
+        missing = []
+        # 使用 spawn 启动工作进程，避免 fork 复制当前进程中已运行的 mediapipe 图
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_image_worker,
+                                 initargs=(self.backend_name, self.model_path)) as executor:
+            for frame_num, found, error in executor.map(_detect_image, tasks, chunksize=4):
+                if error:
+                    print(error)
+                (detected if found else missing).append(frame_num)
+
+        seconds = time.perf_counter() - start
+        print(f"共 {len(tasks)} 张图片，检测到姿态 {len(detected)} 张，用时 {seconds:.1f} 秒 "
+              f"({len(tasks) / seconds:.1f} 张/秒，{workers} 个进程)")
+        if missing:
+            print(f"未检测到姿态的帧: {sorted(missing)}")
+        print(f"坐标数据已保存到文件夹: {output_dir}")
+        return output_dir
+
     # 视频读取和预处理
     # 姿态检测
     # 关键点绘制
@@ -209,6 +532,8 @@ class PoseDetector:
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
 
+        from annotation_renderer import AnnotationRenderer
+        renderer = AnnotationRenderer(coord_scale=1.0)
         frame_count = 0
         processed_frames = []  # 记录已处理的帧
         
@@ -229,23 +554,16 @@ class PoseDetector:
                 print(f"已保存原始图片: {output_path}")
                 
                 # 预处理并尝试检测姿态
-                processed_frame = cv2.resize(frame, (0, 0), fx=0.8, fy=0.8)
-                processed_frame = cv2.convertScaleAbs(processed_frame, alpha=1.2, beta=10)
-                processed_frame = cv2.GaussianBlur(processed_frame, (3, 3), 0)
-                frame_rgb = cv2.cvtColor(processed_frame, cv2.COLOR_BGR2RGB)
+                processed_frame, frame_rgb = preprocess_frame(frame)
                 
-                results = self.pose.process(frame_rgb)
+                landmarks = self.detect(frame_rgb)
                 
                 # 保存姿态数据文件（无论是否检测到关键点）
                 data_path = os.path.join(output_dir, f'frame_{frame_count}_data.txt')
                 with open(data_path, 'w', encoding='utf-8') as f:
-                    if results.pose_landmarks:
+                    if landmarks is not None:
                         # 有关键点时保存坐标数据
-                        for i, landmark in enumerate(results.pose_landmarks.landmark):
-                            body_part = self.BODY_PARTS.get(i, f"未知点{i}")
-                            x = landmark.x / 0.8  # 还原缩放
-                            y = landmark.y / 0.8
-                            f.write(f"{body_part}: x={x:.4f}, y={y:.4f}, z={landmark.z:.4f}, v={landmark.visibility:.4f}\n")
+                        f.write(format_landmarks(landmarks_to_coordinates(landmarks)))
                         print(f"已保存姿态数据: {data_path}")
                     else:
                         # 无关键点时记录空数据
@@ -253,13 +571,9 @@ class PoseDetector:
                         print(f"警告: 第 {frame_count} 帧未检测到姿态关键点")
                 
                 # 在图片上绘制关键点（如果有）
-                if results.pose_landmarks:
-                    self.mp_draw.draw_landmarks(
-                        frame,
-                        results.pose_landmarks,
-                        self.mp_pose.POSE_CONNECTIONS,
-                        landmark_drawing_spec=self.mp_drawing_styles.get_default_pose_landmarks_style()
-                    )
+                if landmarks is not None:
+                    # 关键点相对预处理后的帧归一化，在原始帧上按相同比例绘制
+                    renderer.draw_skeleton(frame, coordinates_to_frame(landmarks))
                     
                     # 保存带标记的图片
                     marked_path = os.path.join(output_dir, f'frame_{frame_count}_marked.jpg')
@@ -280,7 +594,8 @@ class PoseDetector:
     # 指定帧提取
     # 姿态数据保存
     # 可视化结果输出
-    
+
+
 def main():
     detector = PoseDetector()
 
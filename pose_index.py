@@ -0,0 +1,186 @@
+import os
+import time
+import numpy as np
+from landmark_io import PART_INDEX, frames_to_array, parse_frame_file, parse_frame_number
+"""
+姿态最近邻索引：为低分关键帧检索档案中最相似的标准动作帧
+1. 每帧 33 个关键点的 (x, y) 以两髋中点为原点平移、以躯干长度（肩中点到髋中点）缩放，
+   得到与人物位置、远近无关的 66 维向量
+2. 主索引为 scipy 的 cKDTree，一次性批量构建
+3. 新插入的帧先放入缓冲区（查询时暴力计算），缓冲区超过主索引的一定比例后合并重建，
+   插入的均摊代价低，查询始终是 一次KD树查询 + 一次小矩阵运算
+"""
+
+# 归一化使用的关键点
+HIP_POINTS = (PART_INDEX['左髋'], PART_INDEX['右髋'])
+SHOULDER_POINTS = (PART_INDEX['左肩'], PART_INDEX['右肩'])
+
+# 可识别的帧数据文件名后缀：output*/frame_N.txt 与 selected_frames/frame_N_data.txt
+FRAME_FILE_SUFFIXES = ('.txt', '_data.txt')
+
+
+def normalize_poses(frame_array):
+    """
+    (帧数, 33, 4) 关键点数组 -> (帧数, 66) 归一化向量和有效帧掩码
+    关键点不全或躯干长度为0的帧无法归一化，掩码为 False
+    """
+    xy = frame_array[:, :, :2].astype(np.float64)
+    hip_center = xy[:, HIP_POINTS].mean(axis=1)
+    shoulder_center = xy[:, SHOULDER_POINTS].mean(axis=1)
+    torso = np.linalg.norm(shoulder_center - hip_center, axis=1)
+
+    valid = ~np.isnan(xy).any(axis=(1, 2)) & (torso > 1e-6)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        vectors = (xy - hip_center[:, None, :]) / torso[:, None, None]
+    return vectors.reshape(len(frame_array), -1), valid
+
+
+def load_frame_folder(folder):
+    """读取文件夹中的帧数据文件（frame_N.txt 或 frame_N_data.txt），返回 [(帧号, 帧数据)]"""
+    frames = []
+    for filename in os.listdir(folder):
+        for suffix in FRAME_FILE_SUFFIXES:
+            frame_num = parse_frame_number(filename, suffix=suffix)
+            if frame_num is not None:
+                frame_data = parse_frame_file(os.path.join(folder, filename), verbose=False)
+                if frame_data:
+                    frames.append((frame_num, frame_data))
+                break
+    frames.sort(key=lambda item: item[0])
+    return frames
+
+
+class PoseIndex:
+    def __init__(self, rebuild_ratio=0.1, min_rebuild=1024, leafsize=32):
+        self.rebuild_ratio = rebuild_ratio  # 缓冲区超过主索引该比例时重建
+        self.min_rebuild = min_rebuild      # 缓冲区至少积累这么多帧才重建
+        self.leafsize = leafsize
+
+        self.tree = None
+        self.vectors = np.empty((0, 66))    # 已建入主索引的向量
+        self.buffer = []                    # 尚未建入主索引的向量
+        self.refs = []                      # 帧引用 (来源, 帧号)，顺序为 主索引 + 缓冲区
+
+    def __len__(self):
+        return len(self.refs)
+
+    def build(self, frame_array, refs):
+        """
+        批量构建（覆盖已有内容）
+        frame_array: (帧数, 33, 4) 关键点数组；refs: 与之对应的帧引用列表
+        返回实际加入索引的帧数（无法归一化的帧被跳过）
+        """
+        vectors, valid = normalize_poses(frame_array)
+        self.vectors = vectors[valid]
+        self.refs = [ref for ref, ok in zip(refs, valid) if ok]
+        self.buffer = []
+        self._rebuild_tree()
+        return len(self.refs)
+
+    def insert(self, frame_data, ref):
+        """增量插入一帧，返回是否加入（关键点不全时不加入）"""
+        vectors, valid = normalize_poses(frames_to_array([frame_data]))
+        if not valid[0]:
+            return False
+        self.buffer.append(vectors[0])
+        self.refs.append(ref)
+        if len(self.buffer) >= max(self.min_rebuild, self.rebuild_ratio * len(self.vectors)):
+            self._merge_buffer()
+        return True
+
+    def add_folder(self, folder, source=None):
+        """把一个帧数据文件夹批量加入索引，返回加入的帧数"""
+        source = source or folder
+        frames = load_frame_folder(folder)
+        vectors, valid = normalize_poses(frames_to_array([frame_data for _, frame_data in frames]))
+        refs = [(source, frame_num) for (frame_num, _), ok in zip(frames, valid) if ok]
+
+        self._merge_buffer()
+        self.vectors = np.vstack([self.vectors, vectors[valid]])
+        self.refs.extend(refs)
+        self._rebuild_tree()
+        return len(refs)
+
+    def _merge_buffer(self):
+        if self.buffer:
+            self.vectors = np.vstack([self.vectors, np.array(self.buffer)])
+            self.buffer = []
+            self._rebuild_tree()
+
+    def _rebuild_tree(self):
+        from scipy.spatial import cKDTree
+
+        self.tree = cKDTree(self.vectors, leafsize=self.leafsize) if len(self.vectors) else None
+
+    def query(self, frame_data, k=5):
+        """
+        查询与该帧最相似的 k 帧
+        返回按距离升序的 [{'ref': (来源, 帧号), 'distance': 距离}]，关键点不全时返回空列表
+        """
+        vectors, valid = normalize_poses(frames_to_array([frame_data]))
+        if not valid[0]:
+            return []
+        return self.query_vectors(vectors, k)[0]
+
+    def query_vectors(self, vectors, k=5):
+        """批量查询已归一化的向量，返回每个向量的结果列表"""
+        results = [[] for _ in range(len(vectors))]
+        if self.tree is not None:
+            kk = min(k, len(self.vectors))
+            distances, indices = self.tree.query(vectors, k=kk)
+            distances = np.asarray(distances).reshape(len(vectors), kk)
+            indices = np.asarray(indices).reshape(len(vectors), kk)
+            for row, (row_distances, row_indices) in enumerate(zip(distances, indices)):
+                results[row] = list(zip(row_distances.tolist(), row_indices.tolist()))
+
+        if self.buffer:
+            # 缓冲区较小，直接计算距离
+            buffer = np.array(self.buffer)
+            offset = len(self.vectors)
+            buffer_distances = np.sqrt(((vectors[:, None, :] - buffer[None]) ** 2).sum(axis=2))
+            for row in range(len(vectors)):
+                results[row].extend((float(d), offset + i) for i, d in enumerate(buffer_distances[row]))
+
+        return [
+            [{'ref': self.refs[i], 'distance': d} for d, i in sorted(candidates)[:k]]
+            for candidates in results
+        ]
+
+    def save(self, path):
+        """保存为 .npz（重新加载时重建KD树）"""
+        self._merge_buffer()
+        sources = np.array([str(ref[0]) for ref in self.refs])
+        frame_numbers = np.array([ref[1] for ref in self.refs], dtype=np.int64)
+        np.savez(path, vectors=self.vectors, sources=sources, frame_numbers=frame_numbers)
+
+    def load(self, path):
+        with np.load(path) as data:
+            self.vectors = data['vectors']
+            self.refs = list(zip(data['sources'].tolist(), data['frame_numbers'].tolist()))
+        self.buffer = []
+        self._rebuild_tree()
+
+
+def main():
+    try:
+        index = PoseIndex()
+        for folder in ['selected_frames', 'output1']:
+            if os.path.isdir(folder):
+                start = time.perf_counter()
+                count = index.add_folder(folder)
+                print(f"{folder}: 加入 {count} 帧，用时 {time.perf_counter() - start:.2f} 秒")
+
+        if len(index) == 0:
+            print("索引为空，请先生成帧数据")
+            return
+
+        source, frame_num = index.refs[0]
+        frame_data = load_frame_folder(source)[0][1]
+        for match in index.query(frame_data, k=5):
+            print(f"{match['ref'][0]} 帧 {match['ref'][1]}: 距离 {match['distance']:.4f}")
+
+    except Exception as e:
+        print(f"程序执行出错: {str(e)}")
+
+if __name__ == "__main__":
+    main()
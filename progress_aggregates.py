@@ -0,0 +1,213 @@
+import json
+import sqlite3
+import numpy as np
+from landmark_store import DETAIL_COLUMNS
+"""
+运动员进步趋势的增量汇总
+每产生一份 analyze_sequence / score_sequence 结果就更新一次汇总：
+按 运动员 / 动作 / 指标 / 时间段（全部 'all' 与按月 'YYYY-MM'）保存
+    次数、均值、M2（Welford 流式方差）、最小值、最大值、固定分箱直方图、场次数
+一个场次先在内存中算出本场的小结，再用 Chan 合并公式并入已有汇总，
+每个指标只更新两行（全部 + 当月），更新代价与历史长度无关；趋势查询只读汇总表
+
+指标：关键帧详情中的数值字段（踢腿高度比、支撑腿角度、脚跟离地(0/1，均值即离地率)等）、
+关键帧得分 key_frame_score、场次总分 session_score
+"""
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS progress_aggregates (
+    athlete TEXT NOT NULL,
+    move TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    period TEXT NOT NULL,            -- 'all' 或 'YYYY-MM'
+    count INTEGER NOT NULL,
+    mean REAL NOT NULL,
+    m2 REAL NOT NULL,                -- 与均值差的平方和，方差 = m2 / (count - 1)
+    min REAL NOT NULL,
+    max REAL NOT NULL,
+    histogram TEXT NOT NULL,         -- 各分箱计数 JSON
+    sessions INTEGER NOT NULL,
+    PRIMARY KEY (athlete, move, metric, period)
+);
+'''
+
+# 指标直方图分箱：(下限, 上限, 分箱数)，超出范围的值计入两端的分箱
+# 单个关键帧得分为 0~100 分制，场次总分为 10 分制
+HISTOGRAM_BINS = {
+    'kick_height_ratio': (0.0, 2.0, 20),
+    'support_leg_angle': (90.0, 180.0, 18),
+    'kick_leg_angle': (0.0, 180.0, 18),
+    'is_heel_lifted': (0.0, 1.0, 2),
+    'front_knee_angle': (0.0, 180.0, 18),
+    'back_knee_angle': (0.0, 180.0, 18),
+    'key_frame_score': (0.0, 100.0, 20),
+    'session_score': (0.0, 10.0, 20)
+}
+
+
+def summarize_values(metric, values):
+    """计算一批数值的小结 (次数, 均值, M2, 最小值, 最大值, 直方图)"""
+    values = np.asarray(values, dtype=float)
+    low, high, bins = HISTOGRAM_BINS[metric]
+    positions = np.clip(((values - low) / (high - low) * bins).astype(int), 0, bins - 1)
+    histogram = np.bincount(positions, minlength=bins)
+    mean = float(values.mean())
+    return (len(values), mean, float(((values - mean) ** 2).sum()),
+            float(values.min()), float(values.max()), histogram)
+
+
+def merge_summaries(a, b):
+    """合并两份小结（Chan 等人的并行方差合并公式）"""
+    count_a, mean_a, m2_a, min_a, max_a, hist_a = a
+    count_b, mean_b, m2_b, min_b, max_b, hist_b = b
+    count = count_a + count_b
+    delta = mean_b - mean_a
+    mean = mean_a + delta * count_b / count
+    m2 = m2_a + m2_b + delta * delta * count_a * count_b / count
+    return count, mean, m2, min(min_a, min_b), max(max_a, max_b), np.asarray(hist_a) + np.asarray(hist_b)
+
+
+def session_metrics(analysis_result, score_result=None):
+    """
+    从一个场次的结果中收集各指标的取值 {指标: [值]}
+    NaN / inf（如关键点重合时的关节角度）不计入汇总
+    """
+    metrics = {}
+
+    def add(metric, value):
+        if value is not None and np.isfinite(value):
+            metrics.setdefault(metric, []).append(float(value))
+
+    for detail in analysis_result['details']:
+        for column in DETAIL_COLUMNS:
+            if column in HISTOGRAM_BINS:
+                add(column, detail.get(column))
+    for score_info in analysis_result['scores']:
+        add('key_frame_score', score_info['score'])
+    if score_result is not None:
+        add('session_score', score_result['score'])
+    return metrics
+
+
+class ProgressAggregates:
+    def __init__(self, db_path='landmarks.db', conn=None):
+        # 默认与 LandmarkStore 共用一个数据库文件；传入 conn 时共用其连接与事务
+        self.owns_connection = conn is None
+        if conn is None:
+            conn = sqlite3.connect(db_path)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+        self.conn = conn
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        if self.owns_connection:
+            self.conn.close()
+
+    def add_results(self, athlete, session_date, move, analysis_result, score_result=None):
+        """
+        用一个场次的结果更新汇总（单独一个事务）
+        session_date: ISO 日期 YYYY-MM-DD，按月汇总取前7位
+        汇总是增量合并的，同一场次的结果只能加入一次（LandmarkStore.add_results 会拒绝重复写入）
+        """
+        with self.conn:
+            self.update(athlete, session_date, move, analysis_result, score_result)
+
+    def update(self, athlete, session_date, move, analysis_result, score_result=None):
+        """同 add_results，但不提交事务，供 LandmarkStore 在写入场次的事务中调用"""
+        periods = ['all', session_date[:7]]
+        for metric, values in session_metrics(analysis_result, score_result).items():
+            summary = summarize_values(metric, values)
+            for period in periods:
+                self._merge(athlete, move, metric, period, summary)
+
+    def _merge(self, athlete, move, metric, period, summary):
+        row = self.conn.execute(
+            'SELECT * FROM progress_aggregates WHERE athlete = ? AND move = ? AND metric = ? AND period = ?',
+            (athlete, move, metric, period)
+        ).fetchone()
+        sessions = 1
+        if row is not None:
+            existing = (row['count'], row['mean'], row['m2'], row['min'], row['max'],
+                        json.loads(row['histogram']))
+            summary = merge_summaries(existing, summary)
+            sessions += row['sessions']
+
+        count, mean, m2, minimum, maximum, histogram = summary
+        self.conn.execute(
+            'INSERT OR REPLACE INTO progress_aggregates '
+            '(athlete, move, metric, period, count, mean, m2, min, max, histogram, sessions) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (athlete, move, metric, period, count, mean, m2, minimum, maximum,
+             json.dumps([int(c) for c in histogram]), sessions)
+        )
+
+    def _row_to_stats(self, row):
+        low, high, bins = HISTOGRAM_BINS[row['metric']]
+        return {
+            'period': row['period'],
+            'count': row['count'],
+            'sessions': row['sessions'],
+            'mean': row['mean'],
+            'std': (row['m2'] / (row['count'] - 1)) ** 0.5 if row['count'] > 1 else 0.0,
+            'min': row['min'],
+            'max': row['max'],
+            'histogram': json.loads(row['histogram']),
+            'bin_edges': np.linspace(low, high, bins + 1).tolist()
+        }
+
+    def summary(self, athlete, move, metric, period='all'):
+        """某一时间段的汇总统计，没有数据时返回 None"""
+        row = self.conn.execute(
+            'SELECT * FROM progress_aggregates WHERE athlete = ? AND move = ? AND metric = ? AND period = ?',
+            (athlete, move, metric, period)
+        ).fetchone()
+        return self._row_to_stats(row) if row is not None else None
+
+    def trend(self, athlete, move, metric, since=None, until=None):
+        """
+        按月的趋势（只读汇总表）
+        since / until: 'YYYY-MM'，闭区间
+        """
+        query = "SELECT * FROM progress_aggregates WHERE athlete = ? AND move = ? AND metric = ? AND period != 'all'"
+        params = [athlete, move, metric]
+        if since is not None:
+            query += ' AND period >= ?'
+            params.append(since)
+        if until is not None:
+            query += ' AND period <= ?'
+            params.append(until)
+        return [self._row_to_stats(row) for row in self.conn.execute(query + ' ORDER BY period', params)]
+
+    def athletes(self, move=None):
+        query = 'SELECT DISTINCT athlete FROM progress_aggregates'
+        params = []
+        if move is not None:
+            query += ' WHERE move = ?'
+            params.append(move)
+        return [row['athlete'] for row in self.conn.execute(query + ' ORDER BY athlete', params)]
+
+
+def main():
+    from datetime import date
+    import os
+    from main import load_sequence_data
+    from pose_analysis_tantui import PoseAnalyzer_tantui
+    from score_tantuidengtui import TanTuiDengTuiScorer
+
+    try:
+        frame_sequence = load_sequence_data(os.path.join(os.getcwd(), 'output1'), verbose=False)
+        analysis_result = PoseAnalyzer_tantui().analyze_sequence(frame_sequence)
+        score_result = TanTuiDengTuiScorer().score_sequence(analysis_result, frame_sequence)
+
+        aggregates = ProgressAggregates()
+        aggregates.add_results('默认运动员', date.today().isoformat(), 'tantui', analysis_result, score_result)
+        for point in aggregates.trend('默认运动员', 'tantui', 'kick_height_ratio'):
+            print(f"{point['period']}: 踢腿高度比 平均 {point['mean']:.2f} ± {point['std']:.2f}（{point['count']} 次）")
+        aggregates.close()
+
+    except Exception as e:
+        print(f"程序执行出错: {str(e)}")
+
+if __name__ == "__main__":
+    main()
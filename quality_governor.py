@@ -0,0 +1,96 @@
+from collections import deque
+import numpy as np
+"""
+实时模式的质量调节器
+持续统计每帧处理延迟，与帧预算比较，在预设的质量级别之间升降：
+- 最近 window 帧延迟的 P90 超过预算 -> 降一级（更小的输入、更紧的人物ROI、更低的模型复杂度）
+- P90 低于预算 * upgrade_ratio -> 升一级
+- 两个阈值之间不动作（滞回），每次调整后清空统计，必须重新积累满 window 帧才会再次调整
+- 从某一级因超预算降下来后，再升回该级需要等待的帧数翻倍（window * 2^失败次数），避免在两级之间来回抖动
+每次调整都会打印并记录在 changes 中
+"""
+
+# 质量级别，从高到低；roi_padding 为 None 表示检测整帧，否则按上一帧人物框外扩该比例裁剪
+DEFAULT_QUALITY_LEVELS = [
+    {'input_scale': 1.0, 'roi_padding': None, 'model_complexity': 1},
+    {'input_scale': 0.75, 'roi_padding': None, 'model_complexity': 1},
+    {'input_scale': 0.75, 'roi_padding': 0.5, 'model_complexity': 1},
+    {'input_scale': 0.75, 'roi_padding': 0.3, 'model_complexity': 0},
+    {'input_scale': 0.5, 'roi_padding': 0.2, 'model_complexity': 0}
+]
+
+
+def roi_from_landmarks(pose_landmarks, width, height, padding, min_visibility=0.5):
+    """
+    由上一帧关键点计算裁剪区域 (x0, y0, x1, y1)，人物框四周各外扩 框长边 * padding
+    没有可见关键点时返回整帧
+    """
+    points = np.array([[lm.x, lm.y] for lm in pose_landmarks.landmark
+                       if lm.visibility >= min_visibility])
+    if len(points) == 0:
+        return 0, 0, width, height
+
+    x_min, y_min = points.min(axis=0) * [width, height]
+    x_max, y_max = points.max(axis=0) * [width, height]
+    margin = max(x_max - x_min, y_max - y_min) * padding
+    x0 = int(max(0, x_min - margin))
+    y0 = int(max(0, y_min - margin))
+    x1 = int(min(width, x_max + margin))
+    y1 = int(min(height, y_max + margin))
+    if x1 - x0 < 32 or y1 - y0 < 32:
+        return 0, 0, width, height
+    return x0, y0, x1, y1
+
+
+class QualityGovernor:
+    def __init__(self, budget_ms, levels=None, window=30, upgrade_ratio=0.6, percentile=90):
+        self.budget_ms = budget_ms              # 每帧延迟预算
+        self.levels = levels or DEFAULT_QUALITY_LEVELS
+        self.window = window                    # 统计窗口（帧）
+        self.upgrade_ratio = upgrade_ratio      # 延迟低于 预算 * 该比例 时升级
+        self.percentile = percentile
+        self.level = 0
+        self.samples = deque(maxlen=window)
+        self.frames = 0
+        self.last_change = 0                    # 上次调整时的帧号
+        self.failures = [0] * len(self.levels)  # 每一级因超预算被降级的次数
+        self.changes = []                       # [(帧号, 原级别, 新级别, 统计延迟)]
+
+    @property
+    def settings(self):
+        return self.levels[self.level]
+
+    def record(self, latency_ms):
+        """记录一帧延迟，级别变化时返回新的设置，否则返回 None"""
+        self.frames += 1
+        self.samples.append(latency_ms)
+        if len(self.samples) < self.window:
+            return None
+
+        measured = float(np.percentile(self.samples, self.percentile))
+        new_level = self.level
+        if measured > self.budget_ms and self.level < len(self.levels) - 1:
+            new_level = self.level + 1
+        elif measured < self.budget_ms * self.upgrade_ratio and self.level > 0:
+            hold = self.window * 2 ** self.failures[self.level - 1]
+            if self.frames - self.last_change >= hold:
+                new_level = self.level - 1
+        if new_level == self.level:
+            return None
+
+        direction = '降低' if new_level > self.level else '提高'
+        print(f"质量调节: 第 {self.frames} 帧，延迟 P{self.percentile} {measured:.1f} ms / 预算 {self.budget_ms:.1f} ms，"
+              f"{direction}到级别 {new_level}: {self.levels[new_level]}")
+        self.changes.append((self.frames, self.level, new_level, measured))
+        if new_level > self.level:
+            self.failures[self.level] += 1
+        self.level = new_level
+        self.last_change = self.frames
+        self.samples.clear()
+        return self.settings
+
+    def stats(self):
+        return {
+            'quality_level': self.level,
+            'quality_changes': len(self.changes)
+        }
@@ -0,0 +1,138 @@
+import os
+import time
+import random
+import cv2
+from pose_detection import IMAGE_EXTENSIONS, parse_image_frame_number
+"""
+录像回放摄像头
+在没有摄像头的机器上，用录好的视频或图片文件夹模拟摄像头，接口与 cv2.VideoCapture 相同
+（isOpened / read / get / set / release），可直接替换 CameraDetector 的采集源：
+- 按原始帧率实时节拍输出，处理跟不上时与真实摄像头一样只给最新帧，过期的帧计为"超时丢弃"
+- 可选的到达抖动（毫秒）和随机丢帧比例，使用固定随机种子，多次运行结果可比较
+"""
+
+class ReplayCapture:
+    def __init__(self, source, fps=None, jitter_ms=0.0, drop_rate=0.0, realtime=True, seed=0):
+        self.source = source
+        self.jitter_ms = jitter_ms      # 每帧到达时间的随机延迟上限
+        self.drop_rate = drop_rate      # 模拟采集丢帧的比例
+        self.realtime = realtime        # False 时不等待，按顺序尽快输出（用于离线回归）
+        self.random = random.Random(seed)
+
+        self.cap = None
+        self.images = None
+        if os.path.isdir(source):
+            names = [f for f in os.listdir(source) if f.lower().endswith(IMAGE_EXTENSIONS)]
+            names.sort(key=lambda f: (parse_image_frame_number(f) is None, parse_image_frame_number(f) or 0, f))
+            self.images = [os.path.join(source, f) for f in names]
+            self.fps = fps or 30.0
+            self.frame_count = len(self.images)
+            first = cv2.imread(self.images[0]) if self.images else None
+            self.frame_size = (first.shape[1], first.shape[0]) if first is not None else (0, 0)
+        else:
+            self.cap = cv2.VideoCapture(source)
+            self.fps = fps or self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+            self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            self.frame_size = (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                               int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+
+        self.start_time = None
+        self.next_index = 0         # 下一个源帧序号
+        self.last_index = -1        # 最近输出的源帧序号
+        self.last_timestamp = None  # 最近输出帧的"采集"时刻（perf_counter）
+        self.delivered = 0
+        self.dropped = 0            # 模拟丢帧
+        self.late_skipped = 0       # 处理不及时被新帧覆盖的帧
+        self.opened = self.images is not None or self.cap.isOpened()
+
+    def isOpened(self):
+        return self.opened
+
+    def _skip_source_frame(self):
+        if self.cap is not None:
+            return self.cap.grab()
+        return self.next_index < len(self.images)
+
+    def _read_source_frame(self):
+        if self.cap is not None:
+            return self.cap.read()
+        if self.next_index >= len(self.images):
+            return False, None
+        frame = cv2.imread(self.images[self.next_index])
+        return frame is not None, frame
+
+    def read(self):
+        """按节拍返回下一帧，源结束时返回 (False, None)"""
+        if not self.opened:
+            return False, None
+        if self.start_time is None:
+            self.start_time = time.perf_counter()
+
+        while True:
+            if self.realtime:
+                # 当前时刻摄像头已经产生到第几帧，之前未取走的帧被覆盖
+                current = int((time.perf_counter() - self.start_time) * self.fps)
+                while self.next_index < current:
+                    if not self._skip_source_frame():
+                        return self._finish()
+                    self.next_index += 1
+                    self.late_skipped += 1
+
+            index = self.next_index
+            success, frame = self._read_source_frame()
+            if not success:
+                return self._finish()
+            self.next_index += 1
+
+            if self.drop_rate > 0 and self.random.random() < self.drop_rate:
+                self.dropped += 1
+                continue
+
+            due = self.start_time + index / self.fps
+            if self.jitter_ms > 0:
+                due += self.random.uniform(0, self.jitter_ms) / 1000.0
+            if self.realtime:
+                wait = due - time.perf_counter()
+                if wait > 0:
+                    time.sleep(wait)
+            else:
+                due = time.perf_counter()
+
+            self.last_index = index
+            self.last_timestamp = due
+            self.delivered += 1
+            return True, frame
+
+    def _finish(self):
+        self.opened = False
+        return False, None
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return self.frame_size[0]
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return self.frame_size[1]
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return self.frame_count
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return self.next_index
+        return 0
+
+    def set(self, prop, value):
+        # 与不支持该属性的摄像头一样忽略设置
+        return False
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+        self.opened = False
+
+    def stats(self):
+        return {
+            'source_frames': self.next_index,
+            'delivered': self.delivered,
+            'dropped': self.dropped,
+            'late_skipped': self.late_skipped
+        }
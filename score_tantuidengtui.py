@@ -9,28 +9,59 @@ class TanTuiDengTuiScorer:
             'min_knee_angle': 30,  # 最小屈膝角度(判断屈伸过程)
             'min_straight_angle': 165  # 最小伸直角度
         }
+        # 检查屈伸过程时回看的帧数
+        self.history_frames = 5
 
-    def score_sequence(self, analysis_result, frame_sequence):
-        """评分主函数"""
-        total_score = 10.0  # 满分10分
-        deductions = {
+    def score_sequence(self, analysis_result, frame_sequence, intervals=None):
+        """评分主函数
+        intervals: 只检查落在这些 (起始帧, 结束帧) 区间内的关键帧（如 action_segmentation 的踢腿区间）
+        """
+        deductions = self.new_deductions()
+
+        # 遍历每个关键帧的详细信息
+        for detail in analysis_result['details']:
+            if intervals is not None and not any(start <= detail['frame_index'] < end
+                                                 for start, end in intervals):
+                continue
+            self.score_key_frame(detail, frame_sequence, deductions)
+
+        return self.summarize(deductions)
+
+    def align_to_reference(self, reference, frame_sequence, analysis_result=None):
+        """
+        整段演练与标准动作模板对齐（带状DTW），作为关键帧评分的补充
+        返回逐身体部位、逐动作片段的平均角度偏差，见 template_alignment.TemplateAligner.align
+        """
+        from template_alignment import TemplateAligner
+        return TemplateAligner().align(frame_sequence, reference, analysis_result)
+
+    def new_deductions(self):
+        """创建空的扣分记录"""
+        return {
             'specs': [],  # 规格扣分
             'errors': [],  # 错误扣分
             'performance': []  # 演练扣分
         }
 
-        # 遍历每个关键帧的详细信息
-        for detail in analysis_result['details']:
-            frame_idx = detail['frame_index']
-            frame_data = frame_sequence[frame_idx]
-            
-            # 1. 检查规格要求
-            specs = self._check_specifications(detail, frame_data)
-            deductions['specs'].extend(specs)
-            
-            # 2. 检查动作错误
-            errors = self._check_errors(detail, frame_sequence, frame_idx)
-            deductions['errors'].extend(errors)
+    def score_key_frame(self, detail, frame_sequence, deductions):
+        """
+        检查单个关键帧并把扣分项追加到 deductions
+        frame_sequence 只需支持访问 [frame_index - history_frames, frame_index] 范围内的帧
+        """
+        frame_idx = detail['frame_index']
+        frame_data = frame_sequence[frame_idx]
+        
+        # 1. 检查规格要求
+        specs = self._check_specifications(detail, frame_data)
+        deductions['specs'].extend(specs)
+        
+        # 2. 检查动作错误
+        errors = self._check_errors(detail, frame_sequence, frame_idx)
+        deductions['errors'].extend(errors)
+
+    def summarize(self, deductions):
+        """根据累计的扣分项计算最终得分"""
+        total_score = 10.0  # 满分10分
 
         # 计算规格扣分
         specs_count = len(deductions['specs'])
@@ -128,7 +159,7 @@ class TanTuiDengTuiScorer:
     def _check_bend_straight_process(self, frame_sequence, current_idx):
         """检查是否有屈伸过程"""
         # 检查前5帧的角度变化
-        start_idx = max(0, current_idx - 5)
+        start_idx = max(0, current_idx - self.history_frames)
         sequence = frame_sequence[start_idx:current_idx + 1]
         
         min_angle = float('inf')
@@ -0,0 +1,318 @@
+import os
+import time
+import queue
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+"""
+解码进程与推理进程之间的共享内存帧环
+固定数量的帧槽位放在一块 multiprocessing.shared_memory 中：
+- 解码进程从 free 队列取空闲槽位，把视频帧直接解码进槽位
+- 推理进程从 ready 队列取 (槽位, 帧号)，原地读取槽位中的帧做预处理并送入 pose.process
+- 队列里只传递槽位编号，帧数据不经过 pickle，也不在进程间复制
+- 空闲槽位用完时解码进程阻塞等待，形成背压，内存占用固定为 slots 帧
+"""
+
+def _attach_shared_memory(name):
+    """按名称映射已有共享内存，由创建方负责释放"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python 3.13 之前没有 track 参数；子进程与父进程共用同一个资源跟踪进程，重复登记不影响释放
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedFrameRing:
+    def __init__(self, slots, frame_shape, dtype=np.uint8):
+        self.slots = slots
+        self.frame_shape = tuple(frame_shape)
+        self.dtype = np.dtype(dtype)
+        self.frame_nbytes = int(np.prod(self.frame_shape)) * self.dtype.itemsize
+
+        self.shm = shared_memory.SharedMemory(create=True, size=self.frame_nbytes * slots)
+        self.owner = True
+        self.free_slots = mp.Queue()
+        self.ready_slots = mp.Queue()
+        for slot in range(slots):
+            self.free_slots.put(slot)
+        self._attach_frames()
+
+    def _attach_frames(self):
+        buffer = np.ndarray((self.slots,) + self.frame_shape, dtype=self.dtype, buffer=self.shm.buf)
+        self.frames = [buffer[slot] for slot in range(self.slots)]
+
+    def __getstate__(self):
+        # 传给子进程时只传共享内存名称和队列，子进程按名称重新映射
+        state = self.__dict__.copy()
+        state['shm_name'] = self.shm.name
+        del state['shm']
+        del state['frames']
+        return state
+
+    def __setstate__(self, state):
+        shm_name = state.pop('shm_name')
+        self.__dict__.update(state)
+        self.shm = _attach_shared_memory(shm_name)
+        self.owner = False
+        self._attach_frames()
+
+    def frame(self, slot):
+        """返回槽位对应的帧数组（共享内存视图，不复制）"""
+        return self.frames[slot]
+
+    def acquire(self, timeout=None):
+        """取一个空闲槽位，全部占用时阻塞（背压）"""
+        return self.free_slots.get(timeout=timeout)
+
+    def publish(self, slot, frame_number):
+        """槽位写入完成，交给推理进程"""
+        self.ready_slots.put((slot, frame_number))
+
+    def finish(self, consumers):
+        """通知所有消费者没有更多帧"""
+        for _ in range(consumers):
+            self.ready_slots.put(None)
+
+    def next_ready(self, timeout=None):
+        """取下一帧的 (槽位, 帧号)，结束时返回 None"""
+        return self.ready_slots.get(timeout=timeout)
+
+    def release(self, slot):
+        """槽位数据已用完，归还给解码进程"""
+        self.free_slots.put(slot)
+
+    def close(self):
+        self.frames = []
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def probe_video(video_path):
+    """读取视频帧尺寸 (高, 宽, 3)"""
+    import cv2
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError(f"无法打开视频文件: {video_path}")
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    cap.release()
+    return (height, width, 3)
+
+
+def decode_worker(video_path, ring, consumers):
+    """解码进程：把视频帧直接解码到共享内存槽位"""
+    import cv2
+
+    cap = cv2.VideoCapture(video_path)
+    frame_number = 0
+    try:
+        while True:
+            slot = ring.acquire()
+            view = ring.frame(slot)
+            success, frame = cap.read(view)
+            if not success:
+                ring.release(slot)
+                break
+            if frame is not view and not np.shares_memory(frame, view):
+                # 解码器未能使用传入的缓冲区时退回为一次拷贝
+                np.copyto(view, frame)
+            ring.publish(slot, frame_number)
+            frame_number += 1
+    finally:
+        cap.release()
+        ring.finish(consumers)
+
+
+def inference_worker(ring, results):
+    """推理进程：原地读取槽位帧，预处理后立即归还槽位，再做姿态检测"""
+    try:
+        from pose_detection import PoseDetector, preprocess_frame, landmarks_to_coordinates
+
+        # 每个推理进程只分到间隔的若干帧，帧间不连续，不能使用视频模式的跨帧跟踪和平滑
+        detector = PoseDetector(static_image_mode=True)
+        while True:
+            item = ring.next_ready()
+            if item is None:
+                break
+            slot, frame_number = item
+
+            # 预处理生成新的缩小帧，原始帧槽位此后即可复用；出错时也要归还，否则解码进程会一直等待
+            try:
+                _, frame_rgb = preprocess_frame(ring.frame(slot))
+            finally:
+                ring.release(slot)
+
+            landmarks = detector.detect(frame_rgb)
+            coordinates = None
+            if landmarks is not None:
+                coordinates = landmarks_to_coordinates(landmarks)
+            results.put((frame_number, coordinates))
+    finally:
+        # 异常退出时同样发出结束标记，主进程不会一直等待这个进程的结果
+        results.put(None)
+
+
+def _stop_processes(processes, timeout=5.0):
+    """等待进程结束，超时仍未结束的强制终止"""
+    for process in processes:
+        process.join(timeout)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+
+
+def process_video_parallel(video_path, output_dir, workers=None, slots=None):
+    """
+    多进程姿态检测：1个解码进程 + workers 个推理进程，通过共享内存帧环传递帧
+    关键点按 frame_N.txt 格式写入 output_dir，返回统计信息；任一进程异常退出时返回 None
+    推理进程各自以静态图片模式运行 PoseDetector，没有跨帧的平滑/跟踪
+    """
+    from landmark_io import write_frame_file
+
+    workers = workers or max(1, (os.cpu_count() or 2) - 1)
+    slots = slots or workers * 2
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    ring = SharedFrameRing(slots, probe_video(video_path))
+    results = mp.Queue()
+    start = time.perf_counter()
+
+    decoder = mp.Process(target=decode_worker, args=(video_path, ring, workers))
+    consumers = [mp.Process(target=inference_worker, args=(ring, results)) for _ in range(workers)]
+    decoder.start()
+    for consumer in consumers:
+        consumer.start()
+
+    frames = detected = 0
+    finished = 0
+    try:
+        while finished < workers:
+            try:
+                item = results.get(timeout=1.0)
+            except queue.Empty:
+                # 进程被强制结束（未能发出结束标记）时不再等待：
+                # 推理进程全部退出，或解码进程异常退出（推理进程收不到结束标记）
+                if not any(consumer.is_alive() for consumer in consumers):
+                    break
+                if not decoder.is_alive() and decoder.exitcode != 0:
+                    break
+                continue
+            if item is None:
+                finished += 1
+                continue
+            frame_number, coordinates = item
+            frames += 1
+            if coordinates is not None:
+                detected += 1
+                write_frame_file(os.path.join(output_dir, f'frame_{frame_number}.txt'), coordinates)
+    finally:
+        # 推理进程全部失败时解码进程会阻塞在取空闲槽位上，这里不会等到它自己退出
+        _stop_processes(consumers + [decoder])
+        ring.close()
+
+    failed = [process for process in [decoder] + consumers if process.exitcode != 0]
+    if failed:
+        print(f"Error: {len(failed)} 个解码/推理进程异常退出"
+              f"（退出码 {[process.exitcode for process in failed]}），已处理 {frames} 帧，结果不完整")
+        return None
+
+    seconds = time.perf_counter() - start
+    stats = {
+        'frames': frames,
+        'detected': detected,
+        'seconds': seconds,
+        'fps': frames / seconds if seconds > 0 else 0.0
+    }
+    print(f"处理 {frames} 帧（检测到姿态 {detected} 帧），{stats['fps']:.1f} 帧/秒，结果保存到: {output_dir}")
+    return stats
+
+
+def _queue_producer(frame_shape, count, frames_queue):
+    frame = np.zeros(frame_shape, dtype=np.uint8)
+    for i in range(count):
+        frame[0, 0, 0] = i % 256
+        frames_queue.put(frame)  # 每帧整体 pickle 并跨进程复制
+    frames_queue.put(None)
+
+
+def _queue_consumer(frames_queue, done):
+    checksum = 0
+    while True:
+        frame = frames_queue.get()
+        if frame is None:
+            break
+        checksum += int(frame[0, 0, 0])
+    done.put(checksum)
+
+
+def _ring_producer(frame_shape, count, ring):
+    for i in range(count):
+        slot = ring.acquire()
+        view = ring.frame(slot)
+        view[0, 0, 0] = i % 256  # 模拟解码器写入槽位
+        ring.publish(slot, i)
+    ring.finish(1)
+
+
+def _ring_consumer(ring, done):
+    checksum = 0
+    while True:
+        item = ring.next_ready()
+        if item is None:
+            break
+        slot, _ = item
+        checksum += int(ring.frame(slot)[0, 0, 0])
+        ring.release(slot)
+    done.put(checksum)
+
+
+def benchmark_transport(frame_shape=(1080, 1920, 3), count=300, slots=8):
+    """
+    对比两种跨进程传帧方式的吞吐量（只测传输，不含解码和推理）
+    - queue: 帧数组通过 multiprocessing.Queue 传递（pickle + 复制）
+    - ring:  共享内存帧环，只传槽位编号
+    """
+    report = {}
+
+    frames_queue = mp.Queue(maxsize=slots)  # 同样限制在途帧数
+    done = mp.Queue()
+    start = time.perf_counter()
+    producer = mp.Process(target=_queue_producer, args=(frame_shape, count, frames_queue))
+    consumer = mp.Process(target=_queue_consumer, args=(frames_queue, done))
+    producer.start()
+    consumer.start()
+    done.get()
+    producer.join()
+    consumer.join()
+    report['queue'] = count / (time.perf_counter() - start)
+
+    ring = SharedFrameRing(slots, frame_shape)
+    start = time.perf_counter()
+    producer = mp.Process(target=_ring_producer, args=(frame_shape, count, ring))
+    consumer = mp.Process(target=_ring_consumer, args=(ring, done))
+    producer.start()
+    consumer.start()
+    done.get()
+    producer.join()
+    consumer.join()
+    report['ring'] = count / (time.perf_counter() - start)
+    ring.close()
+
+    print(f"帧尺寸 {frame_shape}，{count} 帧：")
+    print(f"  Queue 传帧: {report['queue']:.1f} 帧/秒")
+    print(f"  共享内存帧环: {report['ring']:.1f} 帧/秒")
+    return report
+
+
+def main():
+    benchmark_transport()
+
+    video_path = '1.mp4'
+    if os.path.exists(video_path):
+        process_video_parallel(video_path, os.path.join(os.path.dirname(os.path.abspath(video_path)), 'output_parallel'))
+
+if __name__ == "__main__":
+    main()
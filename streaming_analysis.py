@@ -0,0 +1,111 @@
+import os
+from collections import deque
+"""
+流式分析：逐帧读取 → 关键帧检测 → 评分，内存中只保留有限的回看窗口
+适用于数小时的长时间训练录像，峰值内存与序列长度无关，结果与一次性加载的分析结果一致
+
+窗口大小 = 分析器的 consecutive_frames（关键帧在最近这几帧中选出）
+         + 评分器的 history_frames（评分时回看关键帧之前的帧）
+"""
+
+class FrameWindow:
+    """
+    按绝对帧下标访问的有界回看窗口
+    只保留最近 size 帧，访问已移出窗口的帧会抛出 IndexError
+    """
+    def __init__(self, size):
+        self.size = size
+        self.frames = deque(maxlen=size)
+        self.end = 0  # 下一帧的绝对下标
+
+    def append(self, frame_data):
+        self.frames.append(frame_data)
+        self.end += 1
+
+    @property
+    def start(self):
+        return self.end - len(self.frames)
+
+    def __len__(self):
+        # 与列表一致，长度为已读入的总帧数
+        return self.end
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.end)
+            return [self[i] for i in range(start, stop, step)]
+        if index < 0:
+            index += self.end
+        if not self.start <= index < self.end:
+            raise IndexError(f"帧 {index} 不在回看窗口 [{self.start}, {self.end}) 内")
+        return self.frames[index - self.start]
+
+
+def window_size_for(analyzer, scorer=None):
+    """根据分析器和评分器的回看需求计算窗口大小"""
+    size = analyzer.consecutive_frames
+    if scorer is not None:
+        size += scorer.history_frames
+    return size
+
+
+def analyze_stream(frames, analyzer, scorer=None):
+    """
+    流式分析帧迭代器
+    frames: 按顺序产生帧数据的可迭代对象（如 main.iter_sequence_data）
+    返回 (分析结果, 评分结果或None)，格式分别与 analyze_sequence / score_sequence 相同
+    """
+    if getattr(analyzer, 'key_frame_mode', 'consecutive') == 'peak':
+        raise ValueError("峰值关键帧检测需要整段序列，流式分析仅支持 'consecutive' 模式")
+
+    window = FrameWindow(window_size_for(analyzer, scorer))
+    analysis_result = {
+        'key_frames': [],
+        'scores': [],
+        'details': []
+    }
+    deductions = scorer.new_deductions() if scorer is not None else None
+
+    analyzer.reset_detection()
+    for i, frame_data in enumerate(frames):
+        window.append(frame_data)
+
+        best_frame_idx = analyzer.update_key_frame(i, window)
+        if best_frame_idx is None or best_frame_idx in analysis_result['key_frames']:
+            continue
+
+        # 关键帧一定位于最近 consecutive_frames 帧内，此时仍在窗口中
+        key_frame_result = analyzer.build_analysis_result(window, [best_frame_idx])
+        for key in analysis_result:
+            analysis_result[key].extend(key_frame_result[key])
+
+        if scorer is not None:
+            for detail in key_frame_result['details']:
+                scorer.score_key_frame(detail, window, deductions)
+
+    score_result = scorer.summarize(deductions) if scorer is not None else None
+    return analysis_result, score_result
+
+
+def main():
+    from main import iter_sequence_data
+    from pose_analysis_tantui import PoseAnalyzer_tantui
+    from score_tantuidengtui import TanTuiDengTuiScorer
+
+    try:
+        output_folder = os.path.join(os.getcwd(), 'output1')
+        analysis_result, score_result = analyze_stream(
+            iter_sequence_data(output_folder),
+            PoseAnalyzer_tantui(),
+            TanTuiDengTuiScorer()
+        )
+
+        for score_info in analysis_result['scores']:
+            print(f"帧 {score_info['frame_index']}: 得分 {score_info['score']:.2f}")
+        print(f"总分: {score_result['score']:.1f}")
+
+    except Exception as e:
+        print(f"程序执行出错: {str(e)}")
+
+if __name__ == "__main__":
+    main()
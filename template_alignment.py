@@ -0,0 +1,255 @@
+import os
+import time
+import numpy as np
+from landmark_io import PART_INDEX, frames_to_array
+"""
+与标准动作模板的整段对齐（带状动态时间规整 DTW）
+关键帧评分只看孤立的几帧，这里把整段演练与师傅的标准录像逐帧对齐：
+1. 每帧计算一组关节角度（0-180度），除以180归一化为特征向量
+2. 在宽度为 window 的斜向带内做 DTW，逐行向量化：
+   行内递推 D[j] = min(E[j], D[j-1] + c[j]) 用前缀和 + minimum.accumulate 一次算完，
+   总复杂度 O(n·w)，1000 帧的套路约 20 毫秒
+3. 沿最优路径统计每个关节、每个身体部位、每个动作片段的平均角度偏差（度）
+"""
+
+# 关节角度定义：关节名 -> (端点1, 顶点, 端点2)
+JOINT_ANGLES = {
+    '左膝': ('左髋', '左膝', '左踝'),
+    '右膝': ('右髋', '右膝', '右踝'),
+    '左髋': ('左肩', '左髋', '左膝'),
+    '右髋': ('右肩', '右髋', '右膝'),
+    '左肘': ('左肩', '左肘', '左手腕'),
+    '右肘': ('右肩', '右肘', '右手腕'),
+    '左肩': ('左肘', '左肩', '左髋'),
+    '右肩': ('右肘', '右肩', '右髋')
+}
+JOINT_NAMES = list(JOINT_ANGLES)
+
+# 身体部位 -> 所含关节
+BODY_PART_JOINTS = {
+    '左腿': ['左膝', '左髋'],
+    '右腿': ['右膝', '右髋'],
+    '左臂': ['左肘', '左肩'],
+    '右臂': ['右肘', '右肩']
+}
+
+
+def joint_angle_features(frame_array):
+    """
+    由 (帧数, 33, 4) 关键点数组计算 (帧数, 关节数) 的归一化关节角度
+    缺失的关键点沿时间线性插值，整列缺失时取 0.5（90度）
+    """
+    xyz = frame_array[:, :, :3].astype(np.float64)
+    features = np.empty((len(frame_array), len(JOINT_NAMES)))
+    for j, name in enumerate(JOINT_NAMES):
+        a, b, c = (PART_INDEX[part] for part in JOINT_ANGLES[name])
+        ba = xyz[:, a] - xyz[:, b]
+        bc = xyz[:, c] - xyz[:, b]
+        norm = np.linalg.norm(ba, axis=1) * np.linalg.norm(bc, axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cosine = np.clip(np.sum(ba * bc, axis=1) / norm, -1.0, 1.0)
+        features[:, j] = np.degrees(np.arccos(cosine)) / 180.0
+
+    # 缺失值插值
+    frames = np.arange(len(features))
+    for j in range(features.shape[1]):
+        column = features[:, j]
+        valid = np.isfinite(column)
+        if not valid.any():
+            column[:] = 0.5
+        elif not valid.all():
+            column[~valid] = np.interp(frames[~valid], frames[valid], column[valid])
+    return features
+
+
+def sequence_features(frame_sequence):
+    """帧数据列表 -> 归一化关节角度特征"""
+    return joint_angle_features(frames_to_array(frame_sequence))
+
+
+def _band(n, m, window):
+    """每行允许的列范围 [lo, hi)，带中心沿对角线 j = i·(m-1)/(n-1)"""
+    # 保证相邻行的带相互衔接，路径一定能到达终点
+    window = max(window, int(np.ceil(m / n)) + 1)
+    center = np.round(np.arange(n) * ((m - 1) / max(n - 1, 1))).astype(int)
+    lo = np.clip(center - window, 0, m - 1)
+    hi = np.clip(center + window + 1, 1, m)
+    return lo, hi
+
+
+def banded_dtw(query, reference, window=None):
+    """
+    带状 DTW
+    query: (n, d) 特征，reference: (m, d) 特征
+    window: 带半宽（帧），默认取较长序列的 10%
+    返回 (总代价, 路径 [(query下标, reference下标)], 逐步代价)
+    """
+    n, m = len(query), len(reference)
+    if n == 0 or m == 0:
+        raise ValueError("序列为空，无法对齐")
+    if window is None:
+        window = max(n, m) // 10
+    lo, hi = _band(n, m, window)
+    width = int((hi - lo).max())
+
+    # 一次性计算带内全部局部代价，cost[i, k] 对应列 lo[i] + k
+    lengths = hi - lo
+    cols = np.minimum(lo[:, None] + np.arange(width), m - 1)
+    cost = np.sqrt(np.sum((reference[cols] - query[:, None, :]) ** 2, axis=2))
+
+    # 只保存带内的累计代价，D[i, k] 对应列 lo[i] + k
+    D = np.full((n, width), np.inf)
+    D[0, :lengths[0]] = np.cumsum(cost[0, :lengths[0]])  # 第一行只能从左侧走过来
+    for i in range(1, n):
+        length = lengths[i]
+        row_cost = cost[i, :length]
+
+        # 上一行补 inf 后按带起点的偏移切片（带的起点单调不减）
+        shift = lo[i] - lo[i - 1]
+        padded = np.concatenate(([np.inf], D[i - 1, :lengths[i - 1]], np.full(length, np.inf)))
+        from_diagonal = padded[shift:shift + length]
+        from_above = padded[shift + 1:shift + 1 + length]
+        entry = row_cost + np.minimum(from_above, from_diagonal)
+
+        # 行内递推 D[j] = min(entry[j], D[j-1] + cost[j])
+        # 展开为 D[j] = C[j] + min_{k<=j}(entry[k] - C[k])，C 为 cost 的前缀和
+        prefix = np.cumsum(row_cost)
+        D[i, :length] = prefix + np.minimum.accumulate(entry - prefix)
+
+    total_cost = D[n - 1, m - 1 - lo[n - 1]]
+    path = _backtrack(D, lo, hi, n, m)
+    step_costs = np.sqrt(np.sum((query[[p[0] for p in path]] - reference[[p[1] for p in path]]) ** 2, axis=1))
+    return float(total_cost), path, step_costs
+
+
+def _backtrack(D, lo, hi, n, m):
+    """从终点回溯最优路径"""
+    def value(i, j):
+        if i < 0 or j < lo[i] or j >= hi[i]:
+            return np.inf
+        return D[i, j - lo[i]]
+
+    i, j = n - 1, m - 1
+    path = [(i, j)]
+    while i > 0 or j > 0:
+        candidates = [
+            (value(i - 1, j - 1), i - 1, j - 1),
+            (value(i - 1, j), i - 1, j),
+            (value(i, j - 1), i, j - 1)
+        ]
+        _, i, j = min(candidates, key=lambda item: item[0])
+        path.append((i, j))
+    path.reverse()
+    return path
+
+
+def segments_from_key_frames(key_frames, length):
+    """
+    以关键帧为中心划分动作片段：相邻关键帧的中点为分界
+    没有关键帧时整段作为一个片段
+    返回 [(名称, 起始帧, 结束帧(不含))]
+    """
+    key_frames = sorted(key_frames)
+    if not key_frames:
+        return [('全程', 0, length)]
+    bounds = [0] + [(a + b + 1) // 2 for a, b in zip(key_frames, key_frames[1:])] + [length]
+    return [(f'动作{k + 1}', bounds[k], bounds[k + 1]) for k in range(len(key_frames))]
+
+
+class TemplateAligner:
+    def __init__(self, window_ratio=0.1, min_window=10):
+        self.window_ratio = window_ratio  # 带宽占较长序列长度的比例
+        self.min_window = min_window      # 最小带半宽（帧）
+
+    def save_reference(self, path, frame_sequence):
+        """由标准动作帧序列生成模板并保存为 .npz"""
+        np.savez_compressed(path, features=sequence_features(frame_sequence),
+                            joints=np.array(JOINT_NAMES))
+
+    def load_reference(self, path):
+        """读取模板特征，关节顺序与当前定义不一致时报错"""
+        with np.load(path) as data:
+            if list(data['joints']) != JOINT_NAMES:
+                raise ValueError(f"模板关节定义与当前版本不一致: {path}")
+            return data['features']
+
+    def align(self, frame_sequence, reference, analysis_result=None):
+        """
+        将演练序列与模板对齐
+        reference: 模板特征数组，或 load_reference 可读取的 .npz 路径
+        analysis_result: analyze_sequence 的结果，用其中的关键帧划分动作片段
+        返回总代价、每步平均代价、逐关节/逐部位/逐片段的平均角度偏差（度）
+        """
+        if isinstance(reference, (str, os.PathLike)):
+            reference = self.load_reference(reference)
+
+        query = sequence_features(frame_sequence)
+        start = time.perf_counter()
+        window = max(self.min_window, int(max(len(query), len(reference)) * self.window_ratio))
+        total_cost, path, step_costs = banded_dtw(query, reference, window)
+
+        path_query = np.array([p[0] for p in path])
+        path_reference = np.array([p[1] for p in path])
+        joint_errors = np.abs(query[path_query] - reference[path_reference]) * 180.0  # (路径长度, 关节数)
+
+        joints = {name: float(joint_errors[:, j].mean()) for j, name in enumerate(JOINT_NAMES)}
+        body_parts = {
+            part: float(np.mean([joints[name] for name in names]))
+            for part, names in BODY_PART_JOINTS.items()
+        }
+
+        key_frames = analysis_result['key_frames'] if analysis_result else []
+        segments = []
+        for name, seg_start, seg_end in segments_from_key_frames(key_frames, len(query)):
+            mask = (path_query >= seg_start) & (path_query < seg_end)
+            if not mask.any():
+                continue
+            segments.append({
+                'name': name,
+                'start': seg_start,
+                'end': seg_end,
+                'reference_start': int(path_reference[mask].min()),
+                'reference_end': int(path_reference[mask].max()) + 1,
+                'cost': float(step_costs[mask].mean()),
+                'mean_angle_error': float(joint_errors[mask].mean())
+            })
+
+        return {
+            'total_cost': total_cost,
+            'mean_cost': float(step_costs.mean()),
+            'mean_angle_error': float(joint_errors.mean()),
+            'joints': joints,
+            'body_parts': body_parts,
+            'segments': segments,
+            'path': path,
+            'window': window,
+            'seconds': time.perf_counter() - start  # 对齐与统计耗时（不含特征提取）
+        }
+
+
+def main():
+    from main import load_sequence_data
+    from pose_analysis_tantui import PoseAnalyzer_tantui
+
+    try:
+        reference_path = 'reference_tantui.npz'
+        aligner = TemplateAligner()
+        frame_sequence = load_sequence_data(os.path.join(os.getcwd(), 'output1'), verbose=False)
+        if not os.path.exists(reference_path):
+            aligner.save_reference(reference_path, frame_sequence)
+            print(f"模板已保存: {reference_path}")
+
+        analysis_result = PoseAnalyzer_tantui().analyze_sequence(frame_sequence)
+        result = aligner.align(frame_sequence, reference_path, analysis_result)
+
+        print(f"对齐完成，用时 {result['seconds'] * 1000:.1f} ms，平均角度偏差 {result['mean_angle_error']:.1f} 度")
+        for part, error in result['body_parts'].items():
+            print(f"  {part}: {error:.1f} 度")
+        for segment in result['segments']:
+            print(f"  {segment['name']} 帧 {segment['start']}-{segment['end']}: 偏差 {segment['mean_angle_error']:.1f} 度")
+
+    except Exception as e:
+        print(f"程序执行出错: {str(e)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+from action_segmentation import KICK_LABELS, ActionSegmenter, intervals, summarize_segments
+
+
+def check_tiling(result, length):
+    """区间首尾相接覆盖整段序列，逐帧标签与区间一致"""
+    segments = result['segments']
+    assert segments[0]['start'] == 0 and segments[-1]['end'] == length
+    for previous, segment in zip(segments, segments[1:]):
+        assert segment['start'] == previous['end']
+        assert segment['label'] != previous['label']
+    for segment in segments:
+        assert segment['frames'] == segment['end'] - segment['start']
+        assert set(result['labels'][segment['start']:segment['end']]) == {segment['label']}
+
+
+def test_gongbu_holds_and_durations(gongbu_sequence):
+    frame_sequence = gongbu_sequence(160)
+    result = ActionSegmenter().segment_sequence(frame_sequence, fps=20)
+    check_tiling(result, len(frame_sequence))
+
+    # 弓步姿态每隔一个 20 帧的保持段出现一次
+    assert intervals(result['segments'], 'gongbu_hold') == [(0, 20), (40, 60), (80, 100), (120, 140)]
+    summary = summarize_segments(result['segments'], fps=20)
+    assert summary['gongbu_hold']['count'] == 4
+    assert summary['gongbu_hold']['hold_seconds'] == [1.0] * 4
+
+
+def test_kicks_and_missing_frames(synthetic_sequence):
+    frame_sequence = synthetic_sequence(160)
+    result = ActionSegmenter().segment_sequence(frame_sequence)
+    check_tiling(result, len(frame_sequence))
+
+    # 基础姿态中第 1、3、5 个没有检测到人，其余都是踢腿
+    assert intervals(result['segments'], 'idle') == [(20, 40), (60, 80), (100, 120)]
+    assert not intervals(result['segments'], 'gongbu_hold')
+    kick_frames = sum(end - start for start, end in intervals(result['segments'], KICK_LABELS))
+    assert kick_frames == 100
+    # 连续的提膝/伸直/收腿段算作一次踢腿，最后两个保持段相连
+    assert summarize_segments(result['segments'])['kicks'] == 4
+
+
+def test_merge_runs_drops_short_holds_and_jitter():
+    labels = ['gongbu_hold'] * 2 + ['transition'] * 5 + ['idle'] + ['transition'] * 4 + ['gongbu_hold'] * 5
+    segments = ActionSegmenter()._merge_runs(labels)
+    assert [(s['label'], s['start'], s['end']) for s in segments] == [
+        ('transition', 0, 12),
+        ('gongbu_hold', 12, 17)
+    ]
+
+
+def test_update_resets_kick_state_on_missing_frame(synthetic_sequence):
+    segmenter = ActionSegmenter()
+    kick_frame = synthetic_sequence(1)[0]
+    assert segmenter.update(kick_frame) in KICK_LABELS
+    assert segmenter.update({}) == 'idle'
+    assert not segmenter.kick_extended and segmenter.previous_points is None
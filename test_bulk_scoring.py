@@ -0,0 +1,36 @@
+import csv
+import os
+import pytest
+from bulk_scoring import bulk_score
+from landmark_archive import ArchiveWriter
+from landmark_io import write_frame_file
+
+
+def write_frame_folder(folder, frame_sequence):
+    os.makedirs(folder)
+    for frame_num, frame_data in enumerate(frame_sequence):
+        write_frame_file(os.path.join(folder, f'frame_{frame_num}.txt'), [
+            {'x': coord['x'], 'y': coord['y'], 'z': coord['z'], 'visibility': coord['v']}
+            for coord in frame_data.values()
+        ])
+
+
+def test_manifest_with_folder_and_archive(tmp_path, synthetic_sequence):
+    frame_sequence = [frame_data for frame_data in synthetic_sequence(200) if frame_data]
+    write_frame_folder(tmp_path / 'athlete_a', frame_sequence)
+    with ArchiveWriter(str(tmp_path / 'athlete_b.lmk')) as writer:
+        for frame_num, frame_data in enumerate(frame_sequence):
+            writer.add(frame_num, frame_data)
+
+    manifest = tmp_path / 'manifest.csv'
+    manifest.write_text('athlete,path\nA,athlete_a\nB,athlete_b.lmk\n', encoding='utf-8')
+    stats = bulk_score(str(manifest), str(tmp_path / 'results'), workers=1)
+    assert stats['sequences'] == 2 and stats['failed'] == 0
+
+    with open(tmp_path / 'results' / 'leaderboard.csv', encoding='utf-8-sig', newline='') as f:
+        rows = {row['athlete']: row for row in csv.DictReader(f)}
+    assert rows['A']['error'] == rows['B']['error'] == ''
+    assert int(rows['A']['key_frame_count']) > 0
+    # 同一序列：文本保留 4 位小数，归档为 16 位量化，结果应一致
+    assert rows['A']['key_frame_count'] == rows['B']['key_frame_count']
+    assert float(rows['A']['score']) == pytest.approx(float(rows['B']['score']), abs=0.05)
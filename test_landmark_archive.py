@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+from landmark_archive import CODECS, QUANT_LEVELS, ArchiveWriter, LandmarkArchive
+
+
+def sample_frames(synthetic_sequence, length=300):
+    """帧号不连续，含空帧和缺少部分关键点的帧"""
+    frames = list(zip(range(0, 3 * length, 3), synthetic_sequence(length)))
+    for frame_num, frame_data in frames[::7]:
+        frame_data.pop('左踝', None)
+        frame_data.pop('右手腕', None)
+    return frames
+
+
+def write_archive(path, frames, **kwargs):
+    with ArchiveWriter(str(path), **kwargs) as writer:
+        for frame_num, frame_data in frames:
+            writer.add(frame_num, frame_data)
+        return writer.close()
+
+
+@pytest.mark.parametrize('codec', list(CODECS))
+def test_round_trip_within_quantization_error(tmp_path, synthetic_sequence, codec):
+    frames = sample_frames(synthetic_sequence)
+    stats = write_archive(tmp_path / 'a.lmk', frames, chunk_frames=64, codec=codec)
+    assert stats['frames'] == len(frames) and stats['chunks'] == 5
+
+    # 每块每个分量的误差上界为 (max - min) / 2 / 65535，取值都在 [-1, 2] 内
+    assert stats['max_error'] <= 3.0 / 2 / QUANT_LEVELS
+
+    with LandmarkArchive(str(tmp_path / 'a.lmk')) as archive:
+        assert archive.codec == codec
+        assert len(archive) == len(frames)
+        decoded = list(archive.iter_frames())
+
+    assert [frame_num for frame_num, _ in decoded] == [frame_num for frame_num, _ in frames]
+    for (_, original), (_, restored) in zip(frames, decoded):
+        assert restored.keys() == original.keys()
+        for body_part, coord in original.items():
+            for field, value in coord.items():
+                # 解码结果为 float32，另加 float32 的舍入误差
+                assert restored[body_part][field] == pytest.approx(value, abs=stats['max_error'] + 1e-6)
+
+
+def test_range_read_only_returns_requested_frames(tmp_path, synthetic_sequence):
+    frames = sample_frames(synthetic_sequence)
+    write_archive(tmp_path / 'a.lmk', frames, chunk_frames=50)
+
+    with LandmarkArchive(str(tmp_path / 'a.lmk')) as archive:
+        selected = list(archive.iter_frames(start=200, stop=400))
+        sequence = archive.load_sequence(start=200, stop=400)
+
+    expected = [frame_num for frame_num, _ in frames if 200 <= frame_num < 400]
+    assert [frame_num for frame_num, _ in selected] == expected
+    assert len(sequence) == len(expected)
+
+
+def test_rejects_bad_input_and_incomplete_files(tmp_path, synthetic_sequence):
+    frames = sample_frames(synthetic_sequence, 10)
+    with pytest.raises(ValueError):
+        ArchiveWriter(str(tmp_path / 'a.lmk'), codec='zstd')
+    with pytest.raises(ValueError):
+        write_archive(tmp_path / 'b.lmk', [frames[1], frames[0]])
+
+    # 写入出错时没有块索引，读取时报告文件不完整
+    with pytest.raises(ValueError):
+        LandmarkArchive(str(tmp_path / 'b.lmk'))
@@ -0,0 +1,37 @@
+from landmark_io import write_frame_file
+from landmark_regression import run_regression
+
+
+def write_sequence(folder, frame_sequence, frame_numbers):
+    folder.mkdir()
+    for frame_number, frame_data in zip(frame_numbers, frame_sequence):
+        write_frame_file(str(folder / f'frame_{frame_number}.txt'), [
+            {'x': coord['x'], 'y': coord['y'], 'z': coord['z'], 'visibility': coord['v']}
+            for coord in frame_data.values()
+        ])
+
+
+def test_identical_sequences_pass(tmp_path, synthetic_sequence):
+    frame_sequence = synthetic_sequence(300)
+    write_sequence(tmp_path / 'baseline', frame_sequence, range(300))
+    write_sequence(tmp_path / 'candidate', frame_sequence, range(300))
+
+    report = run_regression(str(tmp_path / 'baseline'), str(tmp_path / 'candidate'))
+    assert report['passed']
+    assert report['metrics']['mean_error'] == 0.0
+    assert report['analysis']['key_frame_changes'] == 0
+
+
+def test_dropped_frame_does_not_shift_key_frames(tmp_path, synthetic_sequence):
+    """待测序列缺一帧：只记为缺失帧，其后的关键帧按帧号比较不应错位"""
+    frame_sequence = synthetic_sequence(300)
+    write_sequence(tmp_path / 'baseline', frame_sequence, range(300))
+    kept = [n for n in range(300) if n != 3]
+    write_sequence(tmp_path / 'candidate', [frame_sequence[n] for n in kept], kept)
+
+    report = run_regression(str(tmp_path / 'baseline'), str(tmp_path / 'candidate'))
+    assert report['missing_frame_numbers'] == [3]
+    assert report['metrics']['missing_frames'] == 1
+    assert report['metrics']['key_frame_changes'] == 0
+    assert report['metrics']['total_score_delta'] == 0.0
+    assert [f['metric'] for f in report['failures']] == ['missing_frames']
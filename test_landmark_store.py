@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+from landmark_io import frames_to_array
+from landmark_store import LandmarkStore
+from pose_analysis_tantui import PoseAnalyzer_tantui
+from score_tantuidengtui import TanTuiDengTuiScorer
+
+
+def tantui_results(frame_sequence):
+    analysis_result = PoseAnalyzer_tantui().analyze_sequence(frame_sequence)
+    score_result = TanTuiDengTuiScorer().score_sequence(analysis_result, frame_sequence)
+    return analysis_result, score_result
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = LandmarkStore(str(tmp_path / 'landmarks.db'), block_size=64)
+    yield store
+    store.close()
+
+
+def test_round_trip_and_filtered_queries(store, synthetic_sequence):
+    sessions = {
+        ('A', '2026-09-20'): synthetic_sequence(300, seed=1),
+        ('A', '2026-10-02'): synthetic_sequence(300, seed=2),
+        ('B', '2026-10-05'): synthetic_sequence(200, seed=3)
+    }
+    details = {}
+    for (athlete, session_date), frame_sequence in sessions.items():
+        analysis_result, score_result = tantui_results(frame_sequence)
+        # 合成序列本身没有扣分，每场追加一条脚跟离地和一条高度不足
+        score_result['deductions']['errors'].append({'type': 'heel_lifted', 'frame': analysis_result['key_frames'][0]})
+        score_result['deductions']['specs'].append({'type': 'height', 'frame': analysis_result['key_frames'][-1]})
+        session_id = store.add_session(athlete, session_date, frame_sequence, source=athlete,
+                                       results={'tantui': (analysis_result, score_result)})
+        details[session_id] = analysis_result['details']
+
+        # 关键点按块存储，整段与跨块区间读取都与原数组一致（float32）
+        array = frames_to_array(frame_sequence)
+        np.testing.assert_allclose(store.load_landmarks(session_id), array, atol=1e-6)
+        np.testing.assert_allclose(store.load_landmarks(session_id, 50, 130), array[50:130], atol=1e-6)
+
+    rows = store.query_key_frames(move='tantui')
+    expected = [(session_id, detail['frame_index']) for session_id, items in details.items() for detail in items]
+    assert [(row['session_id'], row['frame_index']) for row in rows] == expected
+    for row in rows:
+        detail = next(d for d in details[row['session_id']] if d['frame_index'] == row['frame_index'])
+        assert row['support_leg_angle'] == pytest.approx(detail['support_leg_angle'])
+
+    # 日期与运动员过滤
+    october = store.query_key_frames(move='tantui', since='2026-10-01')
+    assert {row['session_date'] for row in october} == {'2026-10-02', '2026-10-05'}
+    assert {row['athlete'] for row in store.query_key_frames(athlete='B')} == {'B'}
+    assert store.query_key_frames(move='gongbu') == []
+
+    # 数值范围过滤：阈值取中位数，两侧结果互补
+    threshold = float(np.median([row['support_leg_angle'] for row in rows]))
+    low = store.query_key_frames(max_support_leg_angle=threshold)
+    high = store.query_key_frames(min_support_leg_angle=threshold)
+    assert all(row['support_leg_angle'] < threshold for row in low)
+    assert all(row['support_leg_angle'] >= threshold for row in high)
+    assert len(low) + len(high) == len(rows)
+
+    heel_lifted = store.query_deductions(athlete='A', deduction_type='heel_lifted')
+    assert [row['session_date'] for row in heel_lifted] == ['2026-09-20', '2026-10-02']
+    assert all(row['category'] == 'errors' for row in heel_lifted)
+    assert len(store.query_deductions(deduction_type='height', until='2026-10-02')) == 2
+    assert store.query_deductions(move='gongbu') == []
+
+
+def test_rejects_duplicate_and_unknown_session(store, synthetic_sequence):
+    frame_sequence = synthetic_sequence(300)
+    analysis_result, score_result = tantui_results(frame_sequence)
+    session_id = store.add_session('A', '2026-10-01', frame_sequence,
+                                   results={'tantui': (analysis_result, score_result)})
+    rows = store.query_key_frames()
+
+    with pytest.raises(ValueError):
+        store.add_results(session_id, 'tantui', analysis_result, score_result)
+    with pytest.raises(ValueError):
+        store.add_results(session_id + 1, 'tantui', analysis_result, score_result)
+    assert store.query_key_frames() == rows
+
+    # 其他动作仍可追加
+    store.add_results(session_id, 'gongbu', analysis_result)
+    assert store.has_results(session_id, 'gongbu')
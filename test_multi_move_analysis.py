@@ -0,0 +1,42 @@
+import pytest
+from multi_move_analysis import MultiMoveAnalyzer
+from pose_analysis_gongbu import PoseAnalyzer_gongbu
+from pose_analysis_tantui import PoseAnalyzer_tantui
+
+
+def separate_key_frames(frame_sequence):
+    """各分析器单独 analyze_sequence 得到的关键帧"""
+    return {
+        'tantui': PoseAnalyzer_tantui().analyze_sequence(frame_sequence)['key_frames'],
+        'gongbu': PoseAnalyzer_gongbu().analyze_sequence(frame_sequence)['key_frames']
+    }
+
+
+def engine_key_frames(frame_sequence):
+    results = MultiMoveAnalyzer().analyze_sequence(frame_sequence)
+    return {name: result['analysis']['key_frames'] for name, result in results.items()}
+
+
+def degenerate_kick_leg(frame_data):
+    """踢腿（脚踝较高的一侧）膝盖与髋重合，膝关节角度无定义"""
+    side = '右' if frame_data['左踝']['y'] > frame_data['右踝']['y'] else '左'
+    frame_data[side + '膝'] = dict(frame_data[side + '髋'])
+
+
+@pytest.mark.parametrize('fixture', ['synthetic_sequence', 'gongbu_sequence'])
+def test_single_pass_matches_separate_analyzers(request, fixture):
+    frame_sequence = request.getfixturevalue(fixture)(300)
+    expected = separate_key_frames(frame_sequence)
+    assert expected['tantui'] or expected['gongbu']
+    assert engine_key_frames(frame_sequence) == expected
+
+
+@pytest.mark.filterwarnings('ignore::RuntimeWarning')
+def test_degenerate_leg_matches_separate_analyzers(synthetic_sequence):
+    frame_sequence = synthetic_sequence(300)
+    key_frames = separate_key_frames(frame_sequence)['tantui']
+    assert key_frames
+    # 关键帧所在的连续段中各有一帧腿部关键点重合
+    for frame_idx in key_frames:
+        degenerate_kick_leg(frame_sequence[frame_idx])
+    assert engine_key_frames(frame_sequence) == separate_key_frames(frame_sequence)
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+from peak_detection import find_local_maxima, find_peaks, peak_prominences
+
+signal = pytest.importorskip('scipy.signal')
+
+
+def random_signals(count=20, length=200):
+    """带噪声的随机游走，取值连续，不会出现高度相同的峰"""
+    rng = np.random.default_rng(0)
+    for _ in range(count):
+        yield np.cumsum(rng.normal(0, 1, length)) + rng.normal(0, 0.5, length)
+
+
+def test_local_maxima_and_prominences_match_scipy():
+    for values in random_signals():
+        peaks = find_local_maxima(values)
+        assert peaks == list(signal.find_peaks(values)[0])
+        expected = signal.peak_prominences(values, peaks)[0]
+        assert np.allclose(peak_prominences(values)[peaks], expected)
+
+
+@pytest.mark.parametrize('prominence, distance', [(0.0, 1), (1.0, 1), (0.0, 10)])
+def test_find_peaks_matches_scipy(prominence, distance):
+    for values in random_signals():
+        expected = signal.find_peaks(values, prominence=prominence, distance=distance)[0]
+        assert find_peaks(values, prominence=prominence, distance=distance) == list(expected)
+
+
+def select_by_distance(values, peaks, distance):
+    """朴素实现：从高到低，与已保留的峰间隔不足 distance 的丢弃"""
+    kept = []
+    for p in sorted(peaks, key=lambda p: -values[p]):
+        if all(abs(p - q) >= distance for q in kept):
+            kept.append(p)
+    return sorted(kept)
+
+
+@pytest.mark.parametrize('prominence, distance', [(1.0, 10), (2.0, 15)])
+def test_find_peaks_filters_prominence_before_distance(prominence, distance):
+    """
+    与 scipy 不同，先按突出度筛选再按间隔筛选：
+    紧挨着真正顶点、更高但不突出的小波动不会把顶点挤掉
+    """
+    for values in random_signals():
+        prominent = signal.find_peaks(values, prominence=prominence)[0]
+        expected = select_by_distance(values, prominent, distance)
+        assert find_peaks(values, prominence=prominence, distance=distance) == expected
+
+    # 峰 3 比峰 1 高但几乎不突出：scipy 先按间隔用峰 3 挤掉峰 1，再因突出度丢弃峰 3
+    values = np.array([0, 5, 4, 6, 5.95, 5.9, 5.95, 10, 0])
+    assert list(signal.find_peaks(values, prominence=1, distance=3)[0]) == [7]
+    assert find_peaks(values, prominence=1, distance=3) == [1, 7]
+
+
+def test_plateau_takes_middle_and_nan_is_lowest():
+    values = np.array([0, 1, 3, 3, 3, 3, 1, 0, 2, 0])
+    assert find_peaks(values) == list(signal.find_peaks(values)[0]) == [3, 8]
+
+    with_nan = np.array([np.nan, 1.0, 0.5, 2.0, np.nan, 0.0])
+    assert find_peaks(with_nan) == [1, 3]
+    assert find_peaks([np.nan, np.nan, np.nan]) == []
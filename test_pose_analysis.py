@@ -1,5 +1,5 @@
 import numpy as np
-from pose_analysis_gongbu import PoseAnalyzer
+from pose_analysis_gongbu import PoseAnalyzer_gongbu as PoseAnalyzer
 
 def create_test_frame(raw_data_text):
     """创建测试帧数据"""
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+onnx = pytest.importorskip('onnx')
+pytest.importorskip('onnxruntime')
+from onnx import TensorProto, helper, numpy_helper
+from pose_backends import OnnxPoseBackend
+
+
+def write_model(path, batch='N', size=64, point=(32, 16)):
+    """线性替身模型：关键点恒为输入像素 point，人体存在 logit = 10 * 输入均值 - 3"""
+    inputs = [helper.make_tensor_value_info('input_1', TensorProto.FLOAT, [batch, size, size, 3])]
+    outputs = [helper.make_tensor_value_info('Identity', TensorProto.FLOAT, [batch, 195]),
+               helper.make_tensor_value_info('Identity_1', TensorProto.FLOAT, [batch, 1])]
+    pixels = size * size * 3
+    initializers = [
+        numpy_helper.from_array(np.zeros((pixels, 195), np.float32), 'w'),
+        numpy_helper.from_array(np.tile(np.array([*point, 0, 5, 5], np.float32), 39), 'b'),
+        numpy_helper.from_array(np.full((pixels, 1), 10.0 / pixels, np.float32), 'pw'),
+        numpy_helper.from_array(np.array([-3.0], np.float32), 'pb')
+    ]
+    nodes = [helper.make_node('Flatten', ['input_1'], ['flat']),
+             helper.make_node('Gemm', ['flat', 'w', 'b'], ['Identity']),
+             helper.make_node('Gemm', ['flat', 'pw', 'pb'], ['Identity_1'])]
+    model = helper.make_model(helper.make_graph(nodes, 'pose', inputs, outputs, initializers),
+                              opset_imports=[helper.make_opsetid('', 13)])
+    model.ir_version = 8
+    onnx.save(model, str(path))
+    return str(path)
+
+
+def frames(count, width=128, height=96):
+    return [np.full((height, width, 3), 200, dtype=np.uint8) for _ in range(count)]
+
+
+@pytest.mark.parametrize('batch', ['N', 1, 4])
+def test_short_last_batch_and_letterbox(tmp_path, batch):
+    backend = OnnxPoseBackend(write_model(tmp_path / 'm.onnx', batch=batch), batch_size=8)
+    assert backend.batch_size == (8 if batch == 'N' else batch)
+    results = backend.process_batch(frames(10))
+    assert len(results) == 10 and all(results)
+    # 128x96 的画面补黑边成 128x128 再缩放，输入像素 (32, 16) 对应画面 (64, 0 + 16)
+    for landmarks in results:
+        assert landmarks[0]['x'] == pytest.approx(0.5)
+        assert landmarks[0]['y'] == pytest.approx(16 / 96)
+
+
+def test_crop_follows_previous_landmarks(tmp_path):
+    backend = OnnxPoseBackend(write_model(tmp_path / 'm.onnx'), roi_padding=0.0)
+    # 上一帧的人物框为画面中 (40, 20) - (80, 60)，宽高相同，无需扩展
+    backend.previous_landmarks = [{'x': x / 128, 'y': y / 96, 'z': 0.0, 'visibility': 1.0}
+                                  for x, y in [(40, 20), (80, 60)] * 17][:33]
+    landmarks = backend.process(frames(1)[0])
+    assert landmarks[0]['x'] == pytest.approx((32 / 64 * 40 + 40) / 128)
+    assert landmarks[0]['y'] == pytest.approx((16 / 64 * 40 + 20) / 96)
+    assert landmarks[0]['z'] == pytest.approx(0.0)
+
+    # 不跟踪时每帧都用整帧
+    backend = OnnxPoseBackend(str(tmp_path / 'm.onnx'), roi_padding=None)
+    backend.previous_landmarks = [{'x': 0.5, 'y': 0.5, 'z': 0.0, 'visibility': 1.0}] * 33
+    assert backend.process(frames(1)[0])[0]['x'] == pytest.approx(0.5)
+
+
+def test_dark_frame_has_no_person(tmp_path):
+    backend = OnnxPoseBackend(write_model(tmp_path / 'm.onnx'))
+    dark = np.zeros((96, 128, 3), dtype=np.uint8)
+    assert backend.process_batch([dark] + frames(1))[0] is None
@@ -0,0 +1,85 @@
+import os
+import subprocess
+import sys
+import textwrap
+import cv2
+import numpy as np
+from pose_detection import load_checkpoint
+
+# 检测后端与画面窗口的替身，process_video 只需 process()；第 kill_at 次检测时强制结束进程（不执行 finally）
+FAKE_BACKEND = textwrap.dedent('''
+    import os
+    import cv2
+    from pose_detection import PoseDetector
+
+    class FakeBackend:
+        def __init__(self, kill_at=None):
+            self.calls = 0
+            self.kill_at = kill_at
+
+        def process(self, frame_rgb):
+            self.calls += 1
+            if self.calls == self.kill_at:
+                os._exit(1)
+            return [{'x': 0.5, 'y': 0.5, 'z': 0.0, 'visibility': 0.9}] * 33
+
+    def patch(kill_at=None):
+        PoseDetector._create_backend = lambda self: FakeBackend(kill_at)
+        cv2.imshow = lambda *args: None
+        cv2.waitKey = lambda *args: -1
+        cv2.destroyAllWindows = lambda: None
+''')
+
+
+def write_video(path, frames=60, size=(64, 48)):
+    rng = np.random.default_rng(0)
+    out = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'mp4v'), 30, size)
+    for _ in range(frames):
+        out.write(rng.integers(0, 255, (size[1], size[0], 3), dtype=np.uint8))
+    out.release()
+
+
+def count_frames(path):
+    cap = cv2.VideoCapture(str(path))
+    count = 0
+    while cap.read()[0]:
+        count += 1
+    cap.release()
+    return count
+
+
+def run_python(tmp_path, code):
+    (tmp_path / 'fake_backend.py').write_text(FAKE_BACKEND, encoding='utf-8')
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(tmp_path), os.path.dirname(os.path.abspath(__file__))]))
+    return subprocess.run([sys.executable, '-c', textwrap.dedent(code)], cwd=tmp_path, env=env,
+                          capture_output=True, text=True)
+
+
+def test_resume_after_hard_kill_keeps_whole_video(tmp_path):
+    video = tmp_path / 'v.mp4'
+    write_video(video)
+    output_dir = tmp_path / 'out'
+
+    # 第 35 帧检测时强制结束，最后一个检查点在第 30 帧
+    killed = run_python(tmp_path, f'''
+        import fake_backend
+        fake_backend.patch(kill_at=36)
+        fake_backend.PoseDetector().process_video({str(video)!r}, {str(output_dir)!r}, checkpoint_interval=10)
+    ''')
+    assert killed.returncode == 1
+    state = load_checkpoint(str(output_dir))
+    assert state['next_frame'] == 30
+    assert sum(segment['frames'] for segment in state['video_segments']) == 30
+
+    resumed = run_python(tmp_path, f'''
+        import fake_backend
+        fake_backend.patch()
+        fake_backend.PoseDetector().process_video({str(video)!r}, {str(output_dir)!r}, resume=True,
+                                                  checkpoint_interval=10)
+    ''')
+    assert resumed.returncode == 0, resumed.stderr
+    state = load_checkpoint(str(output_dir))
+    assert state['completed'] and state['video_segments'] == []
+    assert count_frames(output_dir / 'processed_video.mp4') == 60
+    assert not [name for name in os.listdir(output_dir) if name.startswith('processed_video_part')]
+    assert len([name for name in os.listdir(output_dir) if name.startswith('frame_')]) == 60
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from landmark_io import frames_to_array
+from pose_index import PoseIndex, normalize_poses
+
+
+def brute_force(frame_sequence, refs, frame_data, k):
+    """对全部可归一化的帧逐一计算距离"""
+    vectors, valid = normalize_poses(frames_to_array(frame_sequence))
+    query, _ = normalize_poses(frames_to_array([frame_data]))
+    candidates = [(float(np.linalg.norm(vector - query[0])), ref)
+                  for vector, ref, ok in zip(vectors, refs, valid) if ok]
+    return sorted(candidates)[:k]
+
+
+def test_build_insert_query_and_reload(tmp_path, synthetic_sequence):
+    frame_sequence = synthetic_sequence(300)
+    refs = [('a', frame_num) for frame_num in range(len(frame_sequence))]
+    # 没有检测到人或躯干长度无法确定的帧不能归一化，不加入索引
+    _, valid = normalize_poses(frames_to_array(frame_sequence))
+    index = PoseIndex(rebuild_ratio=0.1, min_rebuild=16)
+    assert index.build(frames_to_array(frame_sequence[:200]), refs[:200]) == valid[:200].sum()
+
+    # 缓冲区达到 max(16, 0.1 * 主索引) 时合并进主索引，其余留在缓冲区
+    tree_size = len(index.vectors)
+    for frame_data, ref, ok in zip(frame_sequence[200:], refs[200:], valid[200:]):
+        assert index.insert(frame_data, ref) == ok
+    assert len(index.vectors) > tree_size and index.buffer
+    assert len(index) == valid.sum()
+
+    queries = [frame_sequence[i] for i in np.flatnonzero(valid)[[0, 50, -20, -1]]]
+    for frame_data in queries:
+        expected = brute_force(frame_sequence, refs, frame_data, k=7)
+        matches = index.query(frame_data, k=7)
+        assert [match['ref'] for match in matches] == [ref for _, ref in expected]
+        assert [match['distance'] for match in matches] == pytest.approx([d for d, _ in expected])
+    assert index.query({}) == []
+
+    # 保存时合并缓冲区，重新加载后结果不变
+    before = [index.query(frame_data, k=7) for frame_data in queries]
+    index.save(str(tmp_path / 'index.npz'))
+    assert not index.buffer
+    loaded = PoseIndex()
+    loaded.load(str(tmp_path / 'index.npz'))
+    assert loaded.refs == index.refs
+    for frame_data, expected in zip(queries, before):
+        matches = loaded.query(frame_data, k=7)
+        assert [match['ref'] for match in matches] == [match['ref'] for match in expected]
+        assert [match['distance'] for match in matches] == pytest.approx([m['distance'] for m in expected])
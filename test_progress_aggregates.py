@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+from landmark_store import LandmarkStore
+from pose_analysis_tantui import PoseAnalyzer_tantui
+from progress_aggregates import HISTOGRAM_BINS, ProgressAggregates, merge_summaries, summarize_values
+from score_tantuidengtui import TanTuiDengTuiScorer
+
+
+def tantui_results(frame_sequence):
+    analysis_result = PoseAnalyzer_tantui().analyze_sequence(frame_sequence)
+    score_result = TanTuiDengTuiScorer().score_sequence(analysis_result, frame_sequence)
+    return analysis_result, score_result
+
+
+def test_merged_summaries_match_numpy():
+    """分批小结逐次合并，与对全部数值一次计算的结果一致"""
+    rng = np.random.default_rng(0)
+    batches = [rng.normal(150, 12, size) for size in (1, 7, 30, 3)]
+    merged = summarize_values('support_leg_angle', batches[0])
+    for batch in batches[1:]:
+        merged = merge_summaries(merged, summarize_values('support_leg_angle', batch))
+
+    values = np.concatenate(batches)
+    count, mean, m2, minimum, maximum, histogram = merged
+    low, high, bins = HISTOGRAM_BINS['support_leg_angle']
+    assert count == len(values)
+    assert mean == pytest.approx(values.mean())
+    assert np.sqrt(m2 / (count - 1)) == pytest.approx(values.std(ddof=1))
+    assert (minimum, maximum) == (values.min(), values.max())
+    expected = np.histogram(np.clip(values, low, high - 1e-9), bins=bins, range=(low, high))[0]
+    assert list(histogram) == list(expected)
+
+
+def test_key_frame_score_histogram_uses_percent_scale(tmp_path, synthetic_sequence):
+    """单帧得分为 0~100 分制，直方图不应全部落在最后一个分箱"""
+    analysis_result, score_result = tantui_results(synthetic_sequence(300))
+    scores = [s['score'] for s in analysis_result['scores']]
+    assert scores and max(scores) > 10
+
+    aggregates = ProgressAggregates(str(tmp_path / 'progress.db'))
+    aggregates.add_results('A', '2026-10-01', 'tantui', analysis_result, score_result)
+    stats = aggregates.summary('A', 'tantui', 'key_frame_score')
+    aggregates.close()
+
+    assert stats['count'] == len(scores)
+    assert stats['bin_edges'][-1] == 100.0
+    assert stats['histogram'][-1] < len(scores)
+    for score in scores:
+        assert stats['histogram'][min(int(score // 5), 19)] > 0
+
+
+def test_store_rejects_duplicate_results(tmp_path, synthetic_sequence):
+    frame_sequence = synthetic_sequence(300)
+    analysis_result, score_result = tantui_results(frame_sequence)
+    store = LandmarkStore(str(tmp_path / 'landmarks.db'))
+    session_id = store.add_session('A', '2026-10-01', frame_sequence,
+                                   results={'tantui': (analysis_result, score_result)})
+    before = store.aggregates.summary('A', 'tantui', 'key_frame_score')
+
+    with pytest.raises(ValueError):
+        store.add_results(session_id, 'tantui', analysis_result, score_result)
+    with pytest.raises(ValueError):
+        store.add_results(session_id + 1, 'tantui', analysis_result, score_result)
+
+    after = store.aggregates.summary('A', 'tantui', 'key_frame_score')
+    assert after['count'] == before['count'] == len(analysis_result['scores'])
+    assert after['sessions'] == 1
+    assert len(store.query_deductions(athlete='A')) == sum(
+        len(items) for items in score_result['deductions'].values())
+    store.close()
+
+
+def test_non_finite_values_are_skipped(tmp_path, synthetic_sequence):
+    """腿部关键点重合时关节角度为 NaN，不能使整个场次的写入失败"""
+    analysis_result, score_result = tantui_results(synthetic_sequence(300))
+    details = analysis_result['details']
+    assert len(details) >= 2
+    details[0]['support_leg_angle'] = float('nan')
+    details[1]['kick_leg_angle'] = float('inf')
+
+    store = LandmarkStore(str(tmp_path / 'landmarks.db'))
+    session_id = store.add_session('A', '2026-10-01')
+    store.add_results(session_id, 'tantui', analysis_result, score_result)
+    assert store.aggregates.summary('A', 'tantui', 'support_leg_angle')['count'] == len(details) - 1
+    kick_leg_angle = store.aggregates.summary('A', 'tantui', 'kick_leg_angle')
+    assert kick_leg_angle['count'] == len(details) - 1
+    assert np.isfinite(kick_leg_angle['mean']) and np.isfinite(kick_leg_angle['max'])
+    store.close()
+
+
+def test_monthly_trend(tmp_path, synthetic_sequence):
+    store = LandmarkStore(str(tmp_path / 'landmarks.db'))
+    for seed, session_date in enumerate(('2026-09-03', '2026-09-20', '2026-10-05')):
+        analysis_result, score_result = tantui_results(synthetic_sequence(300, seed=seed))
+        session_id = store.add_session('A', session_date)
+        store.add_results(session_id, 'tantui', analysis_result, score_result)
+
+    trend = store.aggregates.trend('A', 'tantui', 'session_score')
+    assert [point['period'] for point in trend] == ['2026-09', '2026-10']
+    assert [point['sessions'] for point in trend] == [2, 1]
+    assert store.aggregates.summary('A', 'tantui', 'session_score')['count'] == 3
+    assert store.aggregates.trend('A', 'tantui', 'session_score', since='2026-10') == trend[1:]
+    store.close()
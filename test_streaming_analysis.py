@@ -0,0 +1,45 @@
+import pytest
+from pose_analysis_gongbu import PoseAnalyzer_gongbu
+from pose_analysis_tantui import PoseAnalyzer_tantui
+from score_tantuidengtui import TanTuiDengTuiScorer
+from streaming_analysis import FrameWindow, analyze_stream
+
+
+def test_tantui_stream_matches_batch(synthetic_sequence):
+    frame_sequence = synthetic_sequence(400)
+    analysis_result = PoseAnalyzer_tantui().analyze_sequence(frame_sequence)
+    score_result = TanTuiDengTuiScorer().score_sequence(analysis_result, frame_sequence)
+    assert analysis_result['key_frames']
+
+    stream_analysis, stream_score = analyze_stream(iter(frame_sequence), PoseAnalyzer_tantui(),
+                                                   TanTuiDengTuiScorer())
+    assert stream_analysis == analysis_result
+    assert stream_score == score_result
+
+
+def test_gongbu_stream_matches_batch(gongbu_sequence):
+    frame_sequence = gongbu_sequence(400)
+    analysis_result = PoseAnalyzer_gongbu().analyze_sequence(frame_sequence)
+    assert analysis_result['key_frames']
+
+    stream_analysis, _ = analyze_stream(iter(frame_sequence), PoseAnalyzer_gongbu())
+    # 整段与在线的滚动抖动只有舍入误差
+    assert stream_analysis['key_frames'] == analysis_result['key_frames']
+    assert [s['score'] for s in stream_analysis['scores']] == \
+        pytest.approx([s['score'] for s in analysis_result['scores']])
+
+
+def test_frame_window_rejects_frames_outside_window():
+    window = FrameWindow(3)
+    for i in range(5):
+        window.append({'i': i})
+    assert len(window) == 5
+    assert window[2] == {'i': 2} and window[-1] == {'i': 4}
+    assert window[3:5] == [{'i': 3}, {'i': 4}]
+    with pytest.raises(IndexError):
+        window[1]
+
+
+def test_peak_mode_is_rejected(synthetic_sequence):
+    with pytest.raises(ValueError):
+        analyze_stream(iter(synthetic_sequence(10)), PoseAnalyzer_tantui('peak'))
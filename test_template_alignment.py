@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from template_alignment import TemplateAligner, _band, banded_dtw, sequence_features
+
+
+def naive_dtw(query, reference, lo=None, hi=None):
+    """逐格 O(n·m) 递推，可选限制在 [lo[i], hi[i]) 的带内"""
+    n, m = len(query), len(reference)
+    D = np.full((n + 1, m + 1), np.inf)
+    D[0, 0] = 0.0
+    for i in range(1, n + 1):
+        for j in range(1, m + 1):
+            if lo is not None and not lo[i - 1] <= j - 1 < hi[i - 1]:
+                continue
+            cost = np.linalg.norm(query[i - 1] - reference[j - 1])
+            D[i, j] = cost + min(D[i - 1, j - 1], D[i - 1, j], D[i, j - 1])
+    return D[n, m]
+
+
+def random_features(length, seed):
+    rng = np.random.default_rng(seed)
+    return np.cumsum(rng.normal(0, 0.05, (length, 4)), axis=0)
+
+
+@pytest.mark.parametrize('n, m, window', [(40, 40, 4), (30, 55, 6), (60, 25, 3), (1, 10, 2), (12, 1, 2)])
+def test_banded_dtw_matches_naive_dp(n, m, window):
+    query, reference = random_features(n, 1), random_features(m, 2)
+    total_cost, path, step_costs = banded_dtw(query, reference, window)
+
+    lo, hi = _band(n, m, window)
+    assert total_cost == pytest.approx(naive_dtw(query, reference, lo, hi))
+
+    # 路径从起点到终点、每步只走一格，代价之和等于总代价
+    assert path[0] == (0, 0) and path[-1] == (n - 1, m - 1)
+    for (i0, j0), (i1, j1) in zip(path, path[1:]):
+        assert (i1 - i0, j1 - j0) in ((1, 1), (1, 0), (0, 1))
+    assert all(lo[i] <= j < hi[i] for i, j in path)
+    assert step_costs.sum() == pytest.approx(total_cost)
+
+
+def test_wide_band_is_unconstrained_dtw():
+    query, reference = random_features(35, 3), random_features(50, 4)
+    total_cost, _, _ = banded_dtw(query, reference, window=50)
+    assert total_cost == pytest.approx(naive_dtw(query, reference))
+
+
+def test_align_identical_sequence(synthetic_sequence):
+    frame_sequence = synthetic_sequence(120)
+    reference = sequence_features(frame_sequence)
+    result = TemplateAligner().align(frame_sequence, reference)
+    assert result['total_cost'] == pytest.approx(0.0)
+    assert result['path'] == [(i, i) for i in range(len(frame_sequence))]
+    assert result['mean_angle_error'] == pytest.approx(0.0)